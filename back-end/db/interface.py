@@ -1,9 +1,19 @@
 import psycopg2
-from psycopg2.pool import SimpleConnectionPool
+import psycopg2.extensions
+from psycopg2 import sql as pgsql
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import RealDictCursor
+import logging
 import os
 import time
-import socket
+import threading
+from contextlib import contextmanager
+
+from utils import deadline
+from utils.startup import wait_until
+from utils.tracing import SPAN_KIND_CLIENT, tracer
+
+logger = logging.getLogger(__name__)
 
 # --- Environment Configuration (Keep as is) ---
 DB_NAME = os.getenv("DB_NAME")
@@ -12,23 +22,102 @@ DB_USER = os.getenv("DB_USER")
 DB_PASS = os.getenv("DB_PASSWORD")
 DB_PORT = os.getenv("DB_PORT")
 
+# Seconds a request may wait for a free pooled connection before giving up
+POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", 10))
+# Seconds past a request's deadline before a query still running is cancelled from the
+# client; normally the server-side statement_timeout (set from the same deadline) fires first
+DEADLINE_CANCEL_GRACE = float(os.getenv("DB_DEADLINE_CANCEL_GRACE", 0.25))
+
+# --- Column whitelists for sparse fieldsets (?fields=) ---
+# Only these columns may be projected by callers; AppUser.password is never exposed.
+ITEM_COLUMNS = ("item_id", "title", "price", "description", "category", "list_date", "creator_id")
+APP_USER_COLUMNS = ("user_id", "username", "email", "organization_id", "organization_role", "ebay_account_id", "etsy_account_id")
+APP_TRANSACTION_COLUMNS = ("transaction_id", "sale_date", "total", "tax", "seller_comission", "seller_id")
+
+
+def projection(columns, default="*", alias=None):
+    """
+    Builds the SELECT list for a query. `columns` must already be validated against
+    one of the whitelists above; they are still quoted as identifiers.
+    Falls back to `default` (raw SQL) when no columns are requested.
+    """
+    if not columns:
+        return pgsql.SQL(default)
+    if alias:
+        return pgsql.SQL(", ").join(pgsql.Identifier(alias, c) for c in columns)
+    return pgsql.SQL(", ").join(pgsql.Identifier(c) for c in columns)
+
+
+def probe_database(connect_timeout=2):
+    """
+    Opens a fresh connection and runs SELECT 1. An open TCP port is not enough:
+    Postgres accepts connections before it is ready to serve queries.
+    Raises: psycopg2.Error if the database can't answer yet.
+    """
+    conn = psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASS,
+        host=DB_HOST,
+        port=DB_PORT,
+        connect_timeout=connect_timeout,
+    )
+    try:
+        with conn.cursor() as curr:
+            curr.execute("SELECT 1;")
+            curr.fetchone()
+    finally:
+        conn.close()
+
+
 # A function to pause execution untill the database is online
 def wait_for_db(timeout=int):
-    time.sleep(4)
-    start_time = time.time()
+    """Probes the database with exponential backoff (no fixed sleep) until it answers or `timeout` passes."""
+    try:
+        return wait_until(probe_database, timeout, what=f"Database at {DB_HOST}:{DB_PORT}")
+    except TimeoutError as e:
+        logger.error("Server timeout reached waiting for db!", extra={"error": str(e)})
+        exit()
+
+
+# Time this thread has spent in execute_query() since the last reset; the metrics
+# middleware resets it when a request starts and reads it when the request ends.
+_query_timing = threading.local()
+
+
+def reset_query_time():
+    _query_timing.seconds = 0.0
+
+
+def query_time() -> float:
+    """Seconds spent in execute_query() on this thread since reset_query_time()."""
+    return getattr(_query_timing, "seconds", 0.0)
 
-    while True:
-        try:
-            # Note: DB_PORT from env is a string, but socket.create_connection handles it.
-            with socket.create_connection((DB_HOST, DB_PORT), timeout=2):
-                print(f"[INFO] Database is available at port {DB_PORT}")
-                return
-        except OSError:
-            print(f"[INFO] Waiting for database at {DB_HOST}:{DB_PORT}...")
-            time.sleep(1)
-            if time.time() - start_time > timeout:
-                print("[INFO] Server timeout reached waiting for db!")
-                exit()
+
+def _with_statement_timeout(sql, remaining):
+    """
+    Prefixes the statement with SET LOCAL statement_timeout for the time left, so the
+    server stops it at the deadline. Sent in the same round trip; the setting ends with
+    the transaction (commit, or the rollback when the connection goes back to the pool).
+    """
+    prefix = f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}; "
+    if isinstance(sql, str):
+        return prefix + sql
+    return pgsql.Composed([pgsql.SQL(prefix), sql])
+
+
+def _statement_text(sql, conn, limit=500) -> str:
+    # Composed statements (sparse fieldsets) need a connection to render
+    try:
+        text = sql if isinstance(sql, str) else sql.as_string(conn)
+    except Exception:
+        text = repr(sql)
+    return " ".join(text.split())[:limit]
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection became free within the checkout timeout."""
+    pass
 
 
 class ConnectionPool:
@@ -38,48 +127,132 @@ class ConnectionPool:
         self.max_conn = max_conn
         self.db_pool = None
 
-        try:
-            self.db_pool = SimpleConnectionPool(
-                minconn=self.min_conn,
-                maxconn=self.max_conn,
-                database=DB_NAME,
-                user=DB_USER,
-                host=DB_HOST,
-                port=DB_PORT,
-                password=DB_PASS
-            )
-            print("[INFO] Successfully connected to database!")
-            print(f"[INFO] psycopg2 connection pool initialized with max={self.max_conn} and min={self.min_conn}")
-        except Exception as e:
-            print(f"[ERROR] Unable to initialize connection pool! [ConnectionPool::__init__]\n Error: {e}")
-            exit()
+        # psycopg2 pools raise immediately when exhausted; the semaphore makes callers
+        # queue for a connection instead, which also lets us measure the wait.
+        self._slots = threading.BoundedSemaphore(max_conn)
+        self._stats_lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_ewma = 0.0  # exponentially weighted recent checkout wait (seconds)
+        self._wait_updated_at = time.monotonic()
+
+        # The psycopg2 pool (and its first connections) is created on first checkout, so
+        # building the app never blocks on the database; see wait_for_db() for readiness.
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        if self.db_pool is None:
+            with self._pool_lock:
+                if self.db_pool is None:
+                    try:
+                        # Threaded variant: the Flask server handles requests on several threads
+                        self.db_pool = ThreadedConnectionPool(
+                            minconn=self.min_conn,
+                            maxconn=self.max_conn,
+                            database=DB_NAME,
+                            user=DB_USER,
+                            host=DB_HOST,
+                            port=DB_PORT,
+                            password=DB_PASS
+                        )
+                        logger.info("Successfully connected to database!")
+                        logger.info("psycopg2 connection pool initialized with max=%s and min=%s", self.max_conn, self.min_conn)
+                    except Exception as e:
+                        logger.error("Unable to initialize connection pool!", extra={"error": str(e)})
+                        raise
+        return self.db_pool
+
+    def _record_wait(self, waited):
+        with self._stats_lock:
+            self.wait_seconds_total += waited
+            self.wait_ewma = 0.8 * self._decayed_wait() + 0.2 * waited
+            self._wait_updated_at = time.monotonic()
+
+    def _decayed_wait(self):
+        # Halve the average for every second without checkouts, so a shed burst doesn't
+        # keep the pool looking congested once traffic stops reaching it
+        idle = time.monotonic() - self._wait_updated_at
+        return self.wait_ewma * (0.5 ** idle)
+
+    def recent_wait(self) -> float:
+        """Recent average time callers spent waiting for a connection (seconds)."""
+        with self._stats_lock:
+            return self._decayed_wait()
+
+    def get_conn(self, timeout=None):
+        # Never wait past the request's deadline
+        limit = deadline.timeout(POOL_CHECKOUT_TIMEOUT if timeout is None else timeout, "pool checkout")
+        start = time.perf_counter()
+        with self._stats_lock:
+            self.waiting += 1
+        with tracer.span("db.pool.checkout") as span:
+            acquired = self._slots.acquire(timeout=limit)
+            span.set_attribute("db.pool.acquired", acquired)
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.waiting -= 1
+        self._record_wait(waited)
+
+        if not acquired:
+            with self._stats_lock:
+                self.timeouts += 1
+            logger.error("Timed out after %.2fs waiting for a connection", waited, extra={"hot": True})
+            if deadline.expired():
+                raise deadline.DeadlineExceeded(f"Deadline exceeded waiting {waited:.2f}s for a database connection")
+            raise PoolTimeoutError(f"No database connection available after {waited:.2f}s")
 
-    def get_conn(self):
         try:
-            return self.db_pool.getconn()
+            conn = self._get_pool().getconn()
         except Exception as e:
-            print(f"[ERROR] Unable to borrow connection [ConnectionPool::get_conn]\n Error: {e}")
+            self._slots.release()
+            logger.error("Unable to borrow connection", extra={"error": str(e), "hot": True})
             raise  # Re-raise for the caller to handle
+
+        with self._stats_lock:
+            self.in_use += 1
+            self.checkouts += 1
+        return conn
     
     def return_conn(self, conn):
         try:
             self.db_pool.putconn(conn)
         except Exception as e:
-            print(f"[ERROR] Unable to return conn to pool! [ConnectionPool::return_conn]\n Error: {e}")
+            logger.error("Unable to return conn to pool!", extra={"error": str(e)})
             exit()
+        finally:
+            with self._stats_lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_conn": self.max_conn,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_ewma_seconds": self._decayed_wait(),
+            }
     
     def close_pool(self):
+        if self.db_pool is None:
+            return
         try:
             self.db_pool.closeall()
-            print("[INFO] Pool has been closed!")
+            logger.info("Pool has been closed!")
         except Exception as e:
-            print(f"[ERROR] Unable to close conn pool! [ConnectionPool::close_pool]\n Error: {e}")
+            logger.error("Unable to close conn pool!", extra={"error": str(e)})
 
 
 # Method to load database schema into Postgres container
 def load_schema(schema_file_path) -> bool:
     if not os.path.exists(schema_file_path):
-        print("[ERROR] Schema file does not exist! [db_interface::load_schema]")
+        logger.error("Schema file does not exist!", extra={"path": schema_file_path})
         return False
 
     conn = None
@@ -100,10 +273,10 @@ def load_schema(schema_file_path) -> bool:
         curr = conn.cursor()
         
         curr.execute(sql_script)
-        print(f"[INFO] Schema from '{schema_file_path}' loaded successfully! [db_interface::load_schema]")
+        logger.info("Schema from '%s' loaded successfully!", schema_file_path)
         return True
     except psycopg2.Error as e:
-        print(f"[ERROR] Schema file from '{schema_file_path}' could not be loaded/read! [db_interface::load_schema] \nError: {e}")
+        logger.error("Schema file from '%s' could not be loaded/read!", schema_file_path, extra={"error": str(e)})
         # Note: autocommit=True means no need for conn.rollback() on error here.
         return False
     finally:
@@ -117,17 +290,72 @@ class DBInterface:
     def __init__(self):
         # Composition of ConnectionPool object for conn management
         self.pool = ConnectionPool(1, 15)
+        # Connection pinned to the current thread by pinned_connection(), if any
+        self._local = threading.local()
+
+    @contextmanager
+    def pinned_connection(self):
+        """
+        Borrows a single pool connection and routes every execute_query() made by this
+        thread through it until the block exits (used by /batch so N subrequests cost
+        one checkout). Nested use reuses the outer connection.
+        """
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            yield pinned
+            return
+
+        conn = self.pool.get_conn()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self.pool.return_conn(conn)  # the pool rolls back any open read transaction
+
+    def ping(self, checkout_timeout=1.0) -> float:
+        """
+        Runs SELECT 1 on a pooled connection, waiting at most `checkout_timeout` seconds
+        for one (health checks must not queue behind a saturated pool for long).
+        Returns: the round trip in seconds, checkout included.
+        Raises: PoolTimeoutError or psycopg2.Error.
+        """
+        start = time.perf_counter()
+        conn = self.pool.get_conn(timeout=checkout_timeout)
+        try:
+            with conn.cursor() as curr:
+                curr.execute("SELECT 1;")
+                curr.fetchone()
+        finally:
+            self.pool.return_conn(conn)
+        return time.perf_counter() - start
 
     # General method for PostgreSQL queries
     def execute_query(self, sql, params=None, fetch_one=False, fetch_all=False, commit=False):
         conn = None
         curr = None
         result = None
+        pinned = getattr(self._local, "conn", None)
+        start = time.perf_counter()
+        span = tracer.span("db.query", kind=SPAN_KIND_CLIENT, **{"db.pinned": pinned is not None}).start()
+        error = None
+        watch = None
         try:
-            conn = self.pool.get_conn()
+            conn = pinned or self.pool.get_conn()
+            if tracer.enabled:
+                span.set_attribute("db.statement", _statement_text(sql, conn))
             # Use RealDictCursor to return results as dictionaries (better for Flask/JSON)
             curr = conn.cursor(cursor_factory=RealDictCursor) 
-            
+
+            # Under a request deadline the server stops the statement when time runs out,
+            # and the watchdog cancels it from here if the server didn't
+            remaining = deadline.remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    raise deadline.DeadlineExceeded("Deadline exceeded before query")
+                sql = _with_statement_timeout(sql, remaining)
+                watch = deadline.watchdog.watch(deadline.expires_at() + DEADLINE_CANCEL_GRACE, conn.cancel)
+
             curr.execute(sql, params)
             
             if fetch_all:
@@ -139,20 +367,33 @@ class DBInterface:
                 conn.commit()
 
         except psycopg2.Error as e:
-            print(f"[ERROR] Unable to fulfill transaction! [DBInterface::execute_query]\n Error: {e}")
+            error = e
             if conn and not conn.autocommit:
                 conn.rollback()
+            # Raised for both statement_timeout and conn.cancel() (SQLSTATE 57014)
+            if isinstance(e, psycopg2.extensions.QueryCanceledError) and deadline.remaining() is not None:
+                logger.warning("Query stopped at the request deadline", extra={"hot": True})
+                raise deadline.DeadlineExceeded("Deadline exceeded during query") from e
+            logger.error("Unable to fulfill transaction!", extra={"error": str(e), "hot": True})
             raise # Re-raise the exception to the caller
+        except deadline.DeadlineExceeded as e:
+            error = e
+            raise
         except Exception as e:
-            print(f"[ERROR] General error in transaction! [DBInterface::execute_query]\n Error: {e}")
+            error = e
+            logger.exception("General error in transaction!", extra={"hot": True})
             if conn and not conn.autocommit:
                 conn.rollback()
             raise # Re-raise the exception to the caller
         finally:
+            if watch is not None:
+                deadline.watchdog.unwatch(watch)
             if curr:
                 curr.close()
-            if conn:
+            if conn and conn is not pinned:
                 self.pool.return_conn(conn)
+            _query_timing.seconds = query_time() + (time.perf_counter() - start)
+            span.finish(error)
 
         return result
 
@@ -162,6 +403,8 @@ class DBInterface:
         try:
             self.execute_query(sql, params=params, commit=True)
             return True
+        except deadline.DeadlineExceeded:
+            raise  # answered with 504 by the routes, not reported as a failed write
         except Exception:
             return False # execute_query already prints the error
 
@@ -194,21 +437,21 @@ class DBInterface:
         sql = "DELETE FROM Organization WHERE organization_id = %s;"
         return self._execute_dml(sql, (organization_id,))
 
-    def get_app_users_by_organization_id(self, organization_id: int):
+    def get_app_users_by_organization_id(self, organization_id: int, columns=None):
         """
         Retrieves all AppUser records belonging to the specified organization ID.
+        `columns` optionally narrows the projection (see APP_USER_COLUMNS).
         """
-        sql = """
+        sql = pgsql.SQL("""
             SELECT 
-                user_id, username, email, organization_id, organization_role, 
-                ebay_account_id, etsy_account_id
+                {}
             FROM 
                 AppUser
             WHERE 
                 organization_id = %s
             ORDER BY
                 username ASC;
-        """
+        """).format(projection(columns or APP_USER_COLUMNS))
         return self.execute_query(sql, params=(organization_id,), fetch_all=True)
 
     # =======================================================================================
@@ -221,14 +464,14 @@ class DBInterface:
         params = (username, password, email, organization_id, organization_role, ebay_account_id, etsy_account_id)
         return self._execute_dml(sql, params)
 
-    def get_app_user_by_id(self, user_id: int):
-        """Retrieves an AppUser record by their ID."""
-        sql = "SELECT * FROM AppUser WHERE user_id = %s;"
+    def get_app_user_by_id(self, user_id: int, columns=None):
+        """Retrieves an AppUser record by their ID, optionally projecting only `columns`."""
+        sql = pgsql.SQL("SELECT {} FROM AppUser WHERE user_id = %s;").format(projection(columns))
         return self.execute_query(sql, params=(user_id,), fetch_one=True)
     
     def get_app_user_by_username(self, username: str):
-        """Retrieves an AppUser record by their username."""
-        sql = "SELECT * FROM AppUser WHERE username = %s;"
+        """Retrieves the AppUser columns needed to log a user in (including the password hash) by username."""
+        sql = "SELECT user_id, username, password, email, organization_id, organization_role FROM AppUser WHERE username = %s;"
         return self.execute_query(sql, params=(username,), fetch_one=True)
 
     def get_all_app_users(self):
@@ -242,6 +485,11 @@ class DBInterface:
         params = (password, email, organization_id, organization_role, ebay_account_id, etsy_account_id, user_id)
         return self._execute_dml(sql, params)
 
+    def update_app_user_password(self, user_id: int, password_hash: str) -> bool:
+        """Replaces a user's stored password hash (e.g. when upgrading a legacy plaintext row)."""
+        sql = "UPDATE AppUser SET password = %s WHERE user_id = %s;"
+        return self._execute_dml(sql, (password_hash, user_id))
+
     def delete_app_user(self, user_id: int) -> bool:
         """Deletes an AppUser record by its ID."""
         sql = "DELETE FROM AppUser WHERE user_id = %s;"
@@ -258,20 +506,111 @@ class DBInterface:
         params = (title, price, description, category, list_date, creator_id)
         return self._execute_dml(sql, params)
 
-    def get_item_by_id(self, item_id: int):
-        """Retrieves an item record by its ID."""
-        sql = "SELECT * FROM Item WHERE item_id = %s;"
+    def get_item_by_id(self, item_id: int, columns=None):
+        """Retrieves an item record by its ID, optionally projecting only `columns`."""
+        sql = pgsql.SQL("SELECT {} FROM Item WHERE item_id = %s;").format(projection(columns))
         return self.execute_query(sql, params=(item_id,), fetch_one=True)
     
-    def get_all_items(self):
-        """Retrieves all records from the Item table."""
-        sql = "SELECT * FROM Item;"
+    def get_item_organization(self, item_id: int):
+        """The organization of an item's creator as {"organization_id": ...}, or None if there is no such item."""
+        sql = """
+            SELECT u.organization_id
+            FROM Item i LEFT JOIN AppUser u ON u.user_id = i.creator_id
+            WHERE i.item_id = %s;
+        """
+        return self.execute_query(sql, params=(item_id,), fetch_one=True)
+
+    def get_transaction_organization(self, transaction_id: int):
+        """The organization of a transaction's seller as {"organization_id": ...}, or None if there is no such transaction."""
+        sql = """
+            SELECT u.organization_id
+            FROM AppTransaction t LEFT JOIN AppUser u ON u.user_id = t.seller_id
+            WHERE t.transaction_id = %s;
+        """
+        return self.execute_query(sql, params=(transaction_id,), fetch_one=True)
+
+    def get_transaction_item_organization(self, transaction_item_id: int):
+        """The organization of the seller of a linked item's transaction, like get_transaction_organization."""
+        sql = """
+            SELECT u.organization_id
+            FROM AppTransaction_Item ati
+            JOIN AppTransaction t ON t.transaction_id = ati.transaction_id
+            LEFT JOIN AppUser u ON u.user_id = t.seller_id
+            WHERE ati.transaction_item_id = %s;
+        """
+        return self.execute_query(sql, params=(transaction_item_id,), fetch_one=True)
+
+    def get_all_items(self, columns=None):
+        """Retrieves all records from the Item table, optionally projecting only `columns`."""
+        sql = pgsql.SQL("SELECT {} FROM Item;").format(projection(columns))
         return self.execute_query(sql, fetch_all=True)
 
-    def get_all_items_by_appuser_id(self, user_id: int):
-        """Retrieves all Item records created by the specified AppUser (user_id is mapped to creator_id)."""
-        sql = "SELECT item_id, title, price, description, category, list_date, creator_id FROM Item WHERE creator_id = %s;"
-        return self.execute_query(sql, params=(user_id,), fetch_all=True)
+    def get_item_list(self, creator_id: int = None, columns=None, primary_image=True, marketplaces=True,
+                      organization_id: int = None):
+        """
+        Items for a list view (all of them, one creator's newest first, or those created by
+        an organization's members) in one statement,
+        each row also carrying what the grid shows beside the item:
+
+        primary_image: the primary image, else the oldest (LATERAL ... LIMIT 1, which walks
+            idx_itemimage_item_display), as primary_image_id, primary_image_url,
+            primary_thumb_url, primary_image_width, primary_image_height, primary_placeholder;
+            all NULL for items without images.
+        marketplaces: ebay_listings and ebay_statuses (the distinct EbayItem.ebay_status
+            values), etsy_listings and etsy_quantity (total EtsyItem.quantity).
+
+        `columns` narrows the Item columns (see ITEM_COLUMNS); a part not asked for is not joined.
+        """
+        select = [projection(columns or ITEM_COLUMNS, alias="i")]
+        joins = []
+        if primary_image:
+            select.append(pgsql.SQL("""
+                img.image_id AS primary_image_id, img.image_url AS primary_image_url,
+                img.thumb_url AS primary_thumb_url, img.width AS primary_image_width,
+                img.height AS primary_image_height, img.placeholder AS primary_placeholder
+            """))
+            joins.append(pgsql.SQL("""
+                LEFT JOIN LATERAL (
+                    SELECT image_id, image_url, thumb_url, width, height, placeholder
+                    FROM ItemImage
+                    WHERE ItemImage.item_id = i.item_id
+                    ORDER BY is_primary DESC, upload_date ASC, image_id ASC
+                    LIMIT 1
+                ) img ON TRUE
+            """))
+        if marketplaces:
+            select.append(pgsql.SQL("""
+                ebay.listings AS ebay_listings, ebay.statuses AS ebay_statuses,
+                etsy.listings AS etsy_listings, etsy.quantity AS etsy_quantity
+            """))
+            # Aggregates without GROUP BY: always exactly one row per item, zero listings included
+            joins.append(pgsql.SQL("""
+                CROSS JOIN LATERAL (
+                    SELECT COUNT(*) AS listings,
+                           COALESCE(array_agg(DISTINCT ebay_status ORDER BY ebay_status)
+                                    FILTER (WHERE ebay_status IS NOT NULL), '{}') AS statuses
+                    FROM EbayItem
+                    WHERE EbayItem.item_id = i.item_id
+                ) ebay
+                CROSS JOIN LATERAL (
+                    SELECT COUNT(*) AS listings, COALESCE(SUM(quantity), 0) AS quantity
+                    FROM EtsyItem
+                    WHERE EtsyItem.item_id = i.item_id
+                ) etsy
+            """))
+        if creator_id is not None:
+            where = pgsql.SQL("WHERE i.creator_id = %s ORDER BY i.list_date DESC")
+            params = (creator_id,)
+        elif organization_id is not None:
+            where = pgsql.SQL("WHERE i.creator_id IN (SELECT user_id FROM AppUser WHERE organization_id = %s)")
+            params = (organization_id,)
+        else:
+            where, params = pgsql.SQL(""), None
+
+        sql = pgsql.SQL("SELECT {} FROM Item i {} {};").format(
+            pgsql.SQL(", ").join(select), pgsql.SQL(" ").join(joins), where
+        )
+        return self.execute_query(sql, params=params, fetch_all=True)
 
     def update_item(self, item_id: int, title: str, price: float, description: str, category: str, list_date: str) -> bool:
         """Updates all mutable details of an existing item."""
@@ -288,17 +627,178 @@ class DBInterface:
     # ItemImage CRUD
     # =======================================================================================
 
-    def create_item_image(self, item_id: int, image_url: str, is_primary: bool = False) -> bool:
-        """Inserts a new image reference for an item."""
-        sql = "INSERT INTO ItemImage (item_id, image_url, is_primary) VALUES (%s, %s, %s);"
-        params = (item_id, image_url, is_primary)
-        return self._execute_dml(sql, params)
+    def create_item_image(self, item_id: int, image_url: str, is_primary: bool = False,
+                          content_hash: str = None) -> int or None:
+        """
+        Inserts a new image reference for an item and returns its ID (None on failure).
+        content_hash is the SHA-256 of a blob-store image (see utils/blob_store.py).
+        """
+        sql = "INSERT INTO ItemImage (item_id, image_url, is_primary, content_hash) VALUES (%s, %s, %s, %s) RETURNING image_id;"
+        params = (item_id, image_url, is_primary, content_hash)
+        try:
+            result = self.execute_query(sql, params, fetch_one=True, commit=True)
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception:
+            return None  # execute_query already logged the error
+        return result["image_id"] if result else None
 
     def get_images_by_item_id(self, item_id: int):
         """Retrieves all image references for a given item, ordered by primary status."""
-        sql = "SELECT image_id, image_url, is_primary, upload_date FROM ItemImage WHERE item_id = %s ORDER BY is_primary DESC, upload_date ASC;"
+        sql = """
+            SELECT image_id, image_url, thumb_url, modal_url, full_url, is_primary, upload_date,
+                   width, height, placeholder
+            FROM ItemImage WHERE item_id = %s ORDER BY is_primary DESC, upload_date ASC;
+        """
         return self.execute_query(sql, params=(item_id,), fetch_all=True)
 
+    def get_item_image_by_hash(self, content_hash: str, item_id: int = None):
+        """
+        An image row for a blob, if any: item_id's own if it has one, otherwise one whose
+        renditions already exist, so a duplicate upload can reuse them.
+        """
+        sql = """
+            SELECT image_id, item_id, image_url, thumb_url, modal_url, full_url, width, height, placeholder
+            FROM ItemImage
+            WHERE content_hash = %s
+            ORDER BY (item_id = %s) DESC, (placeholder IS NOT NULL) DESC, image_id ASC
+            LIMIT 1;
+        """
+        return self.execute_query(sql, params=(content_hash, item_id), fetch_one=True)
+
+    def get_item_images_by_hashes(self, content_hashes):
+        """Every image row of the given blobs (one round trip for a batch upload)."""
+        sql = """
+            SELECT image_id, item_id, image_url, content_hash, thumb_url, modal_url, full_url,
+                   width, height, placeholder
+            FROM ItemImage
+            WHERE content_hash = ANY(%s)
+            ORDER BY image_id ASC;
+        """
+        return self.execute_query(sql, params=(list(content_hashes),), fetch_all=True) or []
+
+    def create_item_images(self, rows, promote=None):
+        """
+        Inserts many ItemImage rows with one multi-row INSERT, in a single transaction that
+        also settles each affected item's primary image:
+
+        1. Locks the items' rows (FOR UPDATE), so concurrent uploads to the same item
+           change its primary one at a time, and finds any item that doesn't exist.
+        2. For every item getting a new primary (a row with is_primary, or an existing
+           image in `promote`, a dict of image_id -> item_id), clears the old primary flag.
+        3. Inserts the rows.
+
+        rows: dicts with item_id, image_url, is_primary, content_hash, thumb_url, modal_url,
+        full_url, width, height and placeholder. Returns (inserted, missing_item_ids): inserted is the list of
+        {image_id, item_id, content_hash} in no particular order; nothing is written when
+        any item is missing. Returns None on a database error.
+        """
+        promote = promote or {}
+        item_ids = sorted({row["item_id"] for row in rows} | set(promote.values()))
+        primary_items = sorted({row["item_id"] for row in rows if row["is_primary"]} | set(promote.values()))
+        lock_sql = "SELECT item_id FROM Item WHERE item_id = ANY(%s) ORDER BY item_id FOR UPDATE;"
+        demote_sql = """
+            UPDATE ItemImage SET is_primary = (image_id = ANY(%s))
+            WHERE item_id = ANY(%s) AND (is_primary OR image_id = ANY(%s));
+        """
+        insert_sql = """
+            INSERT INTO ItemImage (
+                item_id, image_url, is_primary, content_hash, thumb_url, modal_url, full_url, width, height, placeholder
+            )
+            SELECT * FROM unnest(
+                %s::int[], %s::varchar[], %s::boolean[], %s::char(64)[], %s::varchar[], %s::varchar[], %s::varchar[],
+                %s::int[], %s::int[], %s::text[]
+            )
+            RETURNING image_id, item_id, content_hash;
+        """
+        columns = (
+            "item_id", "image_url", "is_primary", "content_hash", "thumb_url", "modal_url", "full_url",
+            "width", "height", "placeholder",
+        )
+        try:
+            with self.pinned_connection() as conn:
+                locked = self.execute_query(lock_sql, params=(item_ids,), fetch_all=True)
+                missing = sorted(set(item_ids) - {row["item_id"] for row in locked})
+                if missing:
+                    conn.rollback()
+                    return [], missing
+                if primary_items:
+                    promote_ids = list(promote)
+                    self.execute_query(demote_sql, params=(promote_ids, primary_items, promote_ids))
+                inserted = []
+                if rows:
+                    params = tuple([row[column] for row in rows] for column in columns)
+                    inserted = self.execute_query(insert_sql, params=params, fetch_all=True)
+                conn.commit()
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception:
+            return None  # execute_query already logged the error (and rolled back)
+        return [dict(row) for row in inserted], []
+
+    def get_item_image_hashes(self, item_id: int):
+        """The distinct blob hashes an item's images point at."""
+        sql = "SELECT DISTINCT content_hash FROM ItemImage WHERE item_id = %s AND content_hash IS NOT NULL;"
+        rows = self.execute_query(sql, params=(item_id,), fetch_all=True)
+        return [row["content_hash"] for row in rows or []]
+
+    def count_blob_references(self, content_hash: str) -> int or None:
+        """How many ItemImage rows point at a blob (its reference count); None on error."""
+        sql = "SELECT COUNT(*) AS refs FROM ItemImage WHERE content_hash = %s;"
+        try:
+            result = self.execute_query(sql, params=(content_hash,), fetch_one=True)
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception:
+            return None
+        return result["refs"] if result else None
+
+    def iter_image_references(self, batch_size: int = 10000):
+        """
+        Yields (path, organization_id) for every upload file an ItemImage row refers to
+        (original and renditions), path relative to the uploads folder, ordered by path
+        in byte order (COLLATE "C", the order Python compares strings in) and then by
+        organization. A file used by several organizations comes once per organization.
+
+        Streamed through a server-side cursor, `batch_size` rows per round trip, so the
+        caller's memory doesn't grow with the table (used by the upload GC).
+        """
+        sql = """
+            SELECT DISTINCT regexp_replace(u.url, '^/(uploads|images)/', '') COLLATE "C" AS path,
+                   a.organization_id
+            FROM ItemImage ii
+            JOIN Item i ON i.item_id = ii.item_id
+            JOIN AppUser a ON a.user_id = i.creator_id
+            CROSS JOIN LATERAL (VALUES (ii.image_url), (ii.thumb_url), (ii.modal_url), (ii.full_url)) AS u(url)
+            WHERE u.url ~ '^/(uploads|images)/'
+            ORDER BY 1, 2;
+        """
+        conn = self.pool.get_conn()
+        try:
+            with conn.cursor(name="image_references") as curr:
+                curr.itersize = batch_size
+                curr.execute(sql)
+                for path, organization_id in curr:
+                    yield path, organization_id
+        finally:
+            self.pool.return_conn(conn)  # the pool rolls back the read transaction
+
+    def set_item_image_renditions(self, image_id: int, thumb_url: str, modal_url: str, full_url: str,
+                                  width: int = None, height: int = None, placeholder: str = None) -> bool:
+        """
+        Stores the URLs of an image's generated renditions, and its size and placeholder
+        (see utils/images.py), on that row and on every other row of the same blob
+        (renditions belong to the file, not to the item).
+        """
+        sql = """
+            UPDATE ItemImage
+            SET thumb_url = %s, modal_url = %s, full_url = %s, width = %s, height = %s, placeholder = %s
+            WHERE image_id = %s
+               OR content_hash = (SELECT content_hash FROM ItemImage WHERE image_id = %s);
+        """
+        params = (thumb_url, modal_url, full_url, width, height, placeholder, image_id, image_id)
+        return self._execute_dml(sql, params)
+
     def delete_item_image(self, image_id: int) -> bool:
         """Deletes an image reference by its ID."""
         sql = "DELETE FROM ItemImage WHERE image_id = %s;"
@@ -314,9 +814,9 @@ class DBInterface:
         params = (sale_date, total, tax, seller_comission, seller_id)
         return self._execute_dml(sql, params)
 
-    def get_app_transaction_by_id(self, transaction_id: int):
-        """Retrieves a transaction record by its ID."""
-        sql = "SELECT * FROM AppTransaction WHERE transaction_id = %s;"
+    def get_app_transaction_by_id(self, transaction_id: int, columns=None):
+        """Retrieves a transaction record by its ID, optionally projecting only `columns`."""
+        sql = pgsql.SQL("SELECT {} FROM AppTransaction WHERE transaction_id = %s;").format(projection(columns))
         return self.execute_query(sql, params=(transaction_id,), fetch_one=True)
     
     def get_all_app_transactions(self):
@@ -365,18 +865,18 @@ class DBInterface:
         sql = "DELETE FROM AppTransaction_Item WHERE transaction_item_id = %s;"
         return self._execute_dml(sql, (transaction_item_id,))
 
-    def get_app_transactions_by_item_id(self, item_id: int):
+    def get_app_transactions_by_item_id(self, item_id: int, columns=None):
         """Retrieves all AppTransaction records associated with the specified item_id via AppTransaction_Item."""
-        sql = """
+        sql = pgsql.SQL("""
             SELECT
-                t.transaction_id, t.sale_date, t.total, t.tax, t.seller_comission, t.seller_id
+                {}
             FROM
                 AppTransaction t
             JOIN
                 AppTransaction_Item ati ON t.transaction_id = ati.transaction_id
             WHERE
                 ati.item_id = %s;
-        """
+        """).format(projection(columns or APP_TRANSACTION_COLUMNS, alias="t"))
         return self.execute_query(sql, params=(item_id,), fetch_all=True)
 
     def get_items_for_app_transaction(self, transaction_id: int):
@@ -522,37 +1022,39 @@ class DBInterface:
     # Custom Retrieval Methods
     # =======================================================================================
 
-    def get_all_items_by_appuser_id(self, user_id: int):
+    def get_all_items_by_appuser_id(self, user_id: int, columns=None):
         """
         Retrieves all Item records created by the specified AppUser.
         This directly relates to the fk_item_creator constraint.
+        `columns` optionally narrows the projection (see ITEM_COLUMNS).
         """
-        sql = """
+        sql = pgsql.SQL("""
             SELECT 
-                item_id, title, price, description, category, list_date, creator_id
+                {}
             FROM 
                 Item
             WHERE 
                 creator_id = %s
             ORDER BY
                 list_date DESC;
-        """
+        """).format(projection(columns or ITEM_COLUMNS))
         return self.execute_query(sql, params=(user_id,), fetch_all=True)
 
-    def get_app_transactions_by_seller_id(self, seller_id: int):
+    def get_app_transactions_by_seller_id(self, seller_id: int, columns=None):
         """
         Retrieves all AppTransaction records sold by the specified AppUser.
+        `columns` optionally narrows the projection (see APP_TRANSACTION_COLUMNS).
         """
-        sql = """
+        sql = pgsql.SQL("""
             SELECT 
-                transaction_id, sale_date, total, tax, seller_comission
+                {}
             FROM 
                 AppTransaction
             WHERE 
                 seller_id = %s
             ORDER BY
                 sale_date DESC;
-        """
+        """).format(projection(columns or ("transaction_id", "sale_date", "total", "tax", "seller_comission")))
         return self.execute_query(sql, params=(seller_id,), fetch_all=True)
 
     # --- Utility Methods (Keep as is) ---
@@ -560,6 +1062,9 @@ class DBInterface:
         """
         [INSECURE] Validates raw username and password against the database. 
         Returns: user_id (int) if valid, None otherwise.
+
+        NOTE: Only matches legacy plaintext rows. /login verifies hashed passwords
+        through utils.passwords.PasswordHasher instead.
         """
         # Note: This is fine for a raw password example, but should use hashing in a production app.
         sql = "SELECT user_id FROM AppUser WHERE username = %s AND password = %s;"
@@ -0,0 +1,131 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import psycopg2
+
+from db import interface as db_interface
+
+logger = logging.getLogger(__name__)
+
+# Numbered SQL files applied in order on top of schema.sql, e.g. 0001_add_item_index.sql
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_MIGRATION_FILE = re.compile(r"^(\d{4,})_[\w-]+\.sql$")
+
+# Serializes migration runs across workers/containers starting at the same time
+_ADVISORY_LOCK_KEY = 0x5EC05BA4
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS SchemaMigration (
+        version VARCHAR(255) PRIMARY KEY,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Tuple[str, str]]:
+    """(version, path) for every migration file in `directory`, oldest first. The version is the file name without .sql."""
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        match = _MIGRATION_FILE.match(name)
+        if match:
+            found.append((int(match.group(1)), name[:-4], os.path.join(directory, name)))
+    return [(version, path) for _, version, path in sorted(found)]
+
+
+def _applied_versions(curr) -> set:
+    curr.execute("SELECT to_regclass('schemamigration') IS NOT NULL;")
+    if not curr.fetchone()[0]:
+        return set()
+    curr.execute("SELECT version FROM SchemaMigration;")
+    return {row[0] for row in curr.fetchall()}
+
+
+def apply_migrations(directory: str = MIGRATIONS_DIR) -> List[str]:
+    """
+    Applies pending migrations on a dedicated connection, each in its own transaction
+    together with its SchemaMigration row, so a failed file leaves nothing half-applied.
+    Returns: the versions applied.
+    Raises: psycopg2.Error from the first migration that fails (later ones are not run).
+    """
+    migrations = discover(directory)
+    if not migrations:
+        return []
+
+    conn = psycopg2.connect(
+        dbname=db_interface.DB_NAME,
+        user=db_interface.DB_USER,
+        password=db_interface.DB_PASS,
+        host=db_interface.DB_HOST,
+        port=db_interface.DB_PORT,
+    )
+    applied = []
+    try:
+        with conn.cursor() as curr:
+            curr.execute("SELECT pg_advisory_lock(%s);", (_ADVISORY_LOCK_KEY,))
+            curr.execute(_CREATE_TABLE)
+            conn.commit()
+            done = _applied_versions(curr)
+            for version, path in migrations:
+                if version in done:
+                    continue
+                with open(path, "r") as f:
+                    script = f.read()
+                try:
+                    curr.execute(script)
+                    curr.execute("INSERT INTO SchemaMigration (version) VALUES (%s);", (version,))
+                    conn.commit()
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    logger.error("Migration %s failed", version, extra={"error": str(e)})
+                    raise
+                applied.append(version)
+                logger.info("Applied migration %s", version)
+            curr.execute("SELECT pg_advisory_unlock(%s);", (_ADVISORY_LOCK_KEY,))
+            conn.commit()
+    finally:
+        conn.close()
+    return applied
+
+
+class MigrationCheck:
+    """
+    Compares the migration files shipped with this build against SchemaMigration,
+    through the app's pool. Once everything is applied the answer is kept: files
+    can't appear at runtime, so an up-to-date schema stays up to date.
+    """
+
+    def __init__(self, db, directory: str = MIGRATIONS_DIR, recheck_after: float = 5.0):
+        self.db = db
+        self.versions = [version for version, _ in discover(directory)]
+        self.recheck_after = recheck_after
+
+        self._pending: Optional[List[str]] = None if self.versions else []
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def pending(self) -> List[str]:
+        """
+        Versions not applied yet (oldest first).
+        Raises: psycopg2.Error / PoolTimeoutError if the database can't be asked.
+        """
+        if self._pending == []:
+            return []
+        with self._lock:
+            if self._pending is not None and time.monotonic() - self._checked_at < self.recheck_after:
+                return self._pending
+            row = self.db.execute_query(
+                "SELECT to_regclass('schemamigration') IS NOT NULL AS present;", fetch_one=True
+            )
+            applied = set()
+            if row and row["present"]:
+                rows = self.db.execute_query("SELECT version FROM SchemaMigration;", fetch_all=True)
+                applied = {r["version"] for r in rows or []}
+            self._pending = [v for v in self.versions if v not in applied]
+            self._checked_at = time.monotonic()
+            return self._pending
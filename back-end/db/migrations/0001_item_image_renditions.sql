@@ -0,0 +1,6 @@
+-- Resized copies of each item image, generated in the background after upload
+-- (see utils/images.py). NULL until the renditions exist; clients fall back to image_url.
+ALTER TABLE ItemImage
+    ADD COLUMN IF NOT EXISTS thumb_url VARCHAR(512),
+    ADD COLUMN IF NOT EXISTS modal_url VARCHAR(512),
+    ADD COLUMN IF NOT EXISTS full_url VARCHAR(512);
@@ -0,0 +1,8 @@
+-- SHA-256 of the image file for uploads kept in the content-addressed store
+-- (see utils/blob_store.py). Rows sharing a hash share one file; their count is the
+-- blob's reference count. NULL for images stored before the blob store.
+ALTER TABLE ItemImage ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_itemimage_content_hash
+    ON ItemImage (content_hash)
+    WHERE content_hash IS NOT NULL;
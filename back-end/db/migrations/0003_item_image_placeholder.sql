@@ -0,0 +1,8 @@
+-- What the items grid draws before an image loads (see utils/images.py): the picture's
+-- displayed size, so its tile is laid out at the right aspect ratio, and a ~20px WebP
+-- of it as a data: URI to show blurred in the meantime. Written with the renditions;
+-- NULL until they have been generated.
+ALTER TABLE ItemImage
+    ADD COLUMN IF NOT EXISTS width INT,
+    ADD COLUMN IF NOT EXISTS height INT,
+    ADD COLUMN IF NOT EXISTS placeholder TEXT;
@@ -0,0 +1,17 @@
+-- Indexes for the item list query (DBInterface.get_item_list): every lateral subquery
+-- it runs per item is an index lookup on item_id instead of a scan of its table.
+
+-- One creator's items, newest first
+CREATE INDEX IF NOT EXISTS idx_item_creator_list_date
+    ON Item (creator_id, list_date DESC);
+
+-- The image shown for an item: its first entry in this order (primary, then oldest)
+CREATE INDEX IF NOT EXISTS idx_itemimage_item_display
+    ON ItemImage (item_id, is_primary DESC, upload_date ASC, image_id ASC);
+
+-- Marketplace listings per item; INCLUDE lets the aggregates read only the index
+CREATE INDEX IF NOT EXISTS idx_ebayitem_item
+    ON EbayItem (item_id) INCLUDE (ebay_status);
+
+CREATE INDEX IF NOT EXISTS idx_etsyitem_item
+    ON EtsyItem (item_id) INCLUDE (quantity);
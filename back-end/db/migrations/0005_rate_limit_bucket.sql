@@ -0,0 +1,9 @@
+-- Token buckets shared by every worker process when RATE_LIMIT_BACKEND=postgres
+-- (see PostgresTokenBucketLimiter in utils/rate_limit.py). One row per bucket, refilled
+-- lazily from updated_at (seconds since the epoch, from the database clock).
+CREATE TABLE IF NOT EXISTS RateLimitBucket (
+    bucket_key VARCHAR(255) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    allowed BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at DOUBLE PRECISION NOT NULL
+);
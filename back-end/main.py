@@ -1,38 +1,74 @@
 # flask imports
+import logging
 import os
+import time
+
+# Startup timing comes first so it can cover the imports below. Per-module import
+# timing wraps every module loader, so it is opt-in (STARTUP_IMPORT_REPORT=true).
+from utils.startup import ImportTimer, StartupReport
+
+STARTUP = StartupReport()
+if os.getenv("STARTUP_IMPORT_REPORT", "false").lower() in ("true", "1", "t"):
+    STARTUP.import_timer = ImportTimer().start()
 
 from dotenv import load_dotenv
-from flask import Blueprint, Flask, abort, jsonify, request, send_from_directory
+from flask import Blueprint, Flask, abort, jsonify, request
 from flask_cors import CORS
+from werkzeug.security import safe_join
+from werkzeug.serving import make_server
 
 # Imports for database interface
 from db.interface import load_schema, wait_for_db
-from routes import APIRoutes, api
+from db.migrate import apply_migrations
+from routes import MAX_REQUEST_BYTES, APIRoutes, api
+from utils.compression import register_compression
+from utils.image_cache import MAX_WIDTH, normalize_width, resize_format
+from utils.images import MIMETYPES, ImageWorkersBusy, accepted_variants, has_variants, variant_filename
+from utils.lifecycle import install_signal_handlers, lifecycle
+from utils.structured_logging import configure_logging
 
 load_dotenv()
 
+STARTUP.record("imports", time.perf_counter() - STARTUP.started_at)
+if STARTUP.import_timer is not None:
+    STARTUP.import_timer.stop()
+
 # Constants for file/folder uploads
 UPLOAD_FOLDER = os.path.join("static", "uploads")
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
 
-# Wait for database to initialize before running backend
-wait_for_db(40)
-if not os.path.exists("db/.setup_done"):
-    load_schema("db/schema.sql")
-    with open("db/.setup_done", "w") as f:
-        f.write("setup complete")
-    print("[INFO] Setup complete.")
-else:
-    print("[INFO] Database already set, skipping setup process.")
+logger = logging.getLogger(__name__)
+
+
+# Wait for database to initialize before running backend.
+# NOTE: Only called from __main__: worker processes (e.g. the password hashing pool)
+# re-import this module and must not repeat the setup.
+def prepare_database():
+    wait_for_db(40)
+    if not os.path.exists("db/.setup_done"):
+        load_schema("db/schema.sql")
+        with open("db/.setup_done", "w") as f:
+            f.write("setup complete")
+        logger.info("Setup complete.")
+    else:
+        logger.info("Database already set, skipping setup process.")
+    # Schema changes made after schema.sql (db/migrations/). A failed migration doesn't stop
+    # the server, but /readyz keeps reporting 503 until it is applied.
+    try:
+        apply_migrations()
+    except Exception as e:
+        logger.error("Database migrations failed", extra={"error": str(e)})
 
 
 # Configure flask app to support file upload/download
 def create_app():
     app = Flask(__name__)
     CORS(app, supports_credentials=True, origins=["http://localhost:3000"])
-    APIRoutes()  # Initializes and binds the routes
+    routes = APIRoutes()  # Initializes and binds the routes
     # 1. Set the configuration for the upload directory
     app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+    # Larger bodies are refused with 413 before they are read (per-image limit: IMAGE_MAX_BYTES)
+    app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
 
     app.config["JWT_SECRET"] = os.getenv("JWT_SECRET")
     app.config["JWT_ALGORITHM"] = os.getenv("JWT_ALGORITHM", "HS256")
@@ -41,30 +77,136 @@ def create_app():
     # You may add url prefix with argument <url_prefix='/api'>
     app.register_blueprint(api)
 
+    # Negotiated gzip/br/zstd compression for JSON and other text responses
+    register_compression(app)
+
     # 3. Create the upload folder if it doesn't exist
     if not os.path.exists(UPLOAD_FOLDER):
         os.makedirs(UPLOAD_FOLDER)
-        print(f"Created upload directory: {UPLOAD_FOLDER}")
+        logger.info("Created upload directory: %s", UPLOAD_FOLDER)
+
+    def upload_path(filename):
+        """
+        The file for an uploads URL path: flat (item_1.jpg) or in the blob store's shard
+        directories (ab/cd/<sha256>.jpg). None for anything outside the folder and for
+        dot-prefixed names such as the blob store's staging directory.
+        """
+        if any(part.startswith(".") for part in filename.split("/")):
+            return None
+        return safe_join(app.config["UPLOAD_FOLDER"], filename)
+
+    def send_original(path, immutable=True):
+        # The file can be removed between the caller's check and the send (upload GC)
+        try:
+            return routes.static_files.send(path, immutable=immutable)
+        except FileNotFoundError:
+            abort(404)
+
+    def send_upload(filename):
+        """
+        Sends an uploaded file, or its precomputed AVIF/WebP variant when the Accept header
+        allows one (see utils/images.py), with long-lived caching (see utils/static_files.py).
+        Variants that don't exist yet are queued on the image workers and the original is
+        sent meanwhile, marked for revalidation so clients pick the variant up once it exists.
+        """
+        path = upload_path(filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        if not has_variants(filename):
+            return send_original(path)
+
+        accepted = accepted_variants(request.headers.get("Accept"))
+        for fmt in accepted:
+            if os.path.isfile(variant_filename(path, fmt)):
+                try:
+                    resp = routes.static_files.send(variant_filename(path, fmt), mimetype=MIMETYPES[fmt])
+                    break
+                except FileNotFoundError:  # removed since the check: try the next format
+                    continue
+        else:
+            upgrading = bool(accepted) and (
+                routes.renditions.submit_variants(path) or routes.renditions.is_pending(path)
+            )
+            resp = send_original(path, immutable=not upgrading)
+        # The same URL answers with different bytes depending on Accept
+        resp.vary.add("Accept")
+        return resp
+
+    # Orphaned upload cleanup and storage accounting, every UPLOAD_GC_INTERVAL seconds
+    routes.upload_gc.start()
 
     # 4. (Optional but recommended) Serve the uploads directory
-    @app.route("/uploads/<filename>")
+    @app.route("/uploads/<path:filename>")
     def uploaded_file(filename):
         """Allows direct retrieval of uploaded images via URL, e.g., /uploads/my_pic.jpg"""
-        return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+        return send_upload(filename)
 
     # Route to serve a specific image file by name
-    @app.route("/images/<filename>")
+    @app.route("/images/<path:filename>")
     def get_uploaded_image(filename):
         """
         Serves the requested file securely from the UPLOAD_FOLDER (static/uploads).
         Example: GET /images/item_1.jpg will look for static/uploads/item_1.jpg.
+
+        With ?w=<width> and/or ?fmt=jpeg|png|webp|avif, serves a resized copy instead,
+        rendered on first request and then kept in the on-disk image cache. Without ?fmt=
+        the format is negotiated from the Accept header, as it is for the original.
         """
-        # UPLOAD_FOLDER is expected to be configured in app.config (e.g., 'static/uploads')
-        return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+        if "w" not in request.args and "fmt" not in request.args:
+            # UPLOAD_FOLDER is expected to be configured in app.config (e.g., 'static/uploads')
+            return send_upload(filename)
+
+        try:
+            width = normalize_width(int(request.args.get("w", MAX_WIDTH)))
+        except ValueError:
+            return jsonify({"error": "w must be an integer width in pixels"}), 400
+        negotiated = "fmt" not in request.args and has_variants(filename)
+        accepted = accepted_variants(request.headers.get("Accept")) if negotiated else []
+        fmt = accepted[0] if accepted else resize_format(filename, request.args.get("fmt"))
+        if fmt is None:
+            return jsonify({"error": f"fmt must be one of: {', '.join(MIMETYPES)}"}), 400
+        if upload_path(filename) is None:
+            abort(404)
+
+        # A cached rendition can be evicted between get() and the send opening it; it is then
+        # rendered again, and if that one is evicted too the original is sent for now
+        for _ in range(2):
+            try:
+                path = routes.image_cache.get(filename, width, fmt)
+            except ImageWorkersBusy:
+                resp = jsonify({"error": "Server is busy, please retry shortly"})
+                resp.status_code = 503
+                resp.headers["Retry-After"] = "1"
+                return resp
+            if path is None:
+                abort(404)
+            try:
+                resp = routes.static_files.send(path, mimetype=MIMETYPES[fmt])
+                break
+            except FileNotFoundError:
+                routes.image_cache.forget(filename, width, fmt)
+        else:
+            resp = send_original(upload_path(filename), immutable=False)
+        if negotiated:
+            resp.vary.add("Accept")
+        return resp
 
     return app
 
 
 if __name__ == "__main__":
-    app = create_app()
-    app.run(host="0.0.0.0", port=5000)
+    # JSON log lines written by a background thread (see utils/structured_logging.py)
+    configure_logging()
+    with STARTUP.phase("prepare_database"):
+        prepare_database()
+    with STARTUP.phase("create_app"):
+        app = create_app()
+    STARTUP.log()
+
+    # SIGTERM/SIGINT: stop reporting ready, drain in-flight requests, stop accepting
+    # connections, stop background jobs, then close the pool (see utils/lifecycle.py)
+    server = make_server("0.0.0.0", 5000, app, threaded=True)
+    lifecycle.on_shutdown("listeners", "http server", server.shutdown)
+    install_signal_handlers(lifecycle)
+    server.serve_forever()
+    lifecycle.wait_stopped()
@@ -0,0 +1,109 @@
+"""
+Shared Flask app for route-level tests that run without a database.
+
+APIRoutes registers its views on the module-level `api` Blueprint, which Flask only
+lets us register once per process, so every test module shares the instance built
+here. Uploads and the image cache live in a temporary directory instead of the
+checkout, and RouteTestCase replaces DBInterface.execute_query (and the pool) with
+mocks for the duration of each test.
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import atexit
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+from psycopg2 import sql as pgsql
+
+import routes
+
+_TMP = tempfile.mkdtemp(prefix="api-tests-")
+atexit.register(shutil.rmtree, _TMP, True)
+
+_app = None
+_routes = None
+
+
+def get_app():
+    """Returns the shared (Flask app, APIRoutes), building them on first use."""
+    global _app, _routes
+    if _app is None:
+        with mock.patch.object(routes, "UPLOAD_FOLDER", os.path.join(_TMP, "uploads")), \
+                mock.patch.object(routes, "IMAGE_CACHE_DIR", os.path.join(_TMP, "cache")):
+            _routes = routes.APIRoutes()
+        _app = Flask(__name__)
+        _app.register_blueprint(routes.api)
+    return _app, _routes
+
+
+def render_sql(query) -> str:
+    """
+    psycopg2.sql objects rendered without a connection (as_string() needs one).
+    Identifiers are double-quoted the way PostgreSQL would see them.
+    """
+    if isinstance(query, str):
+        return query
+    if isinstance(query, pgsql.Composed):
+        return "".join(render_sql(part) for part in query.seq)
+    if isinstance(query, pgsql.SQL):
+        return query.string
+    if isinstance(query, pgsql.Identifier):
+        return ".".join('"%s"' % s.replace('"', '""') for s in query.strings)
+    if isinstance(query, pgsql.Placeholder):
+        return "%s" if query.name is None else f"%({query.name})s"
+    if isinstance(query, pgsql.Literal):
+        return repr(query.wrapped)
+    raise TypeError(f"Unexpected SQL part {query!r}")
+
+
+def identifiers(query) -> list:
+    """Every identifier a psycopg2.sql query is composed from, as tuples of names."""
+    if isinstance(query, pgsql.Composed):
+        return [ident for part in query.seq for ident in identifiers(part)]
+    if isinstance(query, pgsql.Identifier):
+        return [query.strings]
+    return []
+
+
+class RouteTestCase(unittest.TestCase):
+    """
+    Calls the API through a Flask test client with the database mocked:
+    execute_query is answered by self.respond(sql, params, **kwargs), which tests
+    override, and every call is recorded in self.queries as (rendered sql, params).
+    """
+
+    def setUp(self):
+        self.app, self.routes = get_app()
+        self.client = self.app.test_client()
+        self.routes.cache.clear()
+        self.routes.principals.invalidate()
+        self.routes._invalidate_record_organizations()
+        self.queries = []
+
+        def execute_query(sql, params=None, **kwargs):
+            self.queries.append((render_sql(sql), params))
+            return self.respond(render_sql(sql), params, **kwargs)
+
+        self.conn = mock.Mock(name="connection")
+        for target, attribute, value in (
+            (self.routes.db, "execute_query", mock.Mock(side_effect=execute_query)),
+            (self.routes.db.pool, "get_conn", mock.Mock(return_value=self.conn)),
+            (self.routes.db.pool, "return_conn", mock.Mock()),
+            (self.routes.renditions, "submit", mock.Mock(return_value=True)),
+        ):
+            patcher = mock.patch.object(target, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def respond(self, sql, params, fetch_one=False, fetch_all=False, commit=False):
+        return None if fetch_one else []
@@ -0,0 +1,99 @@
+"""
+Unit tests for utils.auth (token verification and principal caches).
+
+To run:
+python -m unittest tests.test_auth
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import jwt
+
+from utils.auth import PrincipalCache, TokenVerifier
+
+SECRET = "test-secret-with-enough-length-for-hs256"
+
+
+def make_token(**claims):
+    payload = {"user_id": 1, "username": "alice", "exp": int(time.time()) + 3600}
+    payload.update(claims)
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+class TestTokenVerifier(unittest.TestCase):
+    def setUp(self):
+        self.verifier = TokenVerifier(max_entries=2)
+
+    def test_second_verification_skips_decode(self):
+        token = make_token()
+        self.assertEqual(self.verifier.verify(token, SECRET)["user_id"], 1)
+
+        with patch("utils.auth.jwt.decode") as decode:
+            self.assertEqual(self.verifier.verify(token, SECRET)["user_id"], 1)
+            decode.assert_not_called()
+
+        self.assertEqual(self.verifier.stats()["hits"], 1)
+
+    def test_forged_token_raises_and_is_not_cached(self):
+        token = jwt.encode({"user_id": 1, "exp": int(time.time()) + 60}, "other-secret-with-enough-length!!", algorithm="HS256")
+        with self.assertRaises(jwt.InvalidTokenError):
+            self.verifier.verify(token, SECRET)
+        self.assertEqual(self.verifier.stats()["entries"], 0)
+
+    def test_expired_cache_entry_is_reverified(self):
+        token = make_token(exp=int(time.time()) + 1)
+        self.verifier.verify(token, SECRET)
+        self.verifier._entries[self.verifier.digest(token)] = ({"user_id": 1}, time.time() - 1)
+
+        with patch("utils.auth.jwt.decode", side_effect=jwt.ExpiredSignatureError) as decode:
+            with self.assertRaises(jwt.ExpiredSignatureError):
+                self.verifier.verify(token, SECRET)
+            decode.assert_called_once()
+
+    def test_lru_is_bounded(self):
+        for user_id in range(5):
+            self.verifier.verify(make_token(user_id=user_id), SECRET)
+        self.assertEqual(self.verifier.stats()["entries"], 2)
+
+
+class TestPrincipalCache(unittest.TestCase):
+    def test_loader_called_once_within_ttl(self):
+        loader = MagicMock(return_value={"user_id": 1, "organization_id": 1})
+        cache = PrincipalCache(loader, ttl=60)
+
+        cache.get(1)
+        cache.get(1)
+
+        loader.assert_called_once_with(1)
+
+    def test_invalidate_forces_reload(self):
+        loader = MagicMock(return_value={"user_id": 1})
+        cache = PrincipalCache(loader, ttl=60)
+
+        cache.get(1)
+        cache.invalidate(1)
+        cache.get(1)
+
+        self.assertEqual(loader.call_count, 2)
+
+    def test_unknown_users_are_cached(self):
+        loader = MagicMock(return_value=None)
+        cache = PrincipalCache(loader, ttl=60)
+
+        self.assertIsNone(cache.get(99))
+        self.assertIsNone(cache.get(99))
+        loader.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
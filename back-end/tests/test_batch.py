@@ -0,0 +1,121 @@
+"""
+Route-level tests for POST /batch, with the database mocked.
+
+To run:
+python -m unittest tests.test_batch
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import unittest
+from unittest import mock
+
+import jwt
+from flask import request
+
+import routes
+from tests.api_harness import RouteTestCase
+from utils.rate_limit import TokenBucketLimiter
+
+SECRET = "batch-test-secret"
+ITEM_ROW = {"item_id": 1, "title": "Lamp", "price": "$10.00", "description": None,
+            "category": None, "list_date": None, "creator_id": 3}
+ORG_ROW = {"organization_id": 2, "name": "Acme"}
+PRINCIPAL_ROW = {"user_id": 3, "username": "ada", "organization_id": 2, "organization_role": "admin"}
+
+
+class TestBatch(RouteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.app.config["JWT_SECRET"] = SECRET
+        self.addCleanup(self.app.config.pop, "JWT_SECRET")
+        self.pinned = []  # connection pinned to the thread at each query
+        self.fail_items = False
+
+    def respond(self, sql, params, fetch_one=False, **kwargs):
+        self.pinned.append(getattr(self.routes.db._local, "conn", None))
+        if "FROM AppUser" in sql:
+            return PRINCIPAL_ROW
+        if "FROM Item" in sql:
+            if self.fail_items:
+                raise RuntimeError("connection reset")
+            return [ITEM_ROW]
+        if "FROM Organization" in sql:
+            return ORG_ROW if fetch_one else [ORG_ROW]
+        return super().respond(sql, params, fetch_one=fetch_one, **kwargs)
+
+    def _batch(self, requests, **kwargs):
+        resp = self.client.post("/batch", json={"requests": requests}, **kwargs)
+        self.assertEqual(resp.status_code, 200)
+        return resp.get_json()["responses"]
+
+    def test_subrequests_share_one_pinned_connection(self):
+        responses = self._batch({"orgs": "/organizations", "org": "/organizations/2",
+                                 "items": "/items?fields=title"})
+        self.assertEqual({key: r["status"] for key, r in responses.items()},
+                         {"orgs": 200, "org": 200, "items": 200})
+        self.assertEqual(responses["items"]["body"][0]["title"], "Lamp")
+
+        self.assertEqual(len(self.pinned), 3)
+        self.assertTrue(all(conn is self.conn for conn in self.pinned))
+        self.routes.db.pool.get_conn.assert_called_once()
+        self.routes.db.pool.return_conn.assert_called_once_with(self.conn)
+        self.assertIsNone(getattr(self.routes.db._local, "conn", None))
+
+    def test_auth_headers_are_forwarded(self):
+        seen = []
+        real = routes.token_from_request
+
+        def spy(req):
+            seen.append((request.path, request.headers.get("Cookie"), request.headers.get("Authorization")))
+            return real(req)
+
+        token = jwt.encode({"user_id": 3}, SECRET, algorithm="HS256")
+        self.client.set_cookie("auth_token", "not-a-jwt")
+        with mock.patch.object(routes, "token_from_request", spy):
+            responses = self._batch({"items": "/items?fields=title"},
+                                    headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(responses["items"]["status"], 200)
+        self.assertIn(("/items", "auth_token=not-a-jwt", f"Bearer {token}"), seen)
+
+        # The batch's principal is the one its subrequests see
+        self.client.delete_cookie("auth_token")
+        self.client.set_cookie("auth_token", token)
+        responses = self._batch({"me": "/me"})
+        self.assertEqual(responses["me"], {"status": 200, "body": PRINCIPAL_ROW})
+
+    def test_failing_subrequest_reports_its_own_status(self):
+        self.fail_items = True
+        responses = self._batch({"items": "/items?fields=title", "orgs": "/organizations",
+                                 "missing": "/nope", "nested": "/batch", "me": "/me"})
+        self.assertEqual(responses["items"]["status"], 500)
+        self.assertEqual(responses["orgs"]["status"], 200)
+        self.assertEqual(responses["missing"]["status"], 404)
+        self.assertEqual(responses["nested"]["status"], 405)  # /batch only answers POST
+        self.assertEqual(responses["me"]["status"], 401)
+        self.assertIsNone(getattr(self.routes.db._local, "conn", None))
+
+    def test_each_subrequest_is_rate_limited(self):
+        with mock.patch.object(self.routes, "marketplace_limiter", TokenBucketLimiter(0.001, 1)), \
+                mock.patch.object(self.routes._ebay, "get", return_value=None):
+            responses = self._batch({"first": "/ebay/inventory/SKU-1", "second": "/ebay/inventory/SKU-2"})
+        self.assertEqual(responses["first"]["status"], 503)  # reached the view: eBay not configured
+        self.assertEqual(responses["second"]["status"], 429)
+        self.assertEqual(responses["second"]["body"], {"error": "Rate limit exceeded"})
+
+    def test_invalid_batches(self):
+        for body in ({}, {"requests": {}}, {"requests": ["/items"]}, {"requests": {"a": "items"}}):
+            self.assertEqual(self.client.post("/batch", json=body).status_code, 400, body)
+        too_many = {str(i): "/organizations" for i in range(routes.BATCH_MAX_REQUESTS + 1)}
+        self.assertEqual(self.client.post("/batch", json={"requests": too_many}).status_code, 400)
+        self.assertEqual(self.queries, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
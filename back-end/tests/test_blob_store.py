@@ -0,0 +1,128 @@
+"""
+Unit tests for utils.blob_store (content-addressed, sharded upload storage).
+
+To run:
+python -m unittest tests.test_blob_store
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import hashlib
+import io
+import tempfile
+import threading
+import unittest
+
+from utils.blob_store import STAGING_DIR, BlobStore, BlobTooLarge, shard_relpath
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BlobStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _put(self, data, ext=".jpg"):
+        staged = self.store.stage(io.BytesIO(data))
+        with self.store.lock(staged.digest):
+            return self.store.commit(staged, ext)
+
+    def test_stored_under_its_hash_in_shard_directories(self):
+        data = b"photo" * 50000  # several chunks
+        blob = self._put(data)
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(blob.digest, digest)
+        self.assertEqual(blob.relpath, f"{digest[:2]}/{digest[2:4]}/{digest}.jpg")
+        self.assertEqual(blob.size, len(data))
+        self.assertTrue(blob.created)
+        with open(self.store.path(blob.relpath), "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_identical_content_is_stored_once(self):
+        first = self._put(b"same bytes")
+        second = self._put(b"same bytes")
+        self.assertEqual(first.relpath, second.relpath)
+        self.assertFalse(second.created)
+        self.assertEqual(self.store.stats()["deduplicated"], 1)
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, STAGING_DIR)), [])
+
+    def test_failed_stream_leaves_no_staging_file(self):
+        class Broken(io.BytesIO):
+            def read(self, size=-1):
+                raise OSError("connection reset")
+
+        with self.assertRaises(OSError):
+            self.store.stage(Broken())
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, STAGING_DIR)), [])
+
+    def test_size_limit(self):
+        staged = self.store.stage(io.BytesIO(b"x" * 100), max_bytes=100)
+        self.assertEqual((staged.size, staged.head), (100, b"x" * 32))
+        with self.assertRaises(BlobTooLarge):
+            self.store.stage(io.BytesIO(b"x" * 101), max_bytes=100)
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, STAGING_DIR)), [os.path.basename(staged.path)])
+
+    def test_stage_file_matches_stage(self):
+        data = b"resumed upload" * 10000
+        streamed = self.store.stage(io.BytesIO(data))
+        hashed = self.store.stage_file(streamed.path)
+        self.assertEqual(hashed, streamed)
+
+    def test_remove_takes_derived_files_with_it(self):
+        blob = self._put(b"original")
+        path = self.store.path(blob.relpath)
+        directory = os.path.dirname(path)
+        for name in (f"{blob.digest}.thumb.jpg", f"{blob.digest}.jpg.webp"):
+            open(os.path.join(directory, name), "wb").close()
+        other = self._put(b"another image in maybe the same shard")
+
+        removed = self.store.remove(blob.digest)
+        self.assertEqual(len(removed), 3)
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(self.store.path(other.relpath)))
+
+    def test_lock_many_holds_every_digest(self):
+        digests = [hashlib.sha256(bytes([i])).hexdigest() for i in range(20)]
+        acquired = []
+
+        def other_thread():
+            with self.store.lock(digests[7]):
+                acquired.append(True)
+
+        with self.store.lock_many(digests):
+            t = threading.Thread(target=other_thread)
+            t.start()
+            t.join(0.2)
+            self.assertEqual(acquired, [])  # blocked by the batch
+        t.join(5)
+        self.assertEqual(acquired, [True])
+
+    def test_overlapping_lock_many_do_not_deadlock(self):
+        digests = [hashlib.sha256(bytes([i])).hexdigest() for i in range(20)]
+
+        def lock_repeatedly(order):
+            for _ in range(200):
+                with self.store.lock_many(order):
+                    pass
+
+        threads = [threading.Thread(target=lock_repeatedly, args=(order,)) for order in (digests, digests[::-1])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+        self.assertFalse(any(t.is_alive() for t in threads))
+
+    def test_shard_relpath(self):
+        self.assertEqual(shard_relpath("abcdef", ".png"), "ab/cd/abcdef.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Unit tests for utils.compression.
+
+To run:
+python -m unittest tests.test_compression
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import gzip
+import json
+import unittest
+
+from flask import Flask, Response, jsonify
+
+from utils import compression
+
+
+class TestNegotiation(unittest.TestCase):
+    def test_no_header_means_identity(self):
+        self.assertIsNone(compression.negotiate(None))
+        self.assertIsNone(compression.negotiate("identity"))
+
+    def test_gzip_only(self):
+        self.assertEqual(compression.negotiate("gzip"), "gzip")
+
+    def test_q_values_are_respected(self):
+        self.assertEqual(compression.negotiate("gzip;q=1.0, br;q=0.5, zstd;q=0"), "gzip")
+
+    def test_ties_use_server_preference(self):
+        self.assertEqual(
+            compression.negotiate("gzip, deflate, br, zstd"),
+            compression.available_encodings()[0],
+        )
+
+    def test_wildcard(self):
+        self.assertEqual(compression.negotiate("*"), compression.available_encodings()[0])
+
+
+class TestCompress(unittest.TestCase):
+    def test_stream_matches_one_shot_round_trip(self):
+        chunks = [b'{"items": [', b"1, " * 5000, b"2]}"]
+        streamed = b"".join(compression.compress_stream(chunks, "gzip"))
+        self.assertEqual(gzip.decompress(streamed), b"".join(chunks))
+        self.assertEqual(gzip.decompress(compression.compress(b"".join(chunks), "gzip")), b"".join(chunks))
+
+
+class TestRegisterCompression(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        compression.register_compression(app)
+
+        @app.route("/big")
+        def big():
+            return jsonify([{"title": "Wireless Mouse", "price": 25.99}] * 200)
+
+        @app.route("/small")
+        def small():
+            return jsonify({"ok": True})
+
+        @app.route("/stream")
+        def stream():
+            return Response((b"line\n" for _ in range(1000)), mimetype="text/plain")
+
+        @app.route("/image")
+        def image():
+            return Response(b"\xff\xd8\xff" + b"\x00" * 4096, mimetype="image/jpeg")
+
+        self.client = app.test_client()
+
+    def test_large_json_is_gzipped(self):
+        resp = self.client.get("/big", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", resp.headers["Vary"])
+        self.assertEqual(len(json.loads(gzip.decompress(resp.data))), 200)
+
+    def test_small_json_is_not_compressed(self):
+        resp = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", resp.headers)
+
+    def test_streamed_response_is_compressed_incrementally(self):
+        resp = self.client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(resp.data), b"line\n" * 1000)
+
+    def test_images_are_not_compressed(self):
+        resp = self.client.get("/image", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", resp.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
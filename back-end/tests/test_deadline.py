@@ -0,0 +1,117 @@
+"""
+Unit tests for utils.deadline and the statement_timeout prefix used by db.interface.
+
+To run:
+python -m unittest tests.test_deadline
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import threading
+import time
+import unittest
+
+from psycopg2 import sql as pgsql
+
+from db.interface import ConnectionPool, _with_statement_timeout
+from utils import deadline
+from utils.deadline import CancelWatchdog, DeadlineExceeded
+
+
+class TestDeadline(unittest.TestCase):
+    def test_no_deadline_by_default(self):
+        self.assertIsNone(deadline.remaining())
+        self.assertFalse(deadline.expired())
+        self.assertEqual(deadline.timeout(30), 30)
+
+    def test_timeout_is_capped_by_time_left(self):
+        with deadline.budget(0.5):
+            self.assertLessEqual(deadline.timeout(30), 0.5)
+            self.assertEqual(deadline.timeout(0.1), 0.1)
+        self.assertIsNone(deadline.remaining())
+
+    def test_inner_budget_cannot_extend_outer(self):
+        with deadline.budget(0.2):
+            with deadline.budget(10):
+                self.assertLessEqual(deadline.remaining(), 0.2)
+
+    def test_expired_deadline_raises(self):
+        with deadline.budget(0.01):
+            time.sleep(0.02)
+            self.assertTrue(deadline.expired())
+            with self.assertRaises(DeadlineExceeded):
+                deadline.timeout(30)
+            with self.assertRaises(DeadlineExceeded):
+                deadline.check()
+
+    def test_deadline_is_per_thread(self):
+        seen = []
+        with deadline.budget(1):
+            t = threading.Thread(target=lambda: seen.append(deadline.remaining()))
+            t.start()
+            t.join()
+        self.assertEqual(seen, [None])
+
+    def test_pool_checkout_fails_fast_past_deadline(self):
+        pool = ConnectionPool(1, 1)
+        with deadline.budget(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(DeadlineExceeded):
+                pool.get_conn()
+        self.assertEqual(pool.stats()["waiting"], 0)
+
+
+class TestStatementTimeout(unittest.TestCase):
+    def test_prefixes_plain_sql(self):
+        self.assertEqual(
+            _with_statement_timeout("SELECT 1;", 1.2345),
+            "SET LOCAL statement_timeout = 1234; SELECT 1;",
+        )
+
+    def test_never_zero(self):
+        # statement_timeout = 0 would disable the timeout altogether
+        self.assertIn("statement_timeout = 1;", _with_statement_timeout("SELECT 1;", 0.0001))
+
+    def test_prefixes_composed_sql(self):
+        composed = pgsql.SQL("SELECT {} FROM Item").format(pgsql.Identifier("title"))
+        out = _with_statement_timeout(composed, 2)
+        self.assertIsInstance(out, pgsql.Composed)
+        self.assertEqual(out.seq[0].string, "SET LOCAL statement_timeout = 2000; ")
+        self.assertIs(out.seq[1], composed)
+
+
+class TestCancelWatchdog(unittest.TestCase):
+    def test_cancels_operations_past_their_time(self):
+        watchdog = CancelWatchdog()
+        fired = threading.Event()
+        watchdog.watch(time.monotonic() + 0.05, fired.set)
+        self.assertTrue(fired.wait(2))
+        self.assertEqual(watchdog.stats()["cancelled"], 1)
+
+    def test_unwatched_operations_are_left_alone(self):
+        watchdog = CancelWatchdog()
+        fired = []
+        handle = watchdog.watch(time.monotonic() + 0.05, lambda: fired.append("early"))
+        watchdog.watch(time.monotonic() + 0.1, lambda: fired.append("late"))
+        watchdog.unwatch(handle)
+        time.sleep(0.3)
+        self.assertEqual(fired, ["late"])
+
+    def test_earlier_deadline_wakes_the_thread(self):
+        watchdog = CancelWatchdog()
+        watchdog.watch(time.monotonic() + 60, lambda: None)
+        fired = threading.Event()
+        start = time.monotonic()
+        watchdog.watch(time.monotonic() + 0.05, fired.set)
+        self.assertTrue(fired.wait(2))
+        self.assertLess(time.monotonic() - start, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
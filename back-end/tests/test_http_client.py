@@ -0,0 +1,75 @@
+"""
+Unit tests for utils.http_client (deadline-bounded marketplace HTTP calls).
+
+To run:
+python -m unittest tests.test_http_client
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from utils import deadline
+from utils.http_client import REQUEST_TIMEOUT, send
+
+
+class TestSend(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.session.request.return_value = "response"
+
+    def test_timeout_is_capped_by_the_deadline(self):
+        self.assertEqual(send(self.session, "GET", "https://api.example.com/x"), "response")
+        self.assertEqual(self.session.request.call_args.kwargs["timeout"], REQUEST_TIMEOUT)
+
+        with deadline.budget(2):
+            send(self.session, "GET", "https://api.example.com/x", json={"a": 1})
+        kwargs = self.session.request.call_args.kwargs
+        self.assertLessEqual(kwargs["timeout"], 2)
+        self.assertEqual(kwargs["json"], {"a": 1})
+
+    def test_no_call_once_the_deadline_has_passed(self):
+        with deadline.budget(0):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                send(self.session, "GET", "https://api.example.com/x", "eBay call")
+        self.session.request.assert_not_called()
+
+    def test_timeout_past_the_deadline_is_deadline_exceeded(self):
+        def slow(*args, **kwargs):
+            time.sleep(kwargs["timeout"])
+            raise requests.ReadTimeout()
+
+        self.session.request.side_effect = slow
+        with deadline.budget(0.02):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                send(self.session, "GET", "https://api.example.com/x")
+
+        # Without a deadline the timeout is the caller's to handle
+        self.session.request.side_effect = requests.ReadTimeout()
+        with self.assertRaises(requests.ReadTimeout):
+            send(self.session, "GET", "https://api.example.com/x")
+
+    def test_slowly_dripping_response_is_deadline_exceeded(self):
+        def dripping(*args, **kwargs):
+            time.sleep(0.03)  # each read within the socket timeout, the whole beyond the deadline
+            return "response"
+
+        self.session.request.side_effect = dripping
+        with deadline.budget(0.02):
+            with self.assertRaises(deadline.DeadlineExceeded) as ctx:
+                send(self.session, "GET", "https://api.example.com/x", "Etsy call")
+        self.assertIn("Etsy call", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Unit tests for utils.image_cache (on-disk LRU cache of resized images).
+
+To run:
+python -m unittest tests.test_image_cache
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.image_cache import ResizeCache, normalize_width, resize_format
+
+
+class FakeRenderer:
+    """Writes `width` bytes instead of an image, so sizes are easy to reason about."""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def __call__(self, source_path, dest_path, width, fmt):
+        self.calls.append((os.path.basename(source_path), width, fmt))
+        time.sleep(self.delay)
+        with open(dest_path, "wb") as f:
+            f.write(b"x" * width)
+        return width
+
+
+class TestResizeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.tmp.name, "uploads")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        os.makedirs(self.source_dir)
+        for name in ("a.jpg", "b.jpg", "c.jpg"):
+            open(os.path.join(self.source_dir, name), "wb").close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _cache(self, max_bytes=1000, render=None):
+        return ResizeCache(self.cache_dir, self.source_dir, max_bytes, render or FakeRenderer())
+
+    def test_renders_once_then_hits(self):
+        render = FakeRenderer()
+        cache = self._cache(render=render)
+        first = cache.get("a.jpg", 320, "jpeg")
+        second = cache.get("a.jpg", 320, "jpeg")
+        self.assertEqual(first, second)
+        self.assertEqual(len(render.calls), 1)
+        self.assertEqual(os.path.getsize(first), 320)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_missing_source(self):
+        self.assertIsNone(self._cache().get("nope.jpg", 320, "jpeg"))
+
+    def test_evicts_least_recently_used(self):
+        cache = self._cache(max_bytes=700)
+        a = cache.get("a.jpg", 300, "jpeg")
+        b = cache.get("b.jpg", 300, "jpeg")
+        cache.get("a.jpg", 300, "jpeg")  # a is now more recent than b
+        cache.get("c.jpg", 300, "jpeg")
+        self.assertTrue(os.path.exists(a))
+        self.assertFalse(os.path.exists(b))
+        self.assertLessEqual(cache.stats()["bytes"], 700)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_concurrent_misses_render_once(self):
+        render = FakeRenderer(delay=0.2)
+        cache = self._cache(render=render)
+        paths = []
+        threads = [threading.Thread(target=lambda: paths.append(cache.get("a.jpg", 64, "webp"))) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(render.calls), 1)
+        self.assertEqual(len(set(paths)), 1)
+
+    def test_forget_rerenders_a_removed_file(self):
+        render = FakeRenderer()
+        cache = self._cache(render=render)
+        path = cache.get("a.jpg", 320, "jpeg")
+        cache.forget("a.jpg", 320, "jpeg")  # file still there: kept
+        self.assertEqual(cache.stats()["entries"], 1)
+
+        os.remove(path)  # as if evicted between get() and the send
+        cache.forget("a.jpg", 320, "jpeg")
+        self.assertEqual(cache.stats()["bytes"], 0)
+        self.assertEqual(cache.get("a.jpg", 320, "jpeg"), path)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(len(render.calls), 2)
+
+    def test_failed_render_leaves_nothing_behind(self):
+        def broken(source_path, dest_path, width, fmt):
+            open(dest_path, "wb").close()
+            raise OSError("cannot identify image file")
+
+        cache = self._cache(render=broken)
+        with self.assertRaises(OSError):
+            cache.get("a.jpg", 64, "jpeg")
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_index_survives_restart(self):
+        cache = self._cache()
+        path = cache.get("a.jpg", 128, "jpeg")
+        cache.save()
+
+        render = FakeRenderer()
+        restarted = self._cache(render=render)
+        self.assertEqual(restarted.get("a.jpg", 128, "jpeg"), path)
+        self.assertEqual(render.calls, [])
+        self.assertEqual(restarted.stats()["bytes"], 128)
+
+    def test_load_removes_only_unknown_cache_files(self):
+        os.makedirs(self.cache_dir)
+        orphan = os.path.join(self.cache_dir, "0" * 40 + ".jpeg.12.34.tmp")
+        unrelated = os.path.join(self.cache_dir, "README")
+        for path in (orphan, unrelated):
+            open(path, "w").close()
+        self._cache()
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(unrelated))
+
+
+class TestParameters(unittest.TestCase):
+    def test_widths_snap_up_within_bounds(self):
+        self.assertEqual(normalize_width(300), 304)
+        self.assertEqual(normalize_width(320), 320)
+        self.assertEqual(normalize_width(1), 16)
+        self.assertEqual(normalize_width(10000), 2048)
+
+    def test_formats(self):
+        self.assertEqual(resize_format("item.png", None), "png")
+        self.assertEqual(resize_format("item.gif", None), "png")
+        self.assertEqual(resize_format("item.jpg", "JPG"), "jpeg")
+        self.assertEqual(resize_format("item.jpg", "avif"), "avif")
+        self.assertIsNone(resize_format("item.jpg", "bmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,323 @@
+"""
+Unit tests for utils.images (rendition generation and the background pipeline).
+
+To run:
+python -m unittest tests.test_images
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import base64
+import io
+import tempfile
+import threading
+import time
+import unittest
+
+from PIL import Image
+
+from utils.images import (
+    PLACEHOLDER_SIZE,
+    RENDITIONS,
+    VARIANT_FORMATS,
+    RenditionPipeline,
+    accepted_variants,
+    render_image,
+    render_renditions,
+    rendition_filename,
+    rendition_url,
+    resize_image,
+    sniff_image_type,
+    variant_filename,
+    write_variants,
+)
+
+
+class TestRenderRenditions(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _source(self, name, size, mode="RGB", **save_kwargs):
+        path = os.path.join(self.dir.name, name)
+        Image.new(mode, size, "red").save(path, **save_kwargs)
+        return path
+
+    def test_every_rendition_fits_its_box(self):
+        written = render_renditions(self._source("big.jpg", (3000, 1500)), self.dir.name)
+        self.assertEqual(set(written), set(RENDITIONS))
+        for name, filename in written.items():
+            with Image.open(os.path.join(self.dir.name, filename)) as im:
+                self.assertLessEqual(im.width, RENDITIONS[name][0])
+                self.assertLessEqual(im.height, RENDITIONS[name][1])
+                self.assertEqual(im.format, "JPEG")
+        with Image.open(os.path.join(self.dir.name, written["thumb"])) as im:
+            self.assertEqual(im.size, (320, 160))  # aspect ratio kept
+
+    def test_small_images_are_not_upscaled(self):
+        written = render_renditions(self._source("small.jpg", (200, 100)), self.dir.name)
+        with Image.open(os.path.join(self.dir.name, written["full"])) as im:
+            self.assertEqual(im.size, (200, 100))
+
+    def test_transparency_is_kept_as_png(self):
+        written = render_renditions(self._source("logo.png", (800, 800), mode="RGBA"), self.dir.name)
+        self.assertEqual(written["thumb"], "logo.thumb.png")
+        with Image.open(os.path.join(self.dir.name, written["thumb"])) as im:
+            self.assertEqual(im.mode, "RGBA")
+
+    def test_exif_orientation_is_applied(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise when displayed
+        written = render_renditions(self._source("phone.jpg", (1200, 600), exif=exif), self.dir.name)
+        with Image.open(os.path.join(self.dir.name, written["full"])) as im:
+            self.assertEqual(im.size, (600, 1200))
+            self.assertNotIn(0x0112, im.getexif())
+
+    def test_thumbnail_is_much_smaller_than_original(self):
+        seeded = os.path.join(PROJECT_ROOT, "static", "uploads", "item_14.jpg")
+        if not os.path.exists(seeded):
+            self.skipTest("seed image not present")
+        written = render_renditions(seeded, self.dir.name)
+        thumb = os.path.getsize(os.path.join(self.dir.name, written["thumb"]))
+        self.assertLess(thumb, os.path.getsize(seeded) / 5)
+
+
+    def test_variants_are_written_next_to_each_rendition(self):
+        source = self._source("photo.jpg", (1500, 1000), quality=95)
+        written = render_renditions(source, self.dir.name)
+        for path in [source] + [os.path.join(self.dir.name, f) for f in written.values()]:
+            for fmt in VARIANT_FORMATS:
+                with Image.open(variant_filename(path, fmt)) as variant, Image.open(path) as im:
+                    self.assertEqual(variant.format, fmt.upper())
+                    self.assertEqual(variant.size, im.size)
+                self.assertLess(os.path.getsize(variant_filename(path, fmt)), os.path.getsize(path))
+
+    def test_details_give_displayed_size_and_a_tiny_placeholder(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        _, details = render_image(self._source("phone.jpg", (3000, 2000), exif=exif), self.dir.name)
+        self.assertEqual((details["width"], details["height"]), (2000, 3000))  # as displayed, not as stored
+
+        prefix = "data:image/webp;base64,"
+        self.assertTrue(details["placeholder"].startswith(prefix))
+        self.assertLess(len(details["placeholder"]), 1000)
+        data = base64.b64decode(details["placeholder"][len(prefix):])
+        with Image.open(io.BytesIO(data)) as im:
+            self.assertEqual(im.format, "WEBP")
+            self.assertEqual(im.size, (PLACEHOLDER_SIZE * 2 // 3, PLACEHOLDER_SIZE))
+
+    def test_gif_originals_get_no_variants(self):
+        source = self._source("anim.gif", (400, 400), mode="P")
+        render_renditions(source, self.dir.name)
+        for fmt in VARIANT_FORMATS:
+            self.assertFalse(os.path.exists(variant_filename(source, fmt)))
+
+
+class TestVariants(unittest.TestCase):
+    def test_variant_larger_than_the_original_is_dropped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # Noise saved at very low JPEG quality: re-encoding it at normal quality only grows
+            path = os.path.join(tmp, "noise.jpg")
+            Image.effect_noise((128, 128), 120).convert("RGB").save(path, quality=5)
+            with open(variant_filename(path, "webp"), "wb") as f:
+                f.write(b"stale")
+            self.assertEqual(write_variants(path), [])
+            self.assertEqual(os.listdir(tmp), ["noise.jpg"])
+
+    def test_variant_is_upright(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "phone.jpg")
+            exif = Image.Exif()
+            exif[0x0112] = 6
+            Image.new("RGB", (600, 300), "red").save(path, exif=exif, quality=95)
+            self.assertIn("webp", write_variants(path))
+            with Image.open(variant_filename(path, "webp")) as im:
+                self.assertEqual(im.size, (300, 600))
+
+    def test_accept_header_negotiation(self):
+        chrome = "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8"
+        self.assertEqual(accepted_variants(chrome), ["avif", "webp"])
+        self.assertEqual(accepted_variants("image/webp,*/*"), ["webp"])
+        self.assertEqual(accepted_variants("image/avif;q=0.5,image/webp"), ["webp", "avif"])
+        self.assertEqual(accepted_variants("image/avif;q=0,image/webp;q=0"), [])
+        self.assertEqual(accepted_variants("image/*,*/*"), [])
+        self.assertEqual(accepted_variants(None), [])
+
+
+class TestResizeImage(unittest.TestCase):
+    def test_resizes_to_width_in_each_format(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "item.jpg")
+            Image.new("RGB", (1000, 500), "green").save(source)
+            for fmt, pil_format in (("jpeg", "JPEG"), ("webp", "WEBP"), ("png", "PNG")):
+                dest = os.path.join(tmp, f"out.{fmt}")
+                size = resize_image(source, dest, 400, fmt)
+                self.assertEqual(size, os.path.getsize(dest))
+                with Image.open(dest) as im:
+                    self.assertEqual((im.format, im.size), (pil_format, (400, 200)))
+
+    def test_never_upscales(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "item.jpg")
+            Image.new("RGB", (100, 50), "green").save(source)
+            dest = os.path.join(tmp, "out.jpeg")
+            resize_image(source, dest, 800, "jpeg")
+            with Image.open(dest) as im:
+                self.assertEqual(im.size, (100, 50))
+
+
+class TestSniffImageType(unittest.TestCase):
+    def test_detects_type_from_content(self):
+        for fmt, ext in (("JPEG", ".jpg"), ("PNG", ".png"), ("GIF", ".gif")):
+            buf = io.BytesIO()
+            Image.new("RGB", (4, 4)).save(buf, fmt)
+            self.assertEqual(sniff_image_type(buf.getvalue()[:32]), ext)
+
+    def test_rejects_everything_else(self):
+        for head in (b"", b"<?php system($_GET['c']);", b"%PDF-1.7", b"RIFF\x00\x00\x00\x00WEBP"):
+            self.assertIsNone(sniff_image_type(head))
+
+
+class TestNaming(unittest.TestCase):
+    def test_rendition_names_sit_next_to_the_original(self):
+        self.assertEqual(rendition_filename("item_14.jpg", "thumb"), "item_14.thumb.jpg")
+        self.assertEqual(rendition_url("/images/item_14.jpg", "item_14.thumb.jpg"), "/images/item_14.thumb.jpg")
+        self.assertEqual(rendition_url("/uploads/a_b.png", "a_b.modal.png"), "/uploads/a_b.modal.png")
+
+
+class TestRenditionPipeline(unittest.TestCase):
+    def test_renders_in_background_and_reports_urls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "item.jpg")
+            Image.new("RGB", (1500, 1000), "blue").save(source)
+
+            done = threading.Event()
+            results = {}
+
+            def on_done(image_id, urls, details):
+                results[image_id] = urls, details
+                done.set()
+
+            pipeline = RenditionPipeline(on_done, workers=1)
+            try:
+                self.assertTrue(pipeline.submit(7, source, "/uploads/item.jpg"))
+                self.assertFalse(pipeline.submit(7, source, "/uploads/item.jpg"))  # already pending
+                self.assertTrue(done.wait(60))
+            finally:
+                pipeline.shutdown()
+
+            urls, details = results[7]
+            self.assertEqual(urls["thumb"], "/uploads/item.thumb.jpg")
+            self.assertEqual((details["width"], details["height"]), (1500, 1000))
+            self.assertIsNotNone(details["placeholder"])
+            self.assertTrue(os.path.exists(os.path.join(tmp, "item.full.jpg")))
+            self.assertEqual(pipeline.stats()["completed"], 1)
+
+    def test_failed_callback_counts_as_a_failed_render(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "item.jpg")
+            Image.new("RGB", (400, 300), "blue").save(source)
+
+            def on_done(image_id, urls, details):
+                raise RuntimeError("database unavailable")
+
+            pipeline = RenditionPipeline(on_done, workers=1)
+            try:
+                with self.assertLogs("utils.images", "ERROR"):
+                    self.assertTrue(pipeline.submit(7, source, "/uploads/item.jpg"))
+                    pipeline.shutdown()
+                self.assertFalse(pipeline.submit(7, source, "/uploads/item.jpg"))
+            finally:
+                pipeline.shutdown()
+            stats = pipeline.stats()
+            self.assertEqual((stats["completed"], stats["failed"], stats["retry_later"]), (0, 1, 1))
+
+    def test_slow_callback_does_not_hold_up_other_results(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = []
+            for name in ("a.jpg", "b.jpg", "c.jpg"):
+                sources.append(os.path.join(tmp, name))
+                Image.new("RGB", (400, 300), "blue").save(sources[-1])
+            entered, release = threading.Event(), threading.Event()
+            idle = []
+
+            def on_done(image_id, urls, details):
+                entered.set()
+                release.wait(60)  # a slow database write
+
+            pipeline = RenditionPipeline(on_done, workers=1, on_idle=lambda: idle.append(1))
+            try:
+                for image_id, source in enumerate(sources):
+                    self.assertTrue(pipeline.submit(image_id, source, "/uploads/x.jpg"))
+                self.assertTrue(entered.wait(60))
+                # The pool still answers the resizes requests wait on
+                size = pipeline.resize(sources[0], os.path.join(tmp, "small.jpg"), 100, "jpeg", timeout=60)
+                self.assertGreater(size, 0)
+                for _ in range(600):
+                    if pipeline._results.qsize() == 2:
+                        break
+                    time.sleep(0.1)
+                release.set()
+            finally:
+                pipeline.shutdown()
+            self.assertEqual(pipeline.stats()["completed"], 3)
+            self.assertEqual(idle, [1])  # once for the batch, not once per image
+
+    def test_variants_are_tried_once_per_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "old.jpg")
+            Image.new("RGB", (800, 600), "blue").save(path, quality=95)
+            pipeline = RenditionPipeline(lambda *a: None, workers=1)
+            try:
+                self.assertTrue(pipeline.submit_variants(path))
+                self.assertFalse(pipeline.submit_variants(path))
+            finally:
+                pipeline.shutdown()
+            self.assertTrue(os.path.exists(variant_filename(path, "webp")))
+            self.assertEqual(pipeline.stats()["completed"], 1)
+
+    def test_missing_source_is_not_queued(self):
+        pipeline = RenditionPipeline(lambda *a: None)
+        self.assertFalse(pipeline.submit(1, "/nonexistent/item.jpg", "/uploads/item.jpg"))
+        self.assertIsNone(pipeline._executor)  # no worker process started for nothing
+
+    def test_failed_images_wait_before_being_queued_again(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            broken = os.path.join(tmp, "broken.jpg")
+            with open(broken, "wb") as f:
+                f.write(b"\xff\xd8\xff not really a jpeg")
+            pipeline = RenditionPipeline(lambda *a: None, workers=1)
+            try:
+                with self.assertLogs("utils.images", "ERROR"):
+                    self.assertTrue(pipeline.submit(3, broken, "/uploads/broken.jpg"))
+                    pipeline.shutdown()  # waits for the render to fail
+                self.assertFalse(pipeline.submit(3, broken, "/uploads/broken.jpg"))
+                self.assertEqual(pipeline.stats()["retry_later"], 1)
+
+                pipeline.retry_after = 0
+                pipeline._failures[3] = 0.0  # retry time passed
+                self.assertTrue(pipeline.submit(3, broken, "/uploads/broken.jpg"))
+            finally:
+                pipeline.shutdown()
+            self.assertEqual(pipeline.stats()["failed"], 2)
+
+    def test_failures_are_bounded(self):
+        pipeline = RenditionPipeline(lambda *a: None, max_failures=2)
+        with self.assertLogs("utils.images", "WARNING") as logs:
+            for image_id in (1, 2, 1, 3):
+                pipeline.submit(image_id, "/nonexistent/item.jpg", "/uploads/item.jpg")
+        self.assertEqual(len(logs.records), 3)  # 1 is still backing off the second time
+        # then 3 pushes out the oldest failure
+        self.assertEqual(list(pipeline._failures), [2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
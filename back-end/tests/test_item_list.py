@@ -0,0 +1,153 @@
+"""
+Route-level tests for the item lists (GET /items, GET /users/<id>/items): the query
+DBInterface.get_item_list builds and how APIRoutes._item_list shapes its rows,
+with the database mocked.
+
+To run:
+python -m unittest tests.test_item_list
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import datetime
+import re
+import unittest
+
+from tests.api_harness import RouteTestCase
+
+NO_IMAGE = {"primary_image_id": None, "primary_image_url": None, "primary_thumb_url": None,
+            "primary_image_width": None, "primary_image_height": None, "primary_placeholder": None}
+NO_LISTINGS = {"ebay_listings": 0, "ebay_statuses": [], "etsy_listings": 0, "etsy_quantity": 0}
+
+# Every column get_item_list can select; respond() hands back only those the query selects
+ROWS = [
+    {
+        "item_id": 1, "title": "Lamp", "price": "$10.00", "description": "Brass", "category": "Home",
+        "list_date": datetime.date(2026, 1, 2), "creator_id": 3,
+        "primary_image_id": 11, "primary_image_url": "/images/a.jpg", "primary_thumb_url": "/images/a.thumb.jpg",
+        "primary_image_width": 800, "primary_image_height": 600, "primary_placeholder": "data:image/webp;base64,AA",
+        "ebay_listings": 2, "ebay_statuses": ["ACTIVE", "ENDED"], "etsy_listings": 1, "etsy_quantity": 3,
+    },
+    {
+        # Image uploaded, renditions not rendered yet
+        "item_id": 2, "title": "Chair", "price": None, "description": None, "category": None,
+        "list_date": None, "creator_id": 3,
+        **NO_IMAGE, "primary_image_id": 12, "primary_image_url": "/images/b.jpg",
+        **NO_LISTINGS,
+    },
+    {
+        "item_id": 3, "title": "Rug", "price": None, "description": None, "category": None,
+        "list_date": None, "creator_id": 4,
+        **NO_IMAGE, **NO_LISTINGS,
+    },
+]
+
+
+def selected_columns(sql):
+    """Output column names of a get_item_list query: "i"."<column>" and <expression> AS <name>."""
+    return set(re.findall(r'"i"\."(\w+)"', sql)) | set(re.findall(r"\bAS (\w+)", sql))
+
+
+class TestItemList(RouteTestCase):
+    def respond(self, sql, params, fetch_all=False, **kwargs):
+        if "FROM Item i" in sql:
+            columns = selected_columns(sql)
+            # A key the route reads but the query didn't select fails the request
+            return [{k: v for k, v in row.items() if k in columns} for row in ROWS]
+        return super().respond(sql, params, fetch_all=fetch_all, **kwargs)
+
+    def test_rows_land_in_their_keys(self):
+        resp = self.client.get("/items")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()[0], {
+            "item_id": 1, "title": "Lamp", "price": 10.0, "description": "Brass", "category": "Home",
+            "list_date": "2026-01-02", "creator_id": 3,
+            "primary_image": {
+                "image_id": 11, "image_url": "/images/a.thumb.jpg", "width": 800, "height": 600,
+                "placeholder": "data:image/webp;base64,AA",
+            },
+            "marketplaces": {
+                "ebay": {"listings": 2, "statuses": ["ACTIVE", "ENDED"]},
+                "etsy": {"listings": 1, "quantity": 3},
+            },
+        })
+
+        (sql, params), = self.queries
+        self.assertIn("LEFT JOIN LATERAL", sql)
+        self.assertEqual(sql.count("CROSS JOIN LATERAL"), 2)
+        self.assertNotIn("WHERE i.", sql)
+        self.assertIsNone(params)
+
+    def test_items_without_images_or_listings(self):
+        items = self.client.get("/items").get_json()
+
+        # The original stands in until the thumb exists
+        self.assertEqual(items[1]["primary_image"], {
+            "image_id": 12, "image_url": "/images/b.jpg", "width": None, "height": None, "placeholder": None,
+        })
+        self.assertIsNone(items[2]["primary_image"])
+        empty = {"ebay": {"listings": 0, "statuses": []}, "etsy": {"listings": 0, "quantity": 0}}
+        self.assertEqual(items[1]["marketplaces"], empty)
+        self.assertEqual(items[2]["marketplaces"], empty)
+
+    def test_renditions_are_queued_only_for_images_without_placeholder(self):
+        self.client.get("/items")
+        submit = self.routes.renditions.submit
+        submit.assert_called_once()
+        image_id, source_path, image_url = submit.call_args.args
+        self.assertEqual((image_id, image_url), (12, "/images/b.jpg"))
+        self.assertTrue(source_path.endswith("b.jpg"))
+
+    def test_unstored_renditions_are_reported_to_the_pipeline(self):
+        def respond(sql, params, **kwargs):
+            raise RuntimeError("connection lost")
+
+        self.respond = respond
+        details = {"width": 800, "height": 600, "placeholder": "data:image/webp;base64,AA"}
+        urls = {name: f"/images/b.{name}.jpg" for name in ("thumb", "modal", "full")}
+        # execute_query's error is logged and swallowed by _execute_dml; this one reaches the pipeline
+        with self.assertRaisesRegex(RuntimeError, "Unable to store renditions of image 12"):
+            self.routes._store_renditions(12, urls, details)
+
+    def test_fields_leave_out_columns_and_joins(self):
+        items = self.client.get("/items?fields=title").get_json()
+        self.assertEqual(items[0], {"item_id": 1, "title": "Lamp"})
+        sql, _ = self.queries[-1]
+        self.assertEqual(selected_columns(sql), {"item_id", "title"})
+        self.assertNotIn("JOIN", sql)
+        self.routes.renditions.submit.assert_not_called()
+
+        items = self.client.get("/items?fields=marketplaces").get_json()
+        self.assertEqual(set(items[0]), {"item_id", "marketplaces"})
+        sql, _ = self.queries[-1]
+        self.assertIn("CROSS JOIN LATERAL", sql)
+        self.assertNotIn("LEFT JOIN LATERAL", sql)
+
+        items = self.client.get("/items?fields=title,primary_image").get_json()
+        self.assertEqual(set(items[0]), {"item_id", "title", "primary_image"})
+        self.assertEqual(items[0]["primary_image"]["image_id"], 11)
+        sql, _ = self.queries[-1]
+        self.assertIn("LEFT JOIN LATERAL", sql)
+        self.assertNotIn("CROSS JOIN LATERAL", sql)
+
+    def test_unknown_fields_are_rejected_before_querying(self):
+        resp = self.client.get("/items?fields=title,password")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.queries, [])
+
+    def test_user_items_are_the_creators_newest_first(self):
+        resp = self.client.get("/users/3/items?fields=title")
+        self.assertEqual(resp.status_code, 200)
+        sql, params = self.queries[-1]
+        self.assertIn("WHERE i.creator_id = %s ORDER BY i.list_date DESC", sql)
+        self.assertEqual(params, (3,))
+
+
+if __name__ == "__main__":
+    unittest.main()
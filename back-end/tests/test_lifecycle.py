@@ -0,0 +1,147 @@
+"""
+Unit tests for utils.lifecycle (drain and ordered shutdown) and db.migrate.
+
+To run:
+python -m unittest tests.test_lifecycle
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import signal
+import tempfile
+import threading
+import time
+import unittest
+
+from db.migrate import MigrationCheck, discover
+from utils.lifecycle import Lifecycle, install_signal_handlers
+
+
+class TestLifecycle(unittest.TestCase):
+    def test_refuses_requests_once_draining(self):
+        lc = Lifecycle()
+        self.assertTrue(lc.request_started())
+        lc.draining = True
+        self.assertFalse(lc.request_started())
+        self.assertEqual(lc.in_flight, 1)
+
+    def test_shutdown_waits_for_in_flight_requests(self):
+        lc = Lifecycle()
+        lc.request_started()
+        seen = []
+        lc.on_shutdown("resources", "pool", lambda: seen.append(lc.in_flight))
+
+        threading.Timer(0.2, lc.request_finished).start()
+        summary = lc.shutdown(grace=0, drain_timeout=5)
+
+        self.assertTrue(summary["drained"])
+        self.assertEqual(seen, [0])  # the pool closed only after the request finished
+        self.assertGreaterEqual(summary["seconds"], 0.15)
+
+    def test_drain_timeout_abandons_stuck_requests(self):
+        lc = Lifecycle()
+        lc.request_started()
+        summary = lc.shutdown(grace=0, drain_timeout=0.05)
+        self.assertFalse(summary["drained"])
+        self.assertEqual(summary["abandoned_requests"], 1)
+
+    def test_hooks_run_by_stage_and_survive_failures(self):
+        lc = Lifecycle()
+        order = []
+
+        def broken():
+            raise RuntimeError("boom")
+
+        lc.on_shutdown("resources", "pool", lambda: order.append("pool"))
+        lc.on_shutdown("jobs", "broken", broken)
+        lc.on_shutdown("jobs", "hasher", lambda: order.append("hasher"))
+        lc.on_shutdown("listeners", "server", lambda: order.append("server"))
+
+        summary = lc.shutdown(grace=0, drain_timeout=0)
+        self.assertEqual(order, ["server", "hasher", "pool"])
+        self.assertEqual(summary["failed_hooks"], ["broken"])
+
+    def test_unknown_stage_rejected(self):
+        with self.assertRaises(ValueError):
+            Lifecycle().on_shutdown("later", "x", lambda: None)
+
+    def test_shutdown_runs_once(self):
+        lc = Lifecycle()
+        calls = []
+        lc.on_shutdown("jobs", "count", lambda: calls.append(1))
+        lc.shutdown(grace=0, drain_timeout=0)
+        lc.shutdown(grace=0, drain_timeout=0)
+        self.assertEqual(calls, [1])
+
+    def test_sigterm_starts_shutdown_in_background(self):
+        lc = Lifecycle()
+        previous = signal.getsignal(signal.SIGTERM)
+        try:
+            install_signal_handlers(lc, signals=(signal.SIGTERM,))
+            os.kill(os.getpid(), signal.SIGTERM)
+            self.assertTrue(lc.wait_stopped(timeout=5))
+            self.assertTrue(lc.stopping and lc.draining)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+
+class FakeDB:
+    def __init__(self, applied=None):
+        self.applied = applied
+        self.queries = 0
+
+    def execute_query(self, sql, params=None, fetch_one=False, fetch_all=False, commit=False):
+        self.queries += 1
+        if "to_regclass" in sql:
+            return {"present": self.applied is not None}
+        return [{"version": v} for v in self.applied]
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        for name in ("0002_second.sql", "0001_first.sql", "0010_tenth.sql", "notes.txt", "12_bad.sql"):
+            open(os.path.join(self.dir.name, name), "w").close()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_discover_orders_by_number(self):
+        versions = [v for v, _ in discover(self.dir.name)]
+        self.assertEqual(versions, ["0001_first", "0002_second", "0010_tenth"])
+
+    def test_missing_table_means_everything_pending(self):
+        check = MigrationCheck(FakeDB(applied=None), directory=self.dir.name)
+        self.assertEqual(check.pending(), ["0001_first", "0002_second", "0010_tenth"])
+
+    def test_up_to_date_answer_is_kept(self):
+        db = FakeDB(applied=["0001_first", "0002_second", "0010_tenth"])
+        check = MigrationCheck(db, directory=self.dir.name)
+        self.assertEqual(check.pending(), [])
+        queries = db.queries
+        self.assertEqual(check.pending(), [])
+        self.assertEqual(db.queries, queries)
+
+    def test_pending_is_rechecked(self):
+        db = FakeDB(applied=["0001_first"])
+        check = MigrationCheck(db, directory=self.dir.name, recheck_after=0)
+        self.assertEqual(check.pending(), ["0002_second", "0010_tenth"])
+        db.applied = ["0001_first", "0002_second", "0010_tenth"]
+        time.sleep(0.01)
+        self.assertEqual(check.pending(), [])
+
+    def test_no_migration_files_needs_no_query(self):
+        db = FakeDB()
+        with tempfile.TemporaryDirectory() as empty:
+            self.assertEqual(MigrationCheck(db, directory=empty).pending(), [])
+        self.assertEqual(db.queries, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
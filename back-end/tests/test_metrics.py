@@ -0,0 +1,74 @@
+"""
+Unit tests for utils.metrics.
+
+To run:
+python -m unittest tests.test_metrics
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import threading
+import unittest
+
+from utils.metrics import MetricsRegistry, render_gauges
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+
+    def test_histogram_is_cumulative(self):
+        self.metrics.observe("api.get_items", "GET", 200, 0.003, 0.001, 100)
+        self.metrics.observe("api.get_items", "GET", 200, 0.2, 0.15, 5000)
+        text = self.metrics.render()
+
+        prefix = 'secondspark_http_request_duration_seconds_bucket{endpoint="api.get_items",method="GET",'
+        self.assertIn(prefix + 'le="0.005"} 1', text)
+        self.assertIn(prefix + 'le="0.25"} 2', text)
+        self.assertIn(prefix + 'le="+Inf"} 2', text)
+        self.assertIn('secondspark_http_request_duration_seconds_count{endpoint="api.get_items",method="GET"} 2', text)
+        self.assertIn('secondspark_http_requests_total{endpoint="api.get_items",method="GET",status="200"} 2', text)
+        self.assertIn('secondspark_http_response_size_bytes_bucket{endpoint="api.get_items",method="GET",le="256"} 1', text)
+
+    def test_streamed_responses_skip_size_histogram(self):
+        self.metrics.observe("api.export", "GET", 200, 0.01, 0.0, None)
+        self.assertNotIn("size_bytes_count{endpoint=\"api.export\"", self.metrics.render())
+
+    def test_threads_are_merged_and_dead_shards_folded(self):
+        def worker():
+            for _ in range(100):
+                self.metrics.request_started("api.get_item")
+                self.metrics.observe("api.get_item", "GET", 200, 0.01, 0.0, 10)
+                self.metrics.request_finished("api.get_item")
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        total = self.metrics.snapshot()
+        self.assertEqual(total.requests[("api.get_item", "GET", 200)], 800)
+        self.assertEqual(total.in_flight["api.get_item"], 0)
+        self.assertEqual(self.metrics._shards, [])  # every worker thread has exited
+
+    def test_in_flight_gauge(self):
+        self.metrics.request_started("api.get_items")
+        self.assertIn('secondspark_http_requests_in_flight{endpoint="api.get_items"} 1', self.metrics.render())
+        self.metrics.request_finished("api.get_items")
+        self.assertIn('secondspark_http_requests_in_flight{endpoint="api.get_items"} 0', self.metrics.render())
+
+    def test_render_gauges(self):
+        text = render_gauges([("db_pool_in_use", "gauge", "Connections checked out.", 3)])
+        self.assertIn("# TYPE secondspark_db_pool_in_use gauge", text)
+        self.assertIn("secondspark_db_pool_in_use 3", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Unit tests for utils.passwords.
+
+Uses a deliberately cheap scrypt cost so the suite stays fast.
+
+To run:
+python -m unittest tests.test_passwords
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import unittest
+
+from utils.passwords import PasswordHasher, PasswordHasherBusy
+
+
+class TestPasswordHasher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.hasher = PasswordHasher(n=2 ** 10, r=8, p=1, workers=1, max_pending=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.hasher.shutdown()
+
+    def test_hash_round_trip(self):
+        stored = self.hasher.hash("hunter2")
+
+        self.assertTrue(stored.startswith("scrypt$1024$8$1$"))
+        self.assertNotIn("hunter2", stored)
+        self.assertEqual(self.hasher.verify("hunter2", stored), (True, False))
+        self.assertEqual(self.hasher.verify("wrong", stored), (False, False))
+
+    def test_hashes_are_salted(self):
+        self.assertNotEqual(self.hasher.hash("same"), self.hasher.hash("same"))
+
+    def test_legacy_plaintext_matches_and_needs_rehash(self):
+        self.assertEqual(self.hasher.verify("pass", "pass"), (True, True))
+        self.assertEqual(self.hasher.verify("nope", "pass"), (False, False))
+
+    def test_changed_cost_needs_rehash(self):
+        cheaper = PasswordHasher(n=2 ** 8, r=8, p=1, workers=1)
+        try:
+            stored = cheaper.hash("hunter2")
+        finally:
+            cheaper.shutdown()
+        self.assertEqual(self.hasher.verify("hunter2", stored), (True, True))
+
+    def test_malformed_hash_does_not_match(self):
+        self.assertEqual(self.hasher.verify("x", "scrypt$garbage"), (False, False))
+
+    def test_saturated_pool_raises_busy(self):
+        hasher = PasswordHasher(n=2 ** 8, workers=1, max_pending=1, acquire_timeout=0.01)
+        hasher._slots.acquire()  # simulate one job already in flight
+        try:
+            with self.assertRaises(PasswordHasherBusy):
+                hasher.hash("x")
+        finally:
+            hasher._slots.release()
+            hasher.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
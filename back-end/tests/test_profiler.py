@@ -0,0 +1,93 @@
+"""
+Unit tests for utils.profiler.
+
+To run:
+python -m unittest tests.test_profiler
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import tempfile
+import time
+import unittest
+
+from utils.profiler import ProfileStore, SamplingProfiler, _categorize
+
+
+def _load(filename, source, name):
+    """Defines `name` from source as if it lived in `filename` (categories are path based)."""
+    namespace = {"time": time}
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace[name]
+
+
+fake_query = _load(os.path.join("db", "interface.py"), "def execute_query():\n    time.sleep(0.05)\n", "execute_query")
+fake_ebay_call = _load("ebay_interface.py", "def _request():\n    time.sleep(0.03)\n", "_request")
+
+
+def _item_row_to_dict():
+    end = time.perf_counter() + 0.03
+    while time.perf_counter() < end:
+        pass
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_time_is_attributed_to_categories(self):
+        profiler = SamplingProfiler(interval=0.001).start()
+        fake_query()
+        fake_ebay_call()
+        _item_row_to_dict()
+        profiler.stop()
+
+        summary = profiler.summary()
+        self.assertGreater(summary["db"], 0.03)
+        self.assertGreater(summary["marketplace"], 0.015)
+        self.assertGreater(summary["serialization"], 0.015)
+        self.assertLessEqual(sum(summary[c] for c in ("db", "marketplace", "serialization", "app")),
+                             summary["wall"] + 0.001)
+
+    def test_route_serializers_are_recognized(self):
+        def code(name):
+            return compile(f"def {name}(): pass", "routes.py", "exec").co_consts[0]
+
+        for name in ("_item_row_to_dict", "_transaction_row_to_dict", "_item_list", "_pick", "jsonify"):
+            self.assertEqual(_categorize((code("get_items"), code(name))), "serialization", name)
+        self.assertEqual(_categorize((code("get_items"), code("_parse_fields"))), "app")
+        # A serializer waiting on the database is DB time
+        self.assertEqual(_categorize((code("_item_list"), fake_query.__code__)), "db")
+
+    def test_folded_output(self):
+        profiler = SamplingProfiler(interval=0.001).start()
+        fake_query()
+        profiler.stop()
+
+        lines = profiler.folded()
+        self.assertTrue(lines)
+        db_lines = [line for line in lines if line.startswith("db;")]
+        self.assertTrue(db_lines)
+        stack, weight = db_lines[0].rsplit(" ", 1)
+        self.assertTrue(stack.endswith("db/interface.py:execute_query"))
+        self.assertGreater(int(weight), 0)
+
+    def test_store_prunes_old_profiles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = ProfileStore(directory, keep=2)
+            profiler = SamplingProfiler().start().stop()
+            names = []
+            for _ in range(3):
+                names.append(store.save("get_items", profiler))
+                time.sleep(0.002)
+
+            self.assertIsNone(store.path(names[0]))
+            self.assertIsNotNone(store.path(names[2]))
+            self.assertIsNone(store.path("../" + names[2][:-7]))
+
+
+if __name__ == "__main__":
+    unittest.main()
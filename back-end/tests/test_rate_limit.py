@@ -0,0 +1,105 @@
+"""
+Unit tests for utils.rate_limit.
+
+To run:
+python -m unittest tests.test_rate_limit
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import unittest
+from unittest import mock
+
+from utils.rate_limit import LoadShedder, PostgresTokenBucketLimiter, TokenBucketLimiter
+
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("utils.rate_limit.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_reject_with_retry_after(self):
+        limiter = TokenBucketLimiter(rate=2, burst=3)
+        for _ in range(3):
+            self.assertEqual(limiter.acquire("a"), (True, 0.0))
+
+        allowed, retry_after = limiter.acquire("a")
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 0.5)
+        self.assertEqual(limiter.stats()["rejected"], 1)
+
+    def test_refills_over_time_up_to_burst(self):
+        limiter = TokenBucketLimiter(rate=1, burst=2)
+        limiter.acquire("a")
+        limiter.acquire("a")
+        self.assertFalse(limiter.acquire("a")[0])
+
+        self.now += 100  # long idle: refills to burst, not beyond
+        self.assertTrue(limiter.acquire("a")[0])
+        self.assertTrue(limiter.acquire("a")[0])
+        self.assertFalse(limiter.acquire("a")[0])
+
+    def test_keys_are_independent(self):
+        limiter = TokenBucketLimiter(rate=1, burst=1)
+        self.assertTrue(limiter.acquire("a")[0])
+        self.assertFalse(limiter.acquire("a")[0])
+        self.assertTrue(limiter.acquire("b")[0])
+
+    def test_idle_buckets_are_recycled(self):
+        limiter = TokenBucketLimiter(rate=1, burst=1, max_buckets=2)
+        limiter.acquire("a")
+        limiter.acquire("b")
+        self.now += 5  # both buckets are full again
+        limiter.acquire("c")
+
+        self.assertEqual(len(limiter), 1)
+        self.assertEqual(len(limiter._tokens), 2)  # slots were reused, storage did not grow
+
+
+class TestPostgresTokenBucketLimiter(unittest.TestCase):
+    def test_uses_db_result(self):
+        db = mock.Mock()
+        db.execute_query.return_value = {"allowed": False, "tokens": 0.25}
+        limiter = PostgresTokenBucketLimiter(db, rate=1, burst=5, prefix="write:")
+
+        allowed, retry_after = limiter.acquire("user:1")
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 0.75)
+        db.execute_query.assert_called_once()  # one statement per acquire, no DDL
+        self.assertEqual(db.execute_query.call_args.kwargs["params"]["key"], "write:user:1")
+
+    def test_fails_open_on_db_error(self):
+        db = mock.Mock()
+        db.execute_query.side_effect = RuntimeError("connection refused")
+        limiter = PostgresTokenBucketLimiter(db, rate=1, burst=5)
+
+        self.assertEqual(limiter.acquire("user:1"), (True, 0.0))
+        self.assertEqual(limiter.stats()["errors"], 1)
+
+
+class TestLoadShedder(unittest.TestCase):
+    def test_sheds_on_wait_or_queue_depth(self):
+        pool = mock.Mock(waiting=0)
+        pool.recent_wait.return_value = 0.1
+        shedder = LoadShedder(pool, max_wait=0.5, max_waiters=10)
+        self.assertEqual(shedder.should_shed(), (False, 0.0))
+
+        pool.recent_wait.return_value = 2.5
+        self.assertEqual(shedder.should_shed(), (True, 2.5))
+
+        pool.recent_wait.return_value = 0.0
+        pool.waiting = 11
+        self.assertTrue(shedder.should_shed()[0])
+        self.assertEqual(shedder.shed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
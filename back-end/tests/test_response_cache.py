@@ -0,0 +1,107 @@
+"""
+Unit tests for utils.response_cache.
+
+These run without Flask or the database.
+
+To run:
+python -m unittest tests.test_response_cache
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import time
+import unittest
+
+from utils.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(max_bytes=100, max_entries=3)
+
+    def test_hit_and_miss_are_counted(self):
+        self.assertIsNone(self.cache.get("k"))
+        self.cache.set("k", b"[]", 200, "application/json", ttl=60, tags=("items",))
+
+        entry = self.cache.get("k")
+        self.assertEqual(entry.body, b"[]")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertAlmostEqual(stats["hit_ratio"], 0.5)
+
+    def test_expired_entry_is_a_miss(self):
+        self.cache.set("k", b"x", 200, "application/json", ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_entry_count_bound_evicts_least_recently_used(self):
+        for key in ("a", "b", "c"):
+            self.cache.set(key, b"x", 200, "application/json", ttl=60)
+        self.cache.get("a")  # 'b' is now the least recently used
+        self.cache.set("d", b"x", 200, "application/json", ttl=60)
+
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_byte_bound_evicts(self):
+        self.cache.set("a", b"x" * 60, 200, "application/json", ttl=60)
+        self.cache.set("b", b"x" * 60, 200, "application/json", ttl=60)
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertLessEqual(self.cache.stats()["bytes"], 100)
+
+    def test_oversized_body_is_not_cached(self):
+        self.assertIsNone(self.cache.set("a", b"x" * 101, 200, "application/json", ttl=60))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_invalidate_by_tag(self):
+        self.cache.set("items", b"1", 200, "application/json", ttl=60, tags=("items",))
+        self.cache.set("org_users", b"2", 200, "application/json", ttl=60, tags=("organizations", "users"))
+        self.cache.set("orgs", b"3", 200, "application/json", ttl=60, tags=("organizations",))
+
+        removed = self.cache.invalidate("users")
+
+        self.assertEqual(removed, 1)
+        self.assertIsNone(self.cache.get("org_users"))
+        self.assertIsNotNone(self.cache.get("items"))
+        self.assertIsNotNone(self.cache.get("orgs"))
+
+    def test_invalidation_during_build_drops_the_stale_body(self):
+        generations = self.cache.generations(("items",))
+        # ... build() reads the old rows, then a write invalidates "items" before set()
+        self.cache.invalidate("items")
+        self.assertIsNone(self.cache.set("items", b"old", 200, "application/json", ttl=60,
+                                         tags=("items",), generations=generations))
+        self.assertIsNone(self.cache.get("items"))
+        self.assertEqual(self.cache.stats()["stale_sets"], 1)
+
+        # A build that started after the write is stored
+        generations = self.cache.generations(("items",))
+        self.assertIsNotNone(self.cache.set("items", b"new", 200, "application/json", ttl=60,
+                                            tags=("items",), generations=generations))
+        self.assertEqual(self.cache.get("items").body, b"new")
+
+    def test_unrelated_invalidation_and_clear_during_build(self):
+        generations = self.cache.generations(("items",))
+        self.cache.invalidate("users")
+        self.assertIsNotNone(self.cache.set("a", b"1", 200, "application/json", ttl=60,
+                                            tags=("items",), generations=generations))
+
+        generations = self.cache.generations(("items",))
+        self.cache.clear()
+        self.assertIsNone(self.cache.set("a", b"1", 200, "application/json", ttl=60,
+                                         tags=("items",), generations=generations))
+
+
+if __name__ == "__main__":
+    unittest.main()
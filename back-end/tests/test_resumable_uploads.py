@@ -0,0 +1,90 @@
+"""
+Unit tests for utils.resumable_uploads (chunked uploads resumed at a server-reported offset).
+
+To run:
+python -m unittest tests.test_resumable_uploads
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import io
+import tempfile
+import time
+import unittest
+
+from utils.blob_store import BlobTooLarge
+from utils.resumable_uploads import ResumableUploads, UploadNotFound, UploadOffsetMismatch
+
+
+class TestResumableUploads(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = ResumableUploads(self.tmp.name, max_bytes=1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunks_then_take(self):
+        upload_id = self.uploads.create(10, {"item_id": 3})
+        self.assertEqual(self.uploads.append(upload_id, 0, io.BytesIO(b"01234"))["offset"], 5)
+        with self.assertRaises(UploadOffsetMismatch):
+            self.uploads.take(upload_id)  # not complete yet
+        self.uploads.append(upload_id, 5, io.BytesIO(b"56789"))
+
+        meta, path = self.uploads.take(upload_id)
+        self.assertEqual(meta["item_id"], 3)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"0123456789")
+        with self.assertRaises(UploadNotFound):
+            self.uploads.take(upload_id)  # only once
+
+    def test_wrong_offset_reports_the_current_one(self):
+        upload_id = self.uploads.create(10, {})
+        self.uploads.append(upload_id, 0, io.BytesIO(b"abc"))
+        with self.assertRaises(UploadOffsetMismatch) as ctx:
+            self.uploads.append(upload_id, 0, io.BytesIO(b"abc"))
+        self.assertEqual(ctx.exception.offset, 3)
+
+    def test_offset_survives_a_restart(self):
+        upload_id = self.uploads.create(10, {"item_id": 1})
+        self.uploads.append(upload_id, 0, io.BytesIO(b"abcd"))
+        restarted = ResumableUploads(self.tmp.name, max_bytes=1000)
+        self.assertEqual(restarted.get(upload_id)["offset"], 4)
+
+    def test_size_limits(self):
+        with self.assertRaises(BlobTooLarge):
+            self.uploads.create(1001, {})
+        upload_id = self.uploads.create(4, {})
+        with self.assertRaises(BlobTooLarge):
+            self.uploads.append(upload_id, 0, io.BytesIO(b"too long"))
+
+    def test_unknown_ids(self):
+        for upload_id in ("0" * 32, "../../etc/passwd"):
+            with self.assertRaises(UploadNotFound):
+                self.uploads.get(upload_id)
+
+    def test_sweep_removes_only_idle_sessions(self):
+        idle = self.uploads.create(10, {})
+        active = self.uploads.create(10, {})
+        past = time.time() - 7200
+        for upload_id in (idle, active):
+            for name in os.listdir(self.tmp.name):
+                if upload_id in name:
+                    os.utime(os.path.join(self.tmp.name, name), (past, past))
+        self.uploads.append(active, 0, io.BytesIO(b"x"))  # touches the .part
+
+        self.uploads.ttl = 3600
+        self.assertEqual(self.uploads.sweep(), 1)
+        with self.assertRaises(UploadNotFound):
+            self.uploads.get(idle)
+        self.assertEqual(self.uploads.get(active)["offset"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
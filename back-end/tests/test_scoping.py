@@ -0,0 +1,156 @@
+"""
+Route-level tests for organization scoping of authenticated callers, with the database mocked.
+
+To run:
+python -m unittest tests.test_scoping
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import io
+import unittest
+
+import jwt
+
+from tests.api_harness import RouteTestCase
+
+SECRET = "scoping-test-secret"
+# user_id -> organization_id; item_id -> creator; transaction_id -> seller; transaction_item_id -> transaction_id
+USERS = {3: 2, 4: 2, 7: 9}
+ITEMS = {1: 3, 5: 7}
+TRANSACTIONS = {1: 3, 6: 7}
+LINKS = {10: 1, 60: 6}
+
+
+class TestOrganizationScoping(RouteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.app.config["JWT_SECRET"] = SECRET
+        self.addCleanup(self.app.config.pop, "JWT_SECRET")
+        self.token = jwt.encode({"user_id": 3}, SECRET, algorithm="HS256")
+        self.client.set_cookie("auth_token", self.token)
+        self.addCleanup(USERS.update, dict(USERS))
+
+    def respond(self, sql, params, fetch_one=False, **kwargs):
+        if sql.startswith("UPDATE AppUser SET password = %s, email = %s, organization_id"):
+            USERS[params[-1]] = params[2]  # (password, email, organization_id, ..., user_id)
+            return None
+        if "SELECT u.organization_id" in sql and "FROM AppTransaction_Item" in sql:
+            transaction_id = LINKS.get(params[0])
+            return None if transaction_id is None else {"organization_id": USERS[TRANSACTIONS[transaction_id]]}
+        if "SELECT u.organization_id" in sql and "FROM AppTransaction" in sql:
+            seller = TRANSACTIONS.get(params[0])
+            return None if seller is None else {"organization_id": USERS[seller]}
+        if "SELECT u.organization_id" in sql:
+            creator = ITEMS.get(params[0])
+            return None if creator is None else {"organization_id": USERS[creator]}
+        if "FROM AppTransaction WHERE transaction_id" in sql:
+            return {"transaction_id": params[0], "sale_date": None, "total": "$5.00", "tax": "$0.00",
+                    "seller_comission": "$0.00", "seller_id": TRANSACTIONS[params[0]]}
+        if "FROM AppUser WHERE user_id" in sql:
+            user_id = params[0]
+            if user_id not in USERS:
+                return None
+            return {"user_id": user_id, "username": f"user{user_id}", "email": "u@example.com",
+                    "password": "hash", "organization_id": USERS[user_id], "organization_role": "member"}
+        if "FROM Item WHERE item_id" in sql:
+            return {"item_id": params[0], "title": "Lamp", "creator_id": ITEMS[params[0]]}
+        if "FROM Organization" in sql and fetch_one:
+            return {"organization_id": params[0], "name": "Org"}
+        if "FROM Organization" in sql:
+            return [{"organization_id": 2, "name": "Acme"}, {"organization_id": 9, "name": "Other"}]
+        if "FROM Item i" in sql:
+            return []
+        return super().respond(sql, params, fetch_one=fetch_one, **kwargs)
+
+    def test_own_organization_records_are_allowed(self):
+        for path in ("/organizations/2", "/users/4", "/items/1?fields=title", "/users/4/items?fields=title"):
+            self.assertEqual(self.client.get(path).status_code, 200, path)
+
+    def test_other_organization_records_are_forbidden(self):
+        for path in ("/organizations/9", "/organizations/9/users", "/users/7", "/users/7/items",
+                     "/items/5", "/item/5/images"):
+            self.assertEqual(self.client.get(path).status_code, 403, path)
+        self.assertEqual(self.client.delete("/items/5").status_code, 403)
+        self.assertEqual(self.client.put("/organizations/9", json={"name": "x"}).status_code, 403)
+
+    def test_missing_records_are_left_to_the_route(self):
+        self.assertEqual(self.client.get("/users/99").status_code, 404)
+
+    def test_lists_are_narrowed_to_the_callers_organization(self):
+        self.assertEqual(self.client.get("/organizations").get_json(), [{"organization_id": 2, "name": "Acme"}])
+
+        self.client.get("/items?fields=title")
+        sql, params = self.queries[-1]
+        self.assertIn("WHERE i.creator_id IN (SELECT user_id FROM AppUser WHERE organization_id = %s)", sql)
+        self.assertEqual(params, (2,))
+
+    def test_writes_cannot_target_another_organization(self):
+        resp = self.client.post("/items", json={"title": "Lamp", "creator_id": 7})
+        self.assertEqual(resp.status_code, 403)
+        resp = self.client.put("/users/3", json={"organization_id": 9})
+        self.assertEqual(resp.status_code, 403)
+        resp = self.client.post("/items/images", data={"item_id": "5", "file": (io.BytesIO(b"x"), "a.jpg")},
+                                content_type="multipart/form-data")
+        self.assertEqual(resp.status_code, 403)
+        self.assertFalse(any(sql.lstrip().startswith(("INSERT", "UPDATE")) for sql, _ in self.queries))
+
+    def test_other_organization_transactions_are_forbidden(self):
+        self.assertEqual(self.client.get("/transactions/1").status_code, 200)
+        self.assertEqual(self.client.get("/transactions/1/items").status_code, 200)
+        for method, path in (("get", "/transactions/6"), ("get", "/transactions/6/items"),
+                             ("put", "/transactions/6"), ("delete", "/transactions/6"),
+                             ("delete", "/transactions/unlink/60")):
+            resp = getattr(self.client, method)(path, json={})
+            self.assertEqual(resp.status_code, 403, f"{method} {path}")
+        self.assertFalse(any(sql.lstrip().startswith(("UPDATE", "DELETE")) for sql, _ in self.queries))
+
+    def test_transaction_writes_cannot_target_another_organization(self):
+        requests = (
+            ("post", "/transactions", {"sale_date": "2026-01-01", "reseller_id": 7}),
+            ("put", "/transactions/1", {"reseller_id": 7}),
+            ("post", "/transactions/link", {"item_id": 5, "transaction_id": 1}),
+            ("post", "/transactions/link", {"item_id": 1, "transaction_id": 6}),
+        )
+        for method, path, body in requests:
+            resp = getattr(self.client, method)(path, json=body)
+            self.assertEqual(resp.status_code, 403, f"{method} {path} {body}")
+        self.assertFalse(any(sql.lstrip().startswith(("INSERT", "UPDATE")) for sql, _ in self.queries))
+
+        resp = self.client.post("/transactions/link", json={"item_id": 1, "transaction_id": 1})
+        self.assertEqual(resp.status_code, 201)
+
+    def test_batch_subrequests_are_scoped(self):
+        resp = self.client.post("/batch", json={"requests": {"own": "/organizations/2", "other": "/items/5"}})
+        responses = resp.get_json()["responses"]
+        self.assertEqual((responses["own"]["status"], responses["other"]["status"]), (200, 403))
+
+    def test_moved_users_see_their_new_organization(self):
+        self.assertEqual(self.client.get("/organizations").get_json(), [{"organization_id": 2, "name": "Acme"}])
+        self.client.get("/items?fields=title")
+
+        # An unscoped (e.g. admin tooling) request moves user 3 to organization 9
+        self.client.delete_cookie("auth_token")
+        self.assertEqual(self.client.put("/users/3", json={"organization_id": 9}).status_code, 200)
+        self.client.set_cookie("auth_token", self.token)
+
+        self.assertEqual(self.client.get("/organizations").get_json(), [{"organization_id": 9, "name": "Other"}])
+        self.client.get("/items?fields=title")
+        sql, params = self.queries[-1]
+        self.assertIn("FROM Item i", sql)
+        self.assertEqual(params, (9,))
+
+    def test_anonymous_requests_are_not_scoped(self):
+        self.client.delete_cookie("auth_token")
+        self.assertEqual(self.client.get("/organizations/9").status_code, 200)
+        self.assertEqual(len(self.client.get("/organizations").get_json()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
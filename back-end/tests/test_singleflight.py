@@ -0,0 +1,114 @@
+"""
+Unit tests for utils.singleflight.
+
+To run:
+python -m unittest tests.test_singleflight
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import threading
+import unittest
+
+from utils import deadline
+from utils.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+
+    def _run_concurrently(self, key, fn, n=8):
+        """Starts n callers of flight.do(key, fn) and returns their (result, shared) tuples."""
+        results = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                out = self.flight.do(key, fn)
+                with lock:
+                    results.append(out)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(n)]
+        for t in threads:
+            t.start()
+        return threads, results, errors
+
+    def test_concurrent_calls_share_one_execution(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_query():
+            calls.append(1)
+            release.wait(2)
+            return b"[]"
+
+        threads, results, errors = self._run_concurrently("GET /items", slow_query)
+        # Let every follower attach before the leader finishes
+        while self.flight.stats()["shared"] < len(threads) - 1:
+            pass
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(errors, [])
+        self.assertTrue(all(result == b"[]" for result, _ in results))
+        self.assertEqual(sum(1 for _, shared in results if shared), len(threads) - 1)
+
+    def test_errors_propagate_to_followers(self):
+        release = threading.Event()
+
+        def failing_query():
+            release.wait(2)
+            raise RuntimeError("db down")
+
+        threads, results, errors = self._run_concurrently("k", failing_query, n=3)
+        while self.flight.stats()["shared"] < 2:
+            pass
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_follower_stops_waiting_for_a_stuck_leader(self):
+        self.flight = SingleFlight(max_wait=0.05)
+        release = threading.Event()
+        leader = threading.Thread(target=self.flight.do, args=("k", lambda: release.wait(5)))
+        leader.start()
+        while self.flight.in_flight() == 0:
+            pass
+
+        # No deadline: the follower runs the load itself once max_wait has passed
+        self.assertEqual(self.flight.do("k", lambda: "own"), ("own", False))
+
+        # Deadline: the follower gives up when the deadline passes
+        self.flight.max_wait = 5
+        with deadline.budget(0.05):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                self.flight.do("k", lambda: "own")
+        self.assertEqual(self.flight.stats()["wait_timeouts"], 2)
+
+        release.set()
+        leader.join()
+
+    def test_key_is_released_after_completion(self):
+        self.assertEqual(self.flight.do("k", lambda: 1), (1, False))
+        self.assertEqual(self.flight.do("k", lambda: 2), (2, False))
+        self.assertEqual(self.flight.stats()["executions"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Unit tests for sparse fieldsets (?fields=): APIRoutes._parse_fields, db.interface.projection()
+and their use by the item and user routes, with the database mocked.
+
+To run:
+python -m unittest tests.test_sparse_fieldsets
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import unittest
+
+from flask import Flask
+
+from db.interface import APP_USER_COLUMNS, ITEM_COLUMNS, projection
+from routes import APIRoutes
+from tests.api_harness import RouteTestCase, identifiers, render_sql
+
+
+class TestParseFields(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def _parse(self, query_string, allowed=ITEM_COLUMNS, primary_key="item_id"):
+        with self.app.test_request_context("/items", query_string=query_string):
+            fields, error = APIRoutes._parse_fields(allowed, primary_key)
+            if error is not None:
+                response, status = error
+                return fields, status, response.get_json()
+            return fields, None, None
+
+    def test_no_fieldset(self):
+        self.assertEqual(self._parse(""), (None, None, None))
+
+    def test_primary_key_is_always_first(self):
+        fields, status, _ = self._parse("fields=price, title,price")
+        self.assertIsNone(status)
+        self.assertEqual(fields, ("item_id", "price", "title"))
+        self.assertEqual(self._parse("fields=title,item_id")[0], ("item_id", "title"))
+
+    def test_unknown_fields_are_rejected(self):
+        fields, status, body = self._parse('fields=title,password,"title"')
+        self.assertIsNone(fields)
+        self.assertEqual(status, 400)
+        self.assertIn('password, "title"', body["error"])
+        self.assertEqual(body["allowed_fields"], list(ITEM_COLUMNS))
+
+        for query_string in ("fields=", "fields=,,"):
+            self.assertEqual(self._parse(query_string)[1], 400, query_string)
+
+    def test_password_is_not_a_user_field(self):
+        self.assertEqual(self._parse("fields=password", APP_USER_COLUMNS, "user_id")[1], 400)
+
+
+class TestProjection(unittest.TestCase):
+    def test_default(self):
+        self.assertEqual(render_sql(projection(None)), "*")
+        self.assertEqual(render_sql(projection((), default="i.*")), "i.*")
+
+    def test_columns_are_quoted_identifiers(self):
+        self.assertEqual(render_sql(projection(("item_id", "title"))), '"item_id", "title"')
+        self.assertEqual(render_sql(projection(("item_id",), alias="i")), '"i"."item_id"')
+
+    def test_names_cannot_escape_their_identifier(self):
+        composed = projection(('title" FROM AppUser; --',))
+        self.assertEqual(identifiers(composed), [('title" FROM AppUser; --',)])
+        self.assertEqual(render_sql(composed), '"title"" FROM AppUser; --"')
+
+
+class TestFieldsPushdown(RouteTestCase):
+    def respond(self, sql, params, fetch_one=False, **kwargs):
+        if "FROM Item WHERE" in sql:
+            return {"item_id": 1, "title": "Lamp", "price": "$10.00"}
+        if "FROM AppUser" in sql:
+            return {"user_id": 3, "email": "a@example.com"}
+        return super().respond(sql, params, fetch_one=fetch_one, **kwargs)
+
+    def test_item_fields_are_projected_in_sql(self):
+        resp = self.client.get("/items/1?fields=title,price")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json(), {"item_id": 1, "title": "Lamp", "price": 10.0})
+
+        (sql, params), = self.queries
+        self.assertEqual(sql, 'SELECT "item_id", "title", "price" FROM Item WHERE item_id = %s;')
+        self.assertEqual(params, (1,))
+
+    def test_unknown_field_is_rejected_before_querying(self):
+        resp = self.client.get("/items/1?fields=title,(SELECT password FROM AppUser)")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.queries, [])
+
+    def test_user_projection_stays_within_the_whitelist(self):
+        self.assertEqual(self.client.get("/users/3?fields=password").status_code, 400)
+
+        resp = self.client.get("/users/3")
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn("password", self.queries[-1][0])
+        resp = self.client.get("/users/3?fields=email")
+        self.assertEqual(resp.get_json(), {"user_id": 3, "email": "a@example.com"})
+        self.assertIn('"user_id", "email"', self.queries[-1][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for utils.startup, plus a cold-start budget check for the app.
+
+To run:
+python -m unittest tests.test_startup
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import itertools
+import subprocess
+import tempfile
+import unittest
+
+from utils.startup import ImportTimer, LazyClient, StartupReport, backoff_delays, wait_until
+
+# Seconds allowed for `import main` + create_app() in a fresh interpreter
+COLD_START_BUDGET = float(os.getenv("COLD_START_BUDGET", 3.0))
+
+
+class TestReadinessProbing(unittest.TestCase):
+    def test_backoff_grows_and_caps(self):
+        delays = list(itertools.islice(backoff_delays(initial=0.1, maximum=1.0, jitter=0), 6))
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1.0, 1.0])
+
+    def test_retries_until_probe_succeeds(self):
+        calls = []
+
+        def probe():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError("not yet")
+
+        attempts, _ = wait_until(probe, timeout=5, delays=itertools.repeat(0))
+        self.assertEqual(attempts, 3)
+
+    def test_times_out_with_last_error(self):
+        def probe():
+            raise ConnectionError("refused")
+
+        with self.assertRaises(TimeoutError) as ctx:
+            wait_until(probe, timeout=0.05, delays=itertools.repeat(0.01))
+        self.assertIsInstance(ctx.exception.__cause__, ConnectionError)
+
+
+class TestLazyClient(unittest.TestCase):
+    def test_builds_once_on_first_use(self):
+        built = []
+        client = LazyClient(lambda: built.append(1) or object(), "test")
+        self.assertFalse(client.initialized)
+        first = client.get()
+        self.assertIs(client.get(), first)
+        self.assertEqual(len(built), 1)
+
+    def test_failure_is_remembered(self):
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            raise RuntimeError("no credentials")
+
+        client = LazyClient(factory, "test", retry_after=60)
+        self.assertIsNone(client.get())
+        self.assertIsNone(client.get())
+        self.assertEqual(len(attempts), 1)
+
+        client.retry_after = 0
+        client.get()
+        self.assertEqual(len(attempts), 2)
+
+
+class TestStartupReport(unittest.TestCase):
+    def test_phases_and_import_timing(self):
+        report = StartupReport()
+        report.import_timer = ImportTimer().start()
+        try:
+            with report.phase("imports"):
+                import email.mime.multipart  # noqa: F401  (any not-yet-imported stdlib package)
+        finally:
+            report.import_timer.stop()
+
+        out = report.as_dict()
+        self.assertIn("imports", out["phases"])
+        self.assertIn("slowest_imports", out)
+
+
+class TestColdStart(unittest.TestCase):
+    def test_app_builds_without_database_within_budget(self):
+        """
+        Importing the app and building it must not touch the database or the
+        marketplaces (the DB here is unreachable) and must stay under the budget.
+        It runs in a temporary directory, so the upload and image cache directories
+        create_app() makes (relative to the cwd) stay out of the checkout, with the
+        upload garbage collector disabled.
+        """
+        script = (
+            "import time; t = time.perf_counter(); import main; main.create_app(); "
+            "print(time.perf_counter() - t)"
+        )
+        env = dict(
+            os.environ, DB_HOST="127.0.0.1", DB_PORT="1", TRACING_EXPORTER="none", UPLOAD_GC_INTERVAL="0",
+            PYTHONPATH=os.pathsep.join(filter(None, (PROJECT_ROOT, os.environ.get("PYTHONPATH")))),
+        )
+        with tempfile.TemporaryDirectory() as cwd:
+            result = subprocess.run(
+                [sys.executable, "-c", script], cwd=cwd, env=env,
+                capture_output=True, text=True, timeout=60,
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        elapsed = float(result.stdout.strip().splitlines()[-1])
+        self.assertLess(elapsed, COLD_START_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
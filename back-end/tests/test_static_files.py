@@ -0,0 +1,129 @@
+"""
+Unit tests for utils.static_files (immutable caching, content ETags, Range, sendfile offload).
+
+To run:
+python -m unittest tests.test_static_files
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import hashlib
+import tempfile
+import unittest
+
+from flask import Flask, request
+
+from utils.static_files import StaticFiles
+
+
+class Client:
+    """Test client whose responses are read and closed at once, as a WSGI server would."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, *args, **kwargs):
+        resp = self.client.get(*args, **kwargs)
+        resp.get_data()
+        resp.close()
+        return resp
+
+
+class TestStaticFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.body = bytes(range(256)) * 40
+        self.path = os.path.join(self.tmp.name, "item.jpg")
+        with open(self.path, "wb") as f:
+            f.write(self.body)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _client(self, files):
+        app = Flask(__name__)
+
+        @app.route("/file")
+        def send():
+            return files.send(self.path, immutable=request.args.get("immutable") != "0")
+
+        return Client(app.test_client())
+
+    def test_immutable_caching_and_content_etag(self):
+        resp = self._client(StaticFiles(max_age=600)).get("/file")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, self.body)
+        self.assertEqual(resp.mimetype, "image/jpeg")
+        self.assertEqual(resp.headers["Cache-Control"], "public, max-age=600, immutable")
+        self.assertEqual(resp.headers["ETag"], f'"{hashlib.sha1(self.body).hexdigest()}"')
+        self.assertEqual(resp.headers["Accept-Ranges"], "bytes")
+
+    def test_mutable_responses_must_revalidate(self):
+        resp = self._client(StaticFiles()).get("/file?immutable=0")
+        self.assertEqual(resp.headers["Cache-Control"], "no-cache, public")
+
+    def test_not_modified(self):
+        files = StaticFiles()
+        client = self._client(files)
+        etag = client.get("/file").headers["ETag"]
+        resp = client.get("/file", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.data, b"")
+        self.assertIn("immutable", resp.headers["Cache-Control"])
+        self.assertEqual(files.stats()["not_modified"], 1)
+        self.assertEqual(files.stats()["etag_hit_ratio"], 0.5)  # hashed once
+
+    def test_range(self):
+        client = self._client(StaticFiles())
+        resp = client.get("/file", headers={"Range": "bytes=100-199"})
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.data, self.body[100:200])
+        self.assertEqual(resp.headers["Content-Range"], f"bytes 100-199/{len(self.body)}")
+        self.assertEqual(client.get("/file", headers={"Range": "bytes=99999-"}).status_code, 416)
+
+    def test_etag_follows_content_changes(self):
+        files = StaticFiles()
+        client = self._client(files)
+        before = client.get("/file").headers["ETag"]
+        with open(self.path, "wb") as f:
+            f.write(b"changed")
+        os.utime(self.path, ns=(0, 0))
+        self.assertNotEqual(client.get("/file").headers["ETag"], before)
+
+    def test_x_sendfile(self):
+        files = StaticFiles(sendfile="x-sendfile")
+        resp = self._client(files).get("/file")
+        self.assertEqual(resp.headers["X-Sendfile"], self.path)
+        self.assertEqual(resp.data, b"")
+        self.assertIn("immutable", resp.headers["Cache-Control"])
+        self.assertEqual(files.stats()["offloaded"], 1)
+
+    def test_x_accel_redirect(self):
+        files = StaticFiles(sendfile="x-accel-redirect", accel_prefix="/_files/", accel_root=self.tmp.name)
+        client = self._client(files)
+        resp = client.get("/file")
+        self.assertEqual(resp.headers["X-Accel-Redirect"], "/_files/item.jpg")
+        self.assertEqual(resp.data, b"")
+        self.assertEqual(resp.mimetype, "image/jpeg")
+        resp = client.get("/file", headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(resp.status_code, 304)
+
+    def test_x_accel_redirect_outside_root_is_streamed(self):
+        files = StaticFiles(sendfile="x-accel-redirect", accel_root=os.path.join(self.tmp.name, "elsewhere"))
+        resp = self._client(files).get("/file")
+        self.assertNotIn("X-Accel-Redirect", resp.headers)
+        self.assertEqual(resp.data, self.body)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            StaticFiles(sendfile="nginx")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for utils.structured_logging.
+
+To run:
+python -m unittest tests.test_structured_logging
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import io
+import json
+import logging
+import queue
+import unittest
+
+from utils.structured_logging import (
+    ContextFilter,
+    DroppingQueueHandler,
+    JsonFormatter,
+    configure_logging,
+    logging_stats,
+    parse_sample_rates,
+    reset_request_id,
+    set_request_id,
+    shutdown_logging,
+)
+from utils.tracing import Tracer
+
+
+def _record(msg="hello %s", args=("world",), level=logging.INFO, **extra):
+    record = logging.LogRecord("routes", level, __file__, 1, msg, args, None, func="login")
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestJsonFormatter(unittest.TestCase):
+    def test_fields_and_extras(self):
+        line = JsonFormatter().format(_record(status=429, request_id="r1", trace_id=None))
+        out = json.loads(line)
+        self.assertEqual(out["msg"], "hello world")
+        self.assertEqual(out["level"], "INFO")
+        self.assertEqual(out["logger"], "routes")
+        self.assertEqual(out["func"], "login")
+        self.assertEqual(out["status"], 429)
+        self.assertEqual(out["request_id"], "r1")
+        self.assertNotIn("trace_id", out)  # None values are omitted
+
+
+class TestContextFilter(unittest.TestCase):
+    def test_stamps_request_and_trace_ids(self):
+        token = set_request_id("req-1")
+        try:
+            with Tracer(exporter=type("E", (), {"export": lambda self, s: None})()).span("GET /items") as span:
+                record = _record()
+                self.assertTrue(ContextFilter().filter(record))
+        finally:
+            reset_request_id(token)
+        self.assertEqual(record.request_id, "req-1")
+        self.assertEqual(record.trace_id, span.trace_id)
+
+    def test_samples_only_hot_records(self):
+        context_filter = ContextFilter(parse_sample_rates("INFO=0"))
+        self.assertFalse(context_filter.filter(_record(hot=True)))
+        self.assertTrue(context_filter.filter(_record()))
+        self.assertTrue(context_filter.filter(_record(level=logging.ERROR, hot=True)))
+        self.assertEqual(context_filter.sampled_out, 1)
+
+    def test_parse_sample_rates(self):
+        self.assertEqual(parse_sample_rates("DEBUG=0.01, info=2,bogus=1"),
+                         {logging.DEBUG: 0.01, logging.INFO: 1.0})
+
+
+class TestDroppingQueueHandler(unittest.TestCase):
+    def test_counts_drops_instead_of_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        for _ in range(5):
+            handler.handle(_record())
+        self.assertEqual(handler.enqueued, 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_prepare_resolves_message_and_traceback(self):
+        handler = DroppingQueueHandler(queue.Queue())
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = _record(level=logging.ERROR)
+            record.exc_info = sys.exc_info()
+        prepared = handler.prepare(record)
+        self.assertEqual(prepared.msg, "hello world")
+        self.assertIsNone(prepared.args)
+        self.assertIsNone(prepared.exc_info)
+        self.assertIn("ValueError: boom", prepared.exc_text)
+
+
+class TestConfigureLogging(unittest.TestCase):
+    def test_background_writer_emits_json_lines(self):
+        stream = io.StringIO()
+        root = logging.getLogger()
+        saved_handlers, saved_level = list(root.handlers), root.level
+        configure_logging(stream=stream)
+        try:
+            logging.getLogger("db.interface").error("Unable to borrow connection", extra={"error": "timeout"})
+            self.assertTrue(logging_stats()["configured"])
+        finally:
+            shutdown_logging()  # waits for the writer thread to drain the queue
+            for handler in saved_handlers:
+                root.addHandler(handler)
+            root.setLevel(saved_level)
+
+        out = json.loads(stream.getvalue().splitlines()[-1])
+        self.assertEqual(out["msg"], "Unable to borrow connection")
+        self.assertEqual(out["error"], "timeout")
+        self.assertEqual(logging_stats(), {"configured": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for utils.tracing.
+
+To run:
+python -m unittest tests.test_tracing
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import json
+import tempfile
+import unittest
+
+from utils.tracing import (
+    NOOP_SPAN,
+    SPAN_KIND_CLIENT,
+    SPAN_KIND_SERVER,
+    FileExporter,
+    OTLPExporter,
+    Tracer,
+    format_traceparent,
+    parse_traceparent,
+)
+
+
+class _ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_tracer_returns_noop(self):
+        tracer = Tracer(None)
+        with tracer.span("db.query") as span:
+            span.set_attribute("db.statement", "SELECT 1")
+        self.assertIs(span, NOOP_SPAN)
+        self.assertIsNone(tracer.current_span())
+
+    def test_spans_nest_and_restore_parent(self):
+        exporter = _ListExporter()
+        tracer = Tracer(exporter)
+
+        with tracer.span("GET /items") as root:
+            with tracer.span("db.pool.checkout"):
+                pass
+            with tracer.span("db.query") as query:
+                self.assertIs(tracer.current_span(), query)
+            self.assertIs(tracer.current_span(), root)
+        self.assertIsNone(tracer.current_span())
+
+        names = [s.name for s in exporter.spans]
+        self.assertEqual(names, ["db.pool.checkout", "db.query", "GET /items"])
+        self.assertTrue(all(s.trace_id == root.trace_id for s in exporter.spans))
+        self.assertEqual(exporter.spans[1].parent_id, root.span_id)
+        self.assertIsNone(root.parent_id)
+
+    def test_error_is_recorded(self):
+        exporter = _ListExporter()
+        tracer = Tracer(exporter)
+        with self.assertRaises(ValueError):
+            with tracer.span("ebay.request"):
+                raise ValueError("boom")
+        self.assertEqual(exporter.spans[0].error, "ValueError: boom")
+
+    def test_continues_incoming_trace(self):
+        tracer = Tracer(_ListExporter())
+        header = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        with tracer.span("GET /items", traceparent=header) as span:
+            self.assertEqual(span.trace_id, "0af7651916cd43dd8448eb211c80319c")
+            self.assertEqual(span.parent_id, "b7ad6b7169203331")
+            self.assertEqual(parse_traceparent(format_traceparent(span)), (span.trace_id, span.span_id))
+        self.assertEqual(parse_traceparent("garbage"), (None, None))
+
+
+class TestFileExporter(unittest.TestCase):
+    def test_writes_json_lines_and_counts_drops(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            exporter = FileExporter(path, max_queue=2)
+            exporter._thread = object()  # keep the background writer from racing the assertions
+            tracer = Tracer(exporter)
+
+            for name in ("a", "b", "c"):
+                with tracer.span(name, **{"http.method": "GET"}):
+                    pass
+            exporter.flush()
+
+            with open(path) as f:
+                spans = [json.loads(line) for line in f]
+            self.assertEqual([s["name"] for s in spans], ["a", "b"])
+            self.assertEqual(spans[0]["attributes"], {"http.method": "GET"})
+            self.assertEqual(exporter.stats()["dropped"], 1)
+            self.assertEqual(exporter.stats()["exported"], 2)
+
+
+
+class TestOTLPExporter(unittest.TestCase):
+    def test_span_kinds(self):
+        exporter = _ListExporter()
+        tracer = Tracer(exporter)
+        header = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        # A request span continuing a caller's trace has a parent but is still SERVER
+        with tracer.span("GET /items", traceparent=header, kind=SPAN_KIND_SERVER):
+            with tracer.span("db.query", kind=SPAN_KIND_CLIENT):
+                pass
+            with tracer.span("batch.subrequest"):
+                pass
+
+        otlp = OTLPExporter("http://localhost:4318/v1/traces")
+        kinds = {span.name: otlp._span(span)["kind"] for span in exporter.spans}
+        self.assertEqual(kinds, {"GET /items": 2, "db.query": 3, "batch.subrequest": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
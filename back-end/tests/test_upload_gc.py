@@ -0,0 +1,161 @@
+"""
+Unit tests for utils.upload_gc (orphaned upload collection and storage accounting).
+
+To run:
+python -m unittest tests.test_upload_gc
+"""
+import os
+import sys
+
+# Ensure project root (back-end/) is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))      # .../back-end/tests
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                   # .../back-end
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import tempfile
+import time
+import unittest
+
+from utils.blob_store import STAGING_DIR, BlobStore
+from utils.upload_gc import QUARANTINE_DIR, UploadGC, reference_key, scan_uploads
+
+DIGEST_A = "a" * 64
+DIGEST_B = "b" * 64
+OLD = time.time() - 7 * 24 * 3600
+
+
+class TestUploadGC(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.blobs = BlobStore(self.root)
+        self.refs = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _file(self, relpath, size=10, mtime=OLD):
+        path = os.path.join(self.root, *relpath.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _gc(self, mode="quarantine", blob_referenced=None, **kwargs):
+        return UploadGC(
+            self.root, lambda: iter(sorted(self.refs, key=lambda r: (r[0], r[1] or 0))),
+            blobs=self.blobs, blob_referenced=blob_referenced or (lambda digest: 0),
+            grace=3600, mode=mode, interval=0, **kwargs
+        )
+
+    def _exists(self, relpath):
+        return os.path.exists(os.path.join(self.root, *relpath.split("/")))
+
+    def test_scan_is_sorted_by_reference_key_across_directories(self):
+        for relpath in ("item_2.jpg", "item_10.jpg", "item_10.thumb.jpg", "item_10.jpg.webp",
+                        f"aa/aa/{DIGEST_A}.jpg", f"aa/aa/{DIGEST_A}.jpg.avif", "aa.jpg", "ab.png"):
+            self._file(relpath)
+        self._file(f"{STAGING_DIR}/{'0' * 32}")
+        keys = [f.key for f in scan_uploads(self.root)]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(keys.count("item_10.jpg"), 2)  # the original and its variant
+        self.assertEqual(len(keys), 8)
+
+    def test_variant_keys(self):
+        self.assertEqual(reference_key("ab/cd/x.thumb.jpg.webp"), "ab/cd/x.thumb.jpg")
+        self.assertEqual(reference_key("x.png.avif"), "x.png")
+        self.assertEqual(reference_key("x.gif.webp"), "x.gif.webp")  # GIFs get no variants
+        self.assertEqual(reference_key("x.jpg"), "x.jpg")
+
+    def test_orphans_are_quarantined_after_the_grace_period(self):
+        self._file("item_1.jpg")
+        self._file("item_1.jpg.webp")
+        self._file("item_1.thumb.jpg")
+        self._file("deleted.jpg")
+        self._file("deleted.jpg.avif")
+        self._file("uploading.jpg", mtime=time.time())
+        self.refs = [("item_1.jpg", 1), ("item_1.thumb.jpg", 1), ("gone.jpg", 1)]
+
+        report = self._gc().run()
+        self.assertEqual((report["orphans"], report["quarantined"], report["orphans_in_grace"]), (2, 2, 1))
+        self.assertEqual(report["missing_files"], 1)
+        for relpath in ("item_1.jpg", "item_1.jpg.webp", "item_1.thumb.jpg", "uploading.jpg"):
+            self.assertTrue(self._exists(relpath), relpath)
+        self.assertFalse(self._exists("deleted.jpg"))
+        self.assertTrue(self._exists(f"{QUARANTINE_DIR}/deleted.jpg.avif"))
+
+    def test_usage_per_organization(self):
+        self._file(f"aa/aa/{DIGEST_A}.jpg", size=100)
+        self._file(f"aa/aa/{DIGEST_A}.thumb.jpg", size=10)
+        self._file("item_1.jpg", size=50)
+        # Blob A is used by items of organizations 1 and 2
+        self.refs = [(f"aa/aa/{DIGEST_A}.jpg", 1), (f"aa/aa/{DIGEST_A}.jpg", 2),
+                     (f"aa/aa/{DIGEST_A}.thumb.jpg", 1), (f"aa/aa/{DIGEST_A}.thumb.jpg", 2),
+                     ("item_1.jpg", 1), ("item_1.jpg", None)]
+        gc = self._gc()
+        self.assertIsNone(gc.usage(1))
+        report = gc.run()
+        self.assertEqual(report["referenced_bytes"], 160)
+        self.assertEqual(gc.usage(1)["bytes"], 160)
+        self.assertEqual(gc.usage(2)["bytes"], 110)
+        self.assertEqual(gc.usage(None)["files"], 1)
+        self.assertEqual(gc.usage(99)["bytes"], 0)
+
+    def test_blob_referenced_again_is_kept(self):
+        self._file(f"aa/aa/{DIGEST_A}.jpg")
+        self._file(f"aa/aa/{DIGEST_A}.thumb.jpg")
+        self._file(f"bb/bb/{DIGEST_B}.jpg")
+        checked = []
+
+        def count(digest):
+            checked.append(digest)
+            return {DIGEST_A: 1, DIGEST_B: None}[digest]  # A just re-uploaded, B unknown (DB error)
+
+        report = self._gc(mode="delete", blob_referenced=count).run()
+        self.assertEqual(report["removed"], 0)
+        self.assertEqual(checked, [DIGEST_A, DIGEST_B])  # once per blob, not per file
+        self.assertTrue(self._exists(f"aa/aa/{DIGEST_A}.thumb.jpg"))
+
+    def test_delete_mode(self):
+        self._file(f"aa/aa/{DIGEST_A}.jpg")
+        self._file(f"aa/aa/{DIGEST_A}.jpg.webp")
+        report = self._gc(mode="delete").run()
+        self.assertEqual(report["removed"], 2)
+        self.assertFalse(os.path.exists(os.path.join(self.root, QUARANTINE_DIR)))
+
+    def test_report_mode_changes_nothing(self):
+        self._file("orphan.jpg")
+        staged = self._file(f"{STAGING_DIR}/{'0' * 32}")
+        report = self._gc(mode="report").run()
+        self.assertEqual((report["orphans"], report["removed"], report["quarantined"]), (1, 0, 0))
+        self.assertTrue(self._exists("orphan.jpg"))
+        self.assertTrue(os.path.exists(staged))
+
+    def test_quarantine_is_purged_after_its_ttl(self):
+        self._file("orphan.jpg")
+        gc = self._gc(quarantine_ttl=60)
+        gc.run()
+        quarantined = os.path.join(self.root, QUARANTINE_DIR, "orphan.jpg")
+        self.assertTrue(os.path.exists(quarantined))
+        os.utime(quarantined, (OLD, OLD))
+        self.assertEqual(gc.run()["purged"], 1)
+        self.assertFalse(os.path.exists(quarantined))
+
+    def test_stale_staging_files_are_removed(self):
+        stale = self._file(f"{STAGING_DIR}/{'0' * 32}")
+        fresh = self._file(f"{STAGING_DIR}/{'1' * 32}", mtime=time.time())
+        session = self._file(f"{STAGING_DIR}/upload-{'2' * 32}.part")
+        self.assertEqual(self._gc().run()["staging_removed"], 1)
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertTrue(os.path.exists(session))  # resumable sessions expire on their own
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            self._gc(mode="shred")
+
+
+if __name__ == "__main__":
+    unittest.main()
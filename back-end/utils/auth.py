@@ -0,0 +1,151 @@
+# auth.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import jwt
+
+
+class TokenVerifier:
+    """
+    Verifies JWTs and remembers the result.
+
+    Verified claims are kept in a bounded LRU keyed by the SHA-256 digest of the
+    token (the raw token is never stored) until the token's own `exp`, so repeat
+    requests with the same cookie skip signature verification entirely.
+    Invalid tokens are never cached.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def verify(self, token: str, secret: str, algorithm: str = "HS256") -> dict:
+        """
+        Returns the token's claims. `secret`/`algorithm` come from the app config
+        (JWT_SECRET / JWT_ALGORITHM).
+        Raises: jwt.InvalidTokenError if the token is malformed, forged or expired.
+        """
+        key = self.digest(token)
+        now = time.time()
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                claims, expires_at = cached
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+            self.misses += 1
+
+        claims = jwt.decode(token, secret, algorithms=[algorithm])
+        expires_at = claims.get("exp")
+        if expires_at is None:
+            # Tokens without an expiry are accepted but not cached
+            return claims
+
+        with self._lock:
+            self._entries[key] = (claims, float(expires_at))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return claims
+
+    def forget(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(self.digest(token), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class PrincipalCache:
+    """
+    Short-TTL cache of user_id -> principal (the caller's identity, organization and role).
+
+    `loader(user_id)` is called on a miss and should return a dict or None for an
+    unknown user. Misses for unknown users are cached too, so a deleted user's
+    still-valid token can't be used to hammer the database.
+    """
+
+    def __init__(self, loader: Callable[[int], Optional[dict]], ttl: float = 30.0, max_entries: int = 4096):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is not None and cached[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        principal = self.loader(user_id)
+
+        with self._lock:
+            self._entries[user_id] = (principal, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return principal
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drops one user's principal (after a role/org change) or every principal."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+def token_from_request(request) -> Optional[str]:
+    """Reads the JWT from the auth_token cookie, falling back to an Authorization: Bearer header."""
+    token = request.cookies.get("auth_token")
+    if token:
+        return token
+    header = request.headers.get("Authorization", "")
+    if header.lower().startswith("bearer "):
+        return header[7:].strip() or None
+    return None
@@ -0,0 +1,183 @@
+# blob_store.py
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from contextlib import ExitStack, contextmanager
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional
+
+from utils import deadline
+
+logger = logging.getLogger(__name__)
+
+# Blobs live at <root>/<ab>/<cd>/<sha256><ext>: two levels of 256 directories keep each
+# directory small however many files are stored.
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+# Uploads are written here first, on the same filesystem as the blobs so committing is a link.
+# Dot-prefixed: never served (see send_upload in main.py).
+STAGING_DIR = ".staging"
+CHUNK_SIZE = 64 * 1024
+# Bytes kept from the start of each staged file, for type sniffing
+HEAD_SIZE = 32
+# Per-digest locks are striped over this many locks
+LOCK_STRIPES = 64
+
+
+class BlobTooLarge(Exception):
+    """Raised when a stream is longer than the size limit it is staged with; callers answer 413."""
+    pass
+
+
+class Staged(NamedTuple):
+    """An upload written to the staging directory, not yet a blob."""
+    path: str
+    digest: str  # sha256 hex
+    size: int
+    head: bytes  # first HEAD_SIZE bytes
+
+
+class Blob(NamedTuple):
+    digest: str
+    relpath: str   # relative to the store root, with "/" separators: also the URL suffix
+    size: int
+    created: bool  # False when an identical blob was already stored
+
+
+def shard_relpath(digest: str, ext: str) -> str:
+    """'9f86d0...', '.jpg' -> '9f/86/9f86d0....jpg'"""
+    shards = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return "/".join(shards + [digest + ext])
+
+
+class BlobStore:
+    """
+    Content-addressed file store: a file's name is the SHA-256 of its bytes, so storing
+    the same bytes twice keeps one copy.
+
+    Storing is two steps. stage() streams an upload to disk, hashing it on the way, and
+    commit() moves it into its shard directory (or discards it when the blob exists).
+    Between the two the caller holds lock(digest) while it records the reference, and
+    remove() is only called under the same lock after counting references, so a blob
+    cannot be deleted while a duplicate upload is being attached to it.
+
+    Reference counts are not stored here: they are the rows pointing at a blob (for
+    images, ItemImage.content_hash). The locks are per process, like the server.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.staging_dir = os.path.join(root, STAGING_DIR)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.stored = 0
+        self.deduplicated = 0
+        self.removed = 0
+
+    def path(self, relpath: str) -> str:
+        return os.path.join(self.root, *relpath.split("/"))
+
+    def _stripe(self, digest: str) -> int:
+        return int(digest[:8], 16) % LOCK_STRIPES
+
+    @contextmanager
+    def lock(self, digest: str) -> Iterator[None]:
+        with self._locks[self._stripe(digest)]:
+            yield
+
+    @contextmanager
+    def lock_many(self, digests) -> Iterator[None]:
+        """lock() for several digests at once, e.g. a batch upload (stripes taken in order, so no deadlock)."""
+        with ExitStack() as stack:
+            for stripe in sorted({self._stripe(digest) for digest in digests}):
+                stack.enter_context(self._locks[stripe])
+            yield
+
+    def stage(self, stream: BinaryIO, max_bytes: Optional[int] = None) -> Staged:
+        """
+        Copies `stream` to a staging file in CHUNK_SIZE pieces, hashing as it goes, so
+        the upload is never held in memory. Raises BlobTooLarge past `max_bytes`, and
+        DeadlineExceeded once the request's time budget runs out (e.g. a stalled client);
+        either way the staging file is removed.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        path = os.path.join(self.staging_dir, uuid.uuid4().hex)
+        try:
+            with open(path, "wb") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise BlobTooLarge(f"Upload exceeds {max_bytes} bytes")
+                    deadline.check()
+                    if len(head) < HEAD_SIZE:
+                        head += chunk[:HEAD_SIZE - len(head)]
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            self.discard(path)
+            raise
+        return Staged(path, digest.hexdigest(), size, head)
+
+    def stage_file(self, path: str) -> Staged:
+        """Hashes a file already written inside the staging directory (e.g. a completed resumable upload)."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            head = f.read(HEAD_SIZE)
+            f.seek(0)
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        return Staged(path, digest.hexdigest(), size, head)
+
+    def commit(self, staged: Staged, ext: str) -> Blob:
+        """Moves a staged file into the store. Call under lock(staged.digest)."""
+        relpath = shard_relpath(staged.digest, ext)
+        dest = self.path(relpath)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            os.link(staged.path, dest)  # fails if the blob exists, unlike rename
+            created = True
+            self.stored += 1
+        except FileExistsError:
+            created = False
+            self.deduplicated += 1
+        finally:
+            self.discard(staged.path)
+        return Blob(staged.digest, relpath, staged.size, created)
+
+    def discard(self, staged_path: str) -> None:
+        try:
+            os.remove(staged_path)
+        except FileNotFoundError:
+            pass
+
+    def remove(self, digest: str) -> List[str]:
+        """
+        Deletes a blob and every file derived from it next to it (renditions, variants),
+        i.e. every file in its shard directory named <digest>.*. Call under lock(digest),
+        once nothing references it. Returns the names removed.
+        """
+        directory = os.path.dirname(self.path(shard_relpath(digest, "")))
+        removed = []
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return removed
+        for name in names:
+            if name.startswith(digest + "."):
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed.append(name)
+                except OSError as e:
+                    logger.warning("Unable to remove blob file", extra={"file": name, "error": str(e)})
+        if removed:
+            self.removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        return {"stored": self.stored, "deduplicated": self.deduplicated, "removed": self.removed}
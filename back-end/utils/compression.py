@@ -0,0 +1,164 @@
+# compression.py
+
+import gzip
+import os
+import zlib
+from typing import Iterable, Iterator, List, Optional
+
+# brotli and zstandard are optional; gzip (zlib) is always available
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+
+# Responses smaller than this are sent uncompressed (headers + framing would eat the savings)
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+
+# Only text-like payloads are worth compressing; JPEG/PNG/GIF are already compressed
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+# Levels for responses compressed on every request vs. once per cache entry
+DYNAMIC_LEVELS = {"br": 4, "zstd": 3, "gzip": 5}
+CACHED_LEVELS = {"br": 9, "zstd": 10, "gzip": 9}
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, in server preference order."""
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Picks the best encoding for an Accept-Encoding header value, or None for identity.
+    Highest q-value wins; ties go to the server preference order (br, zstd, gzip).
+    """
+    if not accept_encoding:
+        return None
+
+    offered = {}
+    for part in accept_encoding.split(","):
+        fields = part.strip().split(";")
+        coding = fields[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        offered[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in available_encodings():
+        q = offered.get(coding, offered.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, levels: dict = DYNAMIC_LEVELS) -> bytes:
+    """One-shot compression of a complete body."""
+    if encoding == "br":
+        return brotli.compress(data, quality=levels["br"])
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=levels["zstd"]).compress(data)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=levels["gzip"], mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, levels: dict = DYNAMIC_LEVELS) -> Iterator[bytes]:
+    """
+    Incrementally compresses an iterable of chunks, yielding compressed output as it
+    becomes available so streamed responses never have to be buffered whole.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=levels["br"])
+        feed, finish = compressor.process, compressor.finish
+    elif encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=levels["zstd"]).compressobj()
+        feed, finish = compressor.compress, compressor.flush
+    elif encoding == "gzip":
+        compressor = zlib.compressobj(levels["gzip"], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        feed, finish = compressor.compress, compressor.flush
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        out = feed(chunk)
+        if out:
+            yield out
+    tail = finish()
+    if tail:
+        yield tail
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def register_compression(app) -> None:
+    """
+    Adds an after_request hook to `app` that compresses compressible responses
+    according to the client's Accept-Encoding. Responses that already carry a
+    Content-Encoding (e.g. precompressed cache variants) are left untouched.
+    """
+    from flask import request
+
+    @app.after_request
+    def compress_response(response):
+        if not is_compressible(response.mimetype):
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or request.method == "HEAD"
+        ):
+            return response
+
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+
+        if response.is_streamed or response.direct_passthrough:
+            # Size is unknown up front; compress chunk by chunk
+            response.direct_passthrough = False
+            response.response = compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < MIN_SIZE:
+                return response
+            response.set_data(compress(data, encoding))
+
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,144 @@
+# deadline.py
+
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Absolute time.monotonic() by which the current request must be done, or None
+_deadline: contextvars.ContextVar = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current request's time budget has run out (answered with 504)."""
+    pass
+
+
+def start(seconds: float):
+    """
+    Gives the current context `seconds` to finish, or less if an outer deadline is
+    sooner. Returns a token for reset().
+    """
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    return _deadline.set(at if outer is None else min(at, outer))
+
+
+def reset(token) -> None:
+    _deadline.reset(token)
+
+
+@contextmanager
+def budget(seconds: float):
+    token = start(seconds)
+    try:
+        yield
+    finally:
+        reset(token)
+
+
+def expires_at() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left (may be negative), or None when no deadline applies."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check(what: str = "request") -> None:
+    """Raises: DeadlineExceeded if the deadline has passed."""
+    if expired():
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+def timeout(default: float, what: str = "request") -> float:
+    """
+    The timeout to use for a blocking call: `default`, capped at the time left.
+    Raises: DeadlineExceeded if no time is left.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    return min(default, left)
+
+
+class CancelWatchdog:
+    """
+    One background thread that calls a cancel function for every watched operation
+    still running at its deadline (e.g. psycopg2's conn.cancel() for a query the
+    server-side statement_timeout did not stop, such as one stuck on the network).
+
+    watch()/unwatch() are a heap push and a flag flip; the thread starts on first use.
+    Cancellation and unwatch() hold the entry's lock, so a cancel never lands after
+    unwatch() returned (i.e. on a connection that went back to the pool).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.cancelled = 0
+
+    def watch(self, at: float, cancel: Callable[[], None]) -> list:
+        """Returns a handle for unwatch(). `at` is a time.monotonic() value."""
+        entry = [at, next(self._seq), cancel, threading.Lock(), True]
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="deadline-watchdog", daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                self._cond.notify()
+        return entry
+
+    @staticmethod
+    def unwatch(entry: list) -> None:
+        with entry[3]:
+            entry[4] = False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    # Drop finished entries from the top so the heap doesn't grow with them
+                    while self._heap and not self._heap[0][4]:
+                        heapq.heappop(self._heap)
+                    wait = self._heap[0][0] - time.monotonic() if self._heap else None
+                    if wait is not None and wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                entry = heapq.heappop(self._heap)
+
+            with entry[3]:
+                if not entry[4]:
+                    continue
+                entry[4] = False
+                try:
+                    entry[2]()
+                    self.cancelled += 1
+                except Exception as e:
+                    logger.warning("Unable to cancel operation past its deadline", extra={"error": str(e)})
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"watched": sum(1 for e in self._heap if e[4]), "cancelled": self.cancelled}
+
+
+# Process-wide watchdog for DB queries running under a deadline
+watchdog = CancelWatchdog()
@@ -9,6 +9,9 @@ from typing import Any, Dict, Optional
 
 import requests
 
+from utils.http_client import send
+from utils.tracing import SPAN_KIND_CLIENT, tracer
+
 
 class EbayAPIError(Exception):
     """Generic exception for eBay API errors."""
@@ -83,7 +86,9 @@ class EbayInterface:
             "scope": self.scope,
         }
 
-        resp = self.session.post(self.oauth_url, headers=headers, data=data, timeout=30)
+        with tracer.span("ebay.oauth.token", kind=SPAN_KIND_CLIENT, **{"http.method": "POST", "http.url": self.oauth_url}) as span:
+            resp = send(self.session, "POST", self.oauth_url, "eBay call", headers=headers, data=data)
+            span.set_attribute("http.status_code", resp.status_code)
         if not resp.ok:
             raise EbayAPIError(
                 f"Failed to get access token: {resp.status_code} {resp.text}"
@@ -113,7 +118,9 @@ class EbayInterface:
         """
         Generic HTTP wrapper that raises EbayAPIError on failure.
         """
-        resp = self.session.request(method, url, timeout=30, **kwargs)
+        with tracer.span("ebay.request", kind=SPAN_KIND_CLIENT, **{"http.method": method, "http.url": url}) as span:
+            resp = send(self.session, method, url, "eBay call", **kwargs)
+            span.set_attribute("http.status_code", resp.status_code)
         if not resp.ok:
             raise EbayAPIError(
                 f"eBay API error {resp.status_code}: {resp.text}"
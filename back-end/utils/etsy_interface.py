@@ -8,6 +8,9 @@ from dotenv import load_dotenv
 
 import requests
 
+from utils.http_client import send
+from utils.tracing import SPAN_KIND_CLIENT, tracer
+
 
 class EtsyAPIError(Exception):
     """Generic exception for Etsy API errors."""
@@ -32,7 +35,7 @@ class EtsyInterface:
                 self.shop_id = os.getenv("ETSY_SHOP_ID")
                 self.access_token = os.getenv("ETSY_ACCESS_TOKEN")
             else:
-                print("[NOTICE] Etsy shop id and access token not provided")
+                logging.getLogger(__name__).warning("Etsy shop id and access token not provided")
         else:
             raise EtsyAPIError("Unable to locate/read .env file.")
 
@@ -65,7 +68,9 @@ class EtsyInterface:
 
     def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
         url = f"{self.base_url}{path}"
-        resp = self.session.request(method, url, timeout=30, **kwargs)
+        with tracer.span("etsy.request", kind=SPAN_KIND_CLIENT, **{"http.method": method, "http.url": url}) as span:
+            resp = send(self.session, method, url, "Etsy call", **kwargs)
+            span.set_attribute("http.status_code", resp.status_code)
         if not resp.ok:
             raise EtsyAPIError(f"Etsy API error {resp.status_code}: {resp.text}")
         if resp.text:
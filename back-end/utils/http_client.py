@@ -0,0 +1,31 @@
+# http_client.py
+
+import requests
+
+from utils import deadline
+
+# Seconds any single HTTP call may take; the current request's deadline may allow less
+REQUEST_TIMEOUT = 30
+
+
+def send(session: requests.Session, method: str, url: str, what: str = "HTTP call",
+         timeout: float = REQUEST_TIMEOUT, **kwargs) -> requests.Response:
+    """
+    Sends one HTTP request for the marketplace clients with at most the time left
+    before the current request's deadline (`timeout` without one). `what` names the
+    call in DeadlineExceeded messages, e.g. "eBay call".
+
+    requests applies its timeout to each socket operation, not to the whole response,
+    so a server that keeps dripping bytes can still outlast the deadline; the deadline
+    is checked again once the response has been read.
+    Raises: deadline.DeadlineExceeded when the time runs out, requests.RequestException otherwise.
+    """
+    try:
+        resp = session.request(method, url, timeout=deadline.timeout(timeout, what), **kwargs)
+    except requests.Timeout as e:
+        if deadline.expired():
+            raise deadline.DeadlineExceeded(f"Deadline exceeded during {what} to {url}") from e
+        raise
+    if deadline.expired():
+        raise deadline.DeadlineExceeded(f"Deadline exceeded during {what} to {url}")
+    return resp
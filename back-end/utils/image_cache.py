@@ -0,0 +1,203 @@
+# image_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+# Files this cache writes (renditions and their in-progress temp files); nothing else is ever deleted
+_CACHE_FILE = re.compile(r"^[0-9a-f]{40}\.\w+(\.\d+\.\d+\.tmp)?$")
+
+# Requested widths are rounded up to a multiple of WIDTH_STEP within these bounds, so
+# arbitrary ?w= values can't fill the cache with near-identical copies
+MIN_WIDTH = 16
+MAX_WIDTH = 2048
+WIDTH_STEP = 16
+# ?fmt= aliases, and the default output format for each source extension
+FORMAT_ALIASES = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "webp": "webp", "avif": "avif"}
+SOURCE_FORMATS = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".gif": "png"}
+
+
+def normalize_width(width: int) -> int:
+    width = max(MIN_WIDTH, min(MAX_WIDTH, width))
+    return -(-width // WIDTH_STEP) * WIDTH_STEP
+
+
+def resize_format(filename: str, requested: Optional[str]) -> Optional[str]:
+    """The output format for ?fmt= (None if unsupported); without it, the source's own format."""
+    if requested:
+        return FORMAT_ALIASES.get(requested.lower())
+    return SOURCE_FORMATS.get(os.path.splitext(filename)[1].lower(), "jpeg")
+
+
+class ResizeCache:
+    """
+    On-disk cache of resized images, bounded to `max_bytes` with LRU eviction.
+
+    A miss calls render(source_path, dest_path, width, fmt) once, however many
+    requests for the same rendition arrive meanwhile (they wait for the first one).
+    Entries live in an in-memory index, so a hit is a dict lookup followed by the
+    file send. The index is written to `directory`/index.json after every change
+    and on shutdown, so a restarted server starts warm; files the index doesn't
+    know about (e.g. interrupted renders) are deleted when it is loaded.
+
+    The index belongs to one server process: run one cache directory per process.
+
+    A returned path may be evicted before the caller has opened it. A caller that
+    then gets FileNotFoundError calls forget() and get() again, which renders anew.
+    """
+
+    def __init__(self, directory: str, source_dir: str, max_bytes: int,
+                 render: Callable[[str, str, int, str], int]):
+        self.directory = directory
+        self.source_dir = source_dir
+        self.max_bytes = max_bytes
+        self.render = render
+
+        self._index: "OrderedDict[str, list]" = OrderedDict()  # key -> [cache filename, bytes], oldest first
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def _key(filename: str, width: int, fmt: str) -> str:
+        return f"{filename}|{width}|{fmt}"
+
+    @staticmethod
+    def _cache_filename(key: str, fmt: str) -> str:
+        return f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.{fmt}"
+
+    def get(self, filename: str, width: int, fmt: str) -> Optional[str]:
+        """
+        Path of the cached rendition of `filename` (a file in source_dir), rendering it
+        on a miss. Returns None if the source image doesn't exist.
+        """
+        key = self._key(filename, width, fmt)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None:
+                self._index.move_to_end(key)
+                self.hits += 1
+                return os.path.join(self.directory, entry[0])
+            self.misses += 1
+
+        source_path = os.path.join(self.source_dir, filename)
+        if not os.path.isfile(source_path):
+            return None
+        path, _ = self._flight.do(key, lambda: self._fill(key, source_path, width, fmt))
+        return path
+
+    def forget(self, filename: str, width: int, fmt: str) -> None:
+        """Drops a rendition whose file is gone (evicted or removed), so the next get() renders it."""
+        key = self._key(filename, width, fmt)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and not os.path.exists(os.path.join(self.directory, entry[0])):
+                del self._index[key]
+                self.bytes -= entry[1]
+
+    def _fill(self, key: str, source_path: str, width: int, fmt: str) -> str:
+        name = self._cache_filename(key, fmt)
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            size = self.render(source_path, tmp_path, width, fmt)
+            os.replace(tmp_path, path)  # never serve a half-written file
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._index[key] = [name, size]
+            self.bytes += size
+            self._evict()
+            self._save_index()
+        return path
+
+    def _evict(self) -> None:
+        # Caller holds self._lock. The newest entry stays even if it alone exceeds the budget.
+        while self.bytes > self.max_bytes and len(self._index) > 1:
+            _, (name, size) = self._index.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> None:
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+
+        present = set(os.listdir(self.directory))
+        for key, name, size in entries:
+            if name in present:
+                self._index[key] = [name, size]
+                self.bytes += size
+
+        known = {name for name, _ in self._index.values()} | {INDEX_FILE}
+        for name in present - known:
+            if not _CACHE_FILE.match(name):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        self._evict()
+        logger.info("Image cache loaded", extra={"entries": len(self._index), "bytes": self.bytes})
+
+    def _save_index(self) -> None:
+        # Caller holds self._lock (or is the only user, at shutdown)
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump([[key, name, size] for key, (name, size) in self._index.items()], f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Unable to save image cache index", extra={"error": str(e)})
+
+    def save(self) -> None:
+        """Persists the current LRU order (hits reorder the index without writing it)."""
+        with self._lock:
+            self._save_index()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "coalesced": self._flight.shared,
+            }
@@ -0,0 +1,443 @@
+# images.py
+
+import base64
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils import deadline
+
+logger = logging.getLogger(__name__)
+
+# Fixed renditions: name -> bounding box (width, height). Images are scaled down to fit
+# inside the box, keeping their aspect ratio, and never scaled up.
+RENDITIONS: Dict[str, Tuple[int, int]] = {
+    "thumb": (320, 320),    # items grid
+    "modal": (1024, 1024),  # item modal
+    "full": (2048, 2048),   # zoom / download
+}
+JPEG_QUALITY = {"thumb": 78, "modal": 82, "full": 85}
+
+# Output formats for on-demand resizes: name -> (Pillow format, save options, keeps alpha)
+RESIZE_FORMATS = {
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}, False),
+    "png": ("PNG", {"optimize": True}, True),
+    "webp": ("WEBP", {"quality": 80, "method": 4}, True),
+    "avif": ("AVIF", {"quality": 55, "speed": 6}, True),
+}
+MIMETYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp", "avif": "image/avif"}
+
+# Precomputed variants served instead of a JPEG/PNG (original or rendition) to clients whose
+# Accept header lists the format, in server preference order. item_14.thumb.jpg gets
+# item_14.thumb.jpg.avif and item_14.thumb.jpg.webp next to it. GIFs may be animated and
+# are always served as uploaded.
+VARIANT_FORMATS = ("avif", "webp")
+VARIANT_SOURCES = (".jpg", ".jpeg", ".png")
+
+# Placeholder embedded in item lists while the real image loads: the whole picture shrunk
+# to fit this box, as a WebP data: URI of a few hundred bytes that clients scale up blurred
+PLACEHOLDER_SIZE = 20
+PLACEHOLDER_QUALITY = 50
+# EXIF orientations that turn the picture a quarter turn, i.e. swap its width and height
+_QUARTER_TURNS = (5, 6, 7, 8)
+
+
+# Leading bytes of each accepted upload type -> the extension it is stored under.
+# The type comes from these, never from the client's filename or Content-Type.
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Extension for a file starting with `head` (JPEG, PNG or GIF), or None for anything else."""
+    for signature, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+class ImageWorkersBusy(Exception):
+    """Raised when too many on-demand resizes are already queued; callers should answer 503."""
+    pass
+
+
+def rendition_filename(filename: str, name: str, ext: str = ".jpg") -> str:
+    """item_14.jpg -> item_14.thumb.jpg"""
+    stem, _ = os.path.splitext(filename)
+    return f"{stem}.{name}{ext}"
+
+
+def rendition_url(image_url: str, filename: str) -> str:
+    """Rendition URLs live next to the original, e.g. /images/item_14.jpg -> /images/item_14.thumb.jpg"""
+    prefix = image_url.rsplit("/", 1)[0] if "/" in image_url else ""
+    return f"{prefix}/{filename}"
+
+
+def variant_filename(filename: str, fmt: str) -> str:
+    """item_14.thumb.jpg -> item_14.thumb.jpg.webp"""
+    return f"{filename}.{fmt}"
+
+
+def has_variants(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in VARIANT_SOURCES
+
+
+def accepted_variants(accept: Optional[str]) -> List[str]:
+    """
+    VARIANT_FORMATS the client accepts according to its Accept header, best first.
+    Highest q-value wins; ties go to the server preference order (avif, webp). Wildcards
+    don't count: browsers that decode AVIF/WebP name them explicitly, and */* clients
+    (curl, crawlers, old browsers) should keep getting the original.
+    """
+    if not accept:
+        return []
+
+    offered = {}
+    for part in accept.split(","):
+        fields = part.strip().split(";")
+        media_type = fields[0].strip().lower()
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        offered[media_type] = q
+
+    ranked = [(offered.get(MIMETYPES[fmt], 0.0), -i, fmt) for i, fmt in enumerate(VARIANT_FORMATS)]
+    return [fmt for q, _, fmt in sorted(ranked, reverse=True) if q > 0]
+
+
+def _save_variants(image, path: str, out_dir: str) -> List[str]:
+    """
+    Writes `image` (the oriented RGB/RGBA content of the file at `path`) as every
+    VARIANT_FORMATS into `out_dir`. A variant that isn't smaller than `path` itself is
+    dropped: the original is then the better answer for every client. Returns the formats kept.
+    """
+    original_size = os.path.getsize(path)
+    kept = []
+    for fmt in VARIANT_FORMATS:
+        pil_format, options, _ = RESIZE_FORMATS[fmt]
+        out_path = os.path.join(out_dir, variant_filename(os.path.basename(path), fmt))
+        tmp_path = out_path + ".tmp"
+        try:
+            image.save(tmp_path, pil_format, **options)
+            if os.path.getsize(tmp_path) < original_size:
+                os.replace(tmp_path, out_path)
+                kept.append(fmt)
+                continue
+            os.remove(tmp_path)
+            if os.path.exists(out_path):
+                os.remove(out_path)
+        except (OSError, KeyError, ValueError) as e:
+            # e.g. a Pillow build without an AVIF encoder: the other formats still get written
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            logger.warning("Unable to write %s variant", fmt, extra={"path": path, "error": str(e)})
+    return kept
+
+
+def write_variants(path: str, out_dir: Optional[str] = None) -> List[str]:
+    """
+    Writes the VARIANT_FORMATS of an existing JPEG/PNG file into `out_dir` (default: next
+    to it). Runs inside a worker process. Returns the formats kept (see _save_variants).
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as original:
+        # Browsers honour EXIF orientation on the original, so the variant is stored upright
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        return _save_variants(image, path, out_dir or os.path.dirname(path))
+
+
+def image_placeholder(image) -> str:
+    """`image` (oriented RGB/RGBA) shrunk to fit PLACEHOLDER_SIZE, as a WebP data: URI."""
+    from PIL import Image
+
+    small = image.copy()
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.LANCZOS)
+    buf = io.BytesIO()
+    small.save(buf, "WEBP", quality=PLACEHOLDER_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def render_renditions(source_path: str, out_dir: str) -> Dict[str, str]:
+    """
+    Writes every rendition of `source_path` into `out_dir` and returns name -> filename.
+    Runs inside a worker process (module-level so it can be pickled); Pillow is imported
+    here so the web process never loads it.
+
+    EXIF orientation is applied and metadata dropped. Images with transparency are
+    written as PNG, everything else as progressive JPEG. The AVIF/WebP variants of every
+    rendition, and of a JPEG/PNG original, are written alongside.
+    """
+    return render_image(source_path, out_dir)[0]
+
+
+def render_image(source_path: str, out_dir: str) -> Tuple[Dict[str, str], dict]:
+    """
+    render_renditions(), also returning the image's details: its displayed "width" and
+    "height" (after EXIF orientation) and its "placeholder" (see image_placeholder).
+    """
+    from PIL import Image, ImageOps
+
+    filename = os.path.basename(source_path)
+    written = {}
+    with Image.open(source_path) as original:
+        width, height = original.size  # before draft() shrinks it
+        if original.getexif().get(0x0112) in _QUARTER_TURNS:
+            width, height = height, width
+        original.draft("RGB", RENDITIONS["full"])  # JPEG decoders can skip detail we won't keep
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        # Largest first, each scaled from the previous: cheaper than resampling the original every time
+        for name, box in sorted(RENDITIONS.items(), key=lambda kv: kv[1], reverse=True):
+            image.thumbnail(box, Image.LANCZOS)
+            out_name = rendition_filename(filename, name, ".png" if has_alpha else ".jpg")
+            tmp_path = os.path.join(out_dir, out_name + ".tmp")
+            if has_alpha:
+                image.save(tmp_path, "PNG", optimize=True)
+            else:
+                image.save(tmp_path, "JPEG", quality=JPEG_QUALITY[name], optimize=True, progressive=True)
+            out_path = os.path.join(out_dir, out_name)
+            os.replace(tmp_path, out_path)  # never serve a half-written file
+            _save_variants(image, out_path, out_dir)
+            written[name] = out_name
+        # From the smallest rendition, which the loop leaves in `image`
+        details = {"width": width, "height": height, "placeholder": image_placeholder(image)}
+
+    if has_variants(filename):
+        write_variants(source_path, out_dir)
+    return written, details
+
+
+def resize_image(source_path: str, dest_path: str, width: int, fmt: str) -> int:
+    """
+    Writes `source_path` scaled down to at most `width` pixels wide (never up) as `fmt`
+    (a RESIZE_FORMATS key) to `dest_path`. Runs inside a worker process.
+    Returns: the size of the written file in bytes.
+    """
+    from PIL import Image, ImageOps
+
+    pil_format, options, keeps_alpha = RESIZE_FORMATS[fmt]
+    with Image.open(source_path) as original:
+        original.draft("RGB", (width, width * 4))
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha and keeps_alpha else "RGB")
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        image.save(dest_path, pil_format, **options)
+    return os.path.getsize(dest_path)
+
+
+class RenditionPipeline:
+    """
+    Generates image renditions in a small process pool, off the request thread. They are
+    written next to their source image (see rendition_filename).
+
+    submit() returns at once; when the worker is done, `on_done(image_id, urls, details)`
+    is called with name -> URL for every rendition and the image's details (see
+    render_image). It runs on a delivery thread of its own, not the pool's result thread,
+    so a slow on_done (a database write) doesn't hold up other results, such as the resizes
+    requests are waiting on. Once no more results are waiting, `on_idle()` (if given) is
+    called, so work such as cache invalidation happens once per batch. At most
+    `max_pending` images are queued or rendering at once; beyond that submissions are
+    skipped and picked up again the next time the image is requested without renditions.
+    An image whose render failed (or whose source is missing) is not queued again for
+    `retry_after` seconds; the last `max_failures` such images are remembered.
+
+    submit_variants() does the same for the AVIF/WebP variants of a single file that
+    predates them; each file is attempted at most once per process.
+    """
+
+    def __init__(self, on_done: Callable[[int, Dict[str, str], dict], None],
+                 workers: int = 2, max_pending: int = 64, max_resizes: int = 16,
+                 retry_after: float = 3600.0, max_failures: int = 1024,
+                 on_idle: Optional[Callable[[], None]] = None):
+        self.on_done = on_done
+        self.on_idle = on_idle
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.max_failures = max_failures
+        # On-demand resizes share the workers but have their own limit, since a request waits on each
+        self._resize_slots = threading.BoundedSemaphore(max_resizes)
+
+        self._pending: Dict[object, object] = {}  # image_id (or file path, for variants) -> future
+        self._variants_tried = set()  # paths submit_variants() has queued
+        self._failures: "OrderedDict[int, float]" = OrderedDict()  # image_id -> monotonic retry time, oldest first
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._results: "queue.Queue" = queue.Queue()  # (image_id, image_url, future), None to stop
+        self._delivery: Optional[threading.Thread] = None
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Caller holds self._lock. Started on first use; 'spawn' avoids forking a multi-threaded web process
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        if self._delivery is None:
+            self._delivery = threading.Thread(target=self._deliver, name="rendition-results", daemon=True)
+            self._delivery.start()
+        return self._executor
+
+    def submit(self, image_id: int, source_path: str, image_url: str) -> bool:
+        """
+        Queues renditions for one image. Returns False when it was not queued (already
+        pending, failed less than `retry_after` seconds ago, the pool is full, or the
+        source file is missing).
+        """
+        with self._lock:
+            if image_id in self._pending:
+                return False
+            retry_at = self._failures.get(image_id)
+            if retry_at is not None:
+                if time.monotonic() < retry_at:
+                    return False
+                del self._failures[image_id]
+            if len(self._pending) >= self.max_pending:
+                self.skipped += 1
+                return False
+            if not os.path.isfile(source_path):
+                self._record_failure(image_id)
+                logger.warning("Image source missing, no renditions generated", extra={"path": source_path})
+                return False
+            future = self._get_executor().submit(render_image, source_path, os.path.dirname(source_path))
+            self._pending[image_id] = future
+        future.add_done_callback(lambda f: self._results.put((image_id, image_url, f)))
+        return True
+
+    def _deliver(self) -> None:
+        # The delivery thread: hands finished renders to on_done, then on_idle once caught up
+        delivered = False
+        while True:
+            result = self._results.get()
+            if result is None:
+                return
+            delivered = self._finished(*result) or delivered
+            if delivered and self.on_idle is not None and self._results.empty():
+                delivered = False
+                try:
+                    self.on_idle()
+                except Exception as e:
+                    logger.error("Rendition idle callback failed", extra={"error": str(e)})
+
+    def _record_failure(self, image_id: int) -> None:
+        # Caller holds self._lock
+        self._failures.pop(image_id, None)
+        self._failures[image_id] = time.monotonic() + self.retry_after
+        while len(self._failures) > self.max_failures:
+            self._failures.popitem(last=False)
+
+    def _finished(self, image_id: int, image_url: str, future) -> bool:
+        # Returns whether on_done stored the renditions
+        with self._lock:
+            self._pending.pop(image_id, None)
+        try:
+            written, details = future.result()
+            urls = {name: rendition_url(image_url, filename) for name, filename in written.items()}
+            self.on_done(image_id, urls, details)
+            self.completed += 1
+            return True
+        except Exception as e:
+            with self._lock:
+                self._record_failure(image_id)
+            self.failed += 1
+            logger.error("Unable to generate renditions for image %s", image_id, extra={"error": str(e)})
+            return False
+
+    def submit_variants(self, path: str) -> bool:
+        """Queues write_variants(path). Returns False when it was not queued."""
+        with self._lock:
+            if path in self._variants_tried:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.skipped += 1
+                return False
+            if not os.path.isfile(path):
+                return False
+            self._variants_tried.add(path)
+            future = self._get_executor().submit(write_variants, path)
+            self._pending[path] = future
+        future.add_done_callback(lambda f: self._variants_finished(path, f))
+        return True
+
+    def is_pending(self, key) -> bool:
+        """True while renditions for an image_id, or variants for a path, are queued or running."""
+        with self._lock:
+            return key in self._pending
+
+    def _variants_finished(self, path: str, future) -> None:
+        with self._lock:
+            self._pending.pop(path, None)
+        try:
+            future.result()
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error("Unable to generate image variants", extra={"path": path, "error": str(e)})
+
+    def resize(self, source_path: str, dest_path: str, width: int, fmt: str, timeout: float = 30.0) -> int:
+        """
+        Runs resize_image() on the workers and waits for it, at most until the request deadline.
+        Raises: ImageWorkersBusy, deadline.DeadlineExceeded, or whatever the resize raised.
+        """
+        if not self._resize_slots.acquire(blocking=False):
+            raise ImageWorkersBusy("Too many image resizes in progress")
+        try:
+            with self._lock:
+                future = self._get_executor().submit(resize_image, source_path, dest_path, width, fmt)
+            try:
+                return future.result(timeout=deadline.timeout(timeout, "image resize"))
+            except FutureTimeoutError:
+                future.cancel()
+                if deadline.expired():
+                    raise deadline.DeadlineExceeded(f"Deadline exceeded resizing {os.path.basename(source_path)}")
+                raise
+        finally:
+            self._resize_slots.release()
+
+    def shutdown(self) -> None:
+        """Lets queued renditions finish and be delivered, then stops the workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            delivery, self._delivery = self._delivery, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if delivery is not None:
+            self._results.put(None)
+            delivery.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "completed": self.completed,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "retry_later": len(self._failures),
+            }
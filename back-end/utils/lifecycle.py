@@ -0,0 +1,139 @@
+# lifecycle.py
+
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds to keep serving after a stop signal while /readyz already reports 503,
+# so load balancers stop routing here before requests start being refused
+SHUTDOWN_GRACE = float(os.getenv("SHUTDOWN_GRACE", 0))
+# Seconds to wait for in-flight requests before shutting down anyway
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 25))
+
+# Shutdown hooks run stage by stage, in registration order within a stage
+STAGES = ("listeners", "jobs", "resources")
+
+
+class Lifecycle:
+    """
+    Counts requests in flight and performs an ordered shutdown:
+
+    1. stop reporting ready (and wait `grace` seconds),
+    2. refuse new requests and wait for the in-flight ones to finish,
+    3. run the hooks of each stage: stop accepting connections ("listeners"),
+       stop background work such as worker pools and exporters ("jobs"),
+       then close what the requests and jobs used, e.g. the DB pool ("resources").
+    """
+
+    def __init__(self):
+        self.stopping = False  # /readyz reports 503 from here on
+        self.draining = False  # new requests are refused from here on
+        self.in_flight = 0
+
+        self._idle = threading.Condition()
+        self._hooks: Dict[str, List[Tuple[str, Callable[[], None]]]] = {stage: [] for stage in STAGES}
+        self._shutdown_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Request accounting
+    # ------------------------------------------------------------------
+
+    def request_started(self) -> bool:
+        """Counts a request in. Returns False (and counts nothing) while draining."""
+        with self._idle:
+            if self.draining:
+                return False
+            self.in_flight += 1
+            return True
+
+    def request_finished(self) -> None:
+        with self._idle:
+            self.in_flight -= 1
+            if self.in_flight <= 0:
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Returns: whether every in-flight request finished within `timeout` seconds."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self.in_flight <= 0, timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # Shutdown
+    # ------------------------------------------------------------------
+
+    def on_shutdown(self, stage: str, name: str, hook: Callable[[], None]) -> None:
+        if stage not in self._hooks:
+            raise ValueError(f"Unknown shutdown stage {stage!r}, expected one of {STAGES}")
+        self._hooks[stage].append((name, hook))
+
+    def shutdown(self, grace: float = SHUTDOWN_GRACE, drain_timeout: float = SHUTDOWN_DRAIN_TIMEOUT) -> dict:
+        """
+        Runs the shutdown sequence once; later calls wait for the first to finish.
+        A failing hook is logged and does not stop the ones after it.
+        Returns: a summary of what happened, also logged.
+        """
+        if not self._shutdown_lock.acquire(blocking=False):
+            self._stopped.wait()
+            return {}
+        try:
+            start = time.monotonic()
+            self.stopping = True
+            logger.info("Shutdown started", extra={"in_flight": self.in_flight, "grace_seconds": grace})
+            if grace > 0:
+                time.sleep(grace)
+
+            with self._idle:
+                self.draining = True
+            drained = self.wait_idle(drain_timeout)
+            if not drained:
+                logger.warning("Shutting down with %d request(s) still in flight", self.in_flight)
+
+            failed = []
+            for stage in STAGES:
+                for name, hook in self._hooks[stage]:
+                    try:
+                        hook()
+                    except Exception as e:
+                        failed.append(name)
+                        logger.error("Shutdown hook %s failed", name, extra={"stage": stage, "error": str(e)})
+
+            summary = {
+                "drained": drained,
+                "abandoned_requests": self.in_flight,
+                "failed_hooks": failed,
+                "seconds": round(time.monotonic() - start, 3),
+            }
+            logger.info("Shutdown complete", extra={"shutdown": summary})
+            return summary
+        finally:
+            self._stopped.set()
+
+    def wait_stopped(self, timeout: Optional[float] = None) -> bool:
+        return self._stopped.wait(timeout)
+
+
+def install_signal_handlers(lifecycle: Lifecycle, signals=(signal.SIGTERM, signal.SIGINT)) -> None:
+    """
+    Runs lifecycle.shutdown() on a helper thread when the process is asked to stop.
+    The handler returns at once, so the server thread keeps answering (with 503s and
+    /readyz failures) until the "listeners" hooks stop it. A second signal exits immediately.
+    """
+    def handle(signum, frame):
+        if lifecycle.stopping:
+            logger.warning("Second stop signal, exiting without draining")
+            os._exit(1)
+        logger.info("Received %s", signal.Signals(signum).name)
+        threading.Thread(target=lifecycle.shutdown, name="shutdown", daemon=True).start()
+
+    for sig in signals:
+        signal.signal(sig, handle)
+
+
+# Process-wide lifecycle shared by the routes (request accounting, /readyz) and main.py (signals)
+lifecycle = Lifecycle()
@@ -0,0 +1,203 @@
+# metrics.py
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # bytes
+
+PREFIX = "secondspark_"
+
+
+class _Shard:
+    """Counters written by exactly one thread."""
+
+    __slots__ = ("thread", "requests", "latency", "db_time", "size", "in_flight")
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.requests: Dict[tuple, int] = {}  # (endpoint, method, status) -> count
+        self.latency: Dict[tuple, list] = {}  # (endpoint, method) -> histogram row
+        self.db_time: Dict[tuple, list] = {}
+        self.size: Dict[tuple, list] = {}
+        self.in_flight: Dict[str, int] = {}  # endpoint -> gauge
+
+
+def _observe(table: dict, key: tuple, buckets: tuple, value: float) -> None:
+    # Row layout: one non-cumulative count per bucket, then +Inf, then the running sum
+    row = table.get(key)
+    if row is None:
+        row = table[key] = [0] * (len(buckets) + 2)
+    row[bisect_left(buckets, value)] += 1
+    row[-1] += value
+
+
+def _merge_rows(into: dict, table: dict) -> None:
+    for key, row in list(table.items()):
+        target = into.get(key)
+        if target is None:
+            into[key] = list(row)
+        else:
+            for i, v in enumerate(row):
+                target[i] += v
+
+
+def _merge_counts(into: dict, table: dict) -> None:
+    for key, value in list(table.items()):
+        into[key] = into.get(key, 0) + value
+
+
+def _labels(names: Iterable[str], values: Iterable) -> str:
+    parts = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(value) if value == value else "NaN"
+    return str(value)
+
+
+class MetricsRegistry:
+    """
+    Per-endpoint request metrics: status counts, in-flight gauge and histograms of
+    latency, DB time and response size.
+
+    Each thread records into its own shard, so the hot path is a few dict/list
+    updates with no lock. render() merges the shards at scrape time; copies are
+    taken with list(), which is atomic under the GIL. Shards of finished threads
+    (Werkzeug starts one per request) are folded into a retired total so memory
+    stays bounded.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._retired = _Shard(None)
+        self._lock = threading.Lock()  # only taken when a thread registers its shard, and at scrape time
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._fold_dead_shards()
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _fold_dead_shards(self) -> None:
+        # Caller must hold self._lock. A dead thread can no longer write to its shard.
+        live = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                live.append(shard)
+            else:
+                self._merge_into(self._retired, shard)
+        self._shards = live
+
+    @staticmethod
+    def _merge_into(target: _Shard, shard: _Shard) -> None:
+        _merge_counts(target.requests, shard.requests)
+        _merge_rows(target.latency, shard.latency)
+        _merge_rows(target.db_time, shard.db_time)
+        _merge_rows(target.size, shard.size)
+        _merge_counts(target.in_flight, shard.in_flight)
+
+    # ------------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------------
+
+    def request_started(self, endpoint: str) -> None:
+        in_flight = self._shard().in_flight
+        in_flight[endpoint] = in_flight.get(endpoint, 0) + 1
+
+    def request_finished(self, endpoint: str) -> None:
+        in_flight = self._shard().in_flight
+        in_flight[endpoint] = in_flight.get(endpoint, 0) - 1
+
+    def observe(self, endpoint: str, method: str, status: int, seconds: float,
+                db_seconds: float, size: Optional[int]) -> None:
+        shard = self._shard()
+        counter_key = (endpoint, method, status)
+        shard.requests[counter_key] = shard.requests.get(counter_key, 0) + 1
+
+        key = (endpoint, method)
+        _observe(shard.latency, key, LATENCY_BUCKETS, seconds)
+        _observe(shard.db_time, key, LATENCY_BUCKETS, db_seconds)
+        if size is not None:
+            _observe(shard.size, key, SIZE_BUCKETS, size)
+
+    # ------------------------------------------------------------------
+    # Scraping
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> _Shard:
+        """Returns the merged totals of every shard."""
+        total = _Shard(None)
+        with self._lock:
+            self._fold_dead_shards()
+            self._merge_into(total, self._retired)
+            for shard in self._shards:
+                self._merge_into(total, shard)
+        return total
+
+    def render(self) -> str:
+        """Request metrics in the Prometheus text exposition format."""
+        total = self.snapshot()
+        lines: List[str] = []
+
+        name = PREFIX + "http_requests_total"
+        lines.append(f"# HELP {name} Requests handled, by endpoint, method and status.")
+        lines.append(f"# TYPE {name} counter")
+        for key, count in sorted(total.requests.items()):
+            lines.append(f"{name}{_labels(('endpoint', 'method', 'status'), key)} {count}")
+
+        name = PREFIX + "http_requests_in_flight"
+        lines.append(f"# HELP {name} Requests currently being handled, by endpoint.")
+        lines.append(f"# TYPE {name} gauge")
+        for endpoint, count in sorted(total.in_flight.items()):
+            lines.append(f"{name}{_labels(('endpoint',), (endpoint,))} {count}")
+
+        lines += _render_histogram(PREFIX + "http_request_duration_seconds",
+                                   "Time to handle a request.", total.latency, LATENCY_BUCKETS)
+        lines += _render_histogram(PREFIX + "http_request_db_seconds",
+                                   "Time spent in database queries while handling a request.",
+                                   total.db_time, LATENCY_BUCKETS)
+        lines += _render_histogram(PREFIX + "http_response_size_bytes",
+                                   "Size of the response body as sent.", total.size, SIZE_BUCKETS)
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(name: str, help_text: str, table: dict, buckets: tuple) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, row in sorted(table.items()):
+        labels = _labels(("endpoint", "method"), key)
+        cumulative = 0
+        for bound, count in zip(buckets, row):
+            cumulative += count
+            lines.append(f'{name}_bucket{labels[:-1]},le="{bound}"}} {cumulative}')
+        cumulative += row[len(buckets)]
+        lines.append(f'{name}_bucket{labels[:-1]},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{labels} {_format_value(float(row[-1]))}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+    return lines
+
+
+def render_gauges(samples: Iterable[Tuple[str, str, str, float]]) -> str:
+    """
+    Formats point-in-time values (pool, cache and limiter stats) as Prometheus samples.
+    `samples` yields (name, type, help, value); names get the common prefix.
+    """
+    lines = []
+    for name, metric_type, help_text, value in samples:
+        name = PREFIX + name
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,122 @@
+# passwords.py
+
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+SCHEME = "scrypt"
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the KDF pool is saturated; callers should answer 503 and let the client retry."""
+    pass
+
+
+def _scrypt(password: bytes, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+    # Runs inside a worker process. Must stay a module-level function so it can be pickled.
+    return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, dklen=dklen, maxmem=256 * 1024 * 1024)
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+class PasswordHasher:
+    """
+    scrypt password hashing off the request thread.
+
+    KDF work runs in a small process pool so a burst of logins can't pin the web
+    workers' CPU, and at most `max_pending` jobs may be queued or running at once;
+    beyond that hash()/verify() raise PasswordHasherBusy instead of queueing forever.
+
+    Stored format: scrypt$<n>$<r>$<p>$<salt b64>$<hash b64>
+    Anything else in the password column is treated as a legacy plaintext row.
+    """
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1, workers: int = 2,
+                 max_pending: int = 8, acquire_timeout: float = 2.0, dklen: int = 32):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.dklen = dklen
+        self.workers = workers
+        self.acquire_timeout = acquire_timeout
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Pool management
+    # ------------------------------------------------------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Started on first use; 'spawn' avoids forking a multi-threaded web process
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _run_kdf(self, password: str, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise PasswordHasherBusy("Too many concurrent password operations")
+        try:
+            future = self._get_executor().submit(_scrypt, password.encode("utf-8"), salt, n, r, p, dklen)
+            return future.result()
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(16)
+        digest = self._run_kdf(password, salt, self.n, self.r, self.p, self.dklen)
+        return f"{SCHEME}${self.n}${self.r}${self.p}${_b64(salt)}${_b64(digest)}"
+
+    @staticmethod
+    def is_hashed(stored: str) -> bool:
+        return bool(stored) and stored.startswith(SCHEME + "$")
+
+    def verify(self, password: str, stored: str) -> Tuple[bool, bool]:
+        """
+        Checks a password against the stored value.
+        Returns: (matches, needs_rehash). needs_rehash is True for legacy plaintext rows
+        and for hashes made with different cost parameters than the current ones.
+        """
+        if not stored:
+            return False, False
+
+        if not self.is_hashed(stored):
+            # Legacy plaintext row; compare in constant time, then ask the caller to upgrade it
+            matches = hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+            return matches, matches
+
+        try:
+            _, n, r, p, salt_b64, hash_b64 = stored.split("$")
+            n, r, p = int(n), int(r), int(p)
+            salt = base64.b64decode(salt_b64)
+            expected = base64.b64decode(hash_b64)
+        except ValueError:
+            return False, False
+
+        digest = self._run_kdf(password, salt, n, r, p, len(expected))
+        matches = hmac.compare_digest(digest, expected)
+        needs_rehash = matches and (n, r, p) != (self.n, self.r, self.p)
+        return matches, needs_rehash
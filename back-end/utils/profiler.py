@@ -0,0 +1,148 @@
+# profiler.py
+
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Frames whose file path contains one of these markers decide the category of a sample.
+# A sample takes the first category in CATEGORIES that any of its frames matches, so
+# decoding an eBay response counts as marketplace time, not serialization.
+CATEGORY_MARKERS = (
+    ("db", ("psycopg2", os.path.join("db", "interface.py"))),
+    ("marketplace", ("ebay_interface.py", "etsy_interface.py", os.path.join("requests", ""), "urllib3")),
+    ("serialization", (os.path.join("json", ""), os.path.join("flask", "json"), "compression.py")),
+)
+# Function names that count as serialization wherever they live: the row serializers
+# in routes.py (_item_row_to_dict, _user_row_to_dict, ...), _item_list and _pick, which
+# shape rows into response payloads, and Flask's jsonify
+SERIALIZATION_SUFFIXES = ("_row_to_dict",)
+SERIALIZATION_FUNCTIONS = frozenset(("_item_list", "_pick", "jsonify"))
+
+CATEGORIES = ("db", "marketplace", "serialization", "app")
+
+
+def _frame_label(code) -> str:
+    # Last two path components keep labels readable (e.g. db/interface.py:execute_query)
+    # Folded stacks use ';' as the separator, so it must never appear in a label.
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{'/'.join(parts[-2:])}:{code.co_name}".replace(";", ",")
+
+
+def _categorize(stack: Tuple) -> str:
+    matched = set()
+    for code in stack:
+        filename = code.co_filename
+        for category, markers in CATEGORY_MARKERS:
+            if any(marker in filename for marker in markers):
+                matched.add(category)
+        if code.co_name in SERIALIZATION_FUNCTIONS or code.co_name.endswith(SERIALIZATION_SUFFIXES):
+            matched.add("serialization")
+    return next((c for c in CATEGORIES if c in matched), "app")
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack every `interval` seconds from a helper thread.
+
+    Only the profiled request pays for it: the helper thread exists while the
+    profile is running, and the request thread itself executes no extra code.
+    Samples are grouped into flame-graph "folded stacks" whose root frame is the
+    sample's category (db, marketplace, serialization or app).
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.001):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+
+        self._samples: Dict[Tuple, float] = {}  # stack -> seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        # Each sample is weighted by the time since the previous one: while the request
+        # thread holds the GIL the sampler falls behind, and the stack it finally sees
+        # stands for that whole gap.
+        samples = self._samples
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            key = tuple(stack)
+            samples[key] = samples.get(key, 0.0) + (now - last)
+            last = now
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def folded(self) -> List[str]:
+        """
+        Lines of `category;frame;...;leaf weight`, the input format of flamegraph.pl /
+        speedscope. Weights are in microseconds.
+        """
+        lines: Dict[str, float] = {}
+        for stack, seconds in self._samples.items():
+            line = ";".join([_categorize(stack)] + [_frame_label(code) for code in stack])
+            lines[line] = lines.get(line, 0.0) + seconds
+        return [f"{line} {round(seconds * 1e6)}" for line, seconds in sorted(lines.items())]
+
+    def summary(self) -> Dict[str, float]:
+        """Seconds attributed to each category, plus the wall time profiled."""
+        totals = dict.fromkeys(CATEGORIES, 0.0)
+        for stack, seconds in self._samples.items():
+            totals[_categorize(stack)] += seconds
+        totals["wall"] = self.duration
+        return totals
+
+
+class ProfileStore:
+    """Keeps the most recent profiles as .folded files in `directory`."""
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = directory
+        self.keep = keep
+
+    def save(self, name: str, profiler: SamplingProfiler) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{int(time.time() * 1000)}-{name}.folded"
+        with open(os.path.join(self.directory, filename), "w") as f:
+            f.write("\n".join(profiler.folded()) + "\n")
+        self._prune()
+        return filename
+
+    def path(self, filename: str) -> Optional[str]:
+        path = os.path.join(self.directory, os.path.basename(filename))
+        return path if filename.endswith(".folded") and os.path.isfile(path) else None
+
+    def _prune(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".folded"))
+        for name in names[:-self.keep] if len(names) > self.keep else ():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
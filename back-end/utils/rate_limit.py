@@ -0,0 +1,183 @@
+# rate_limit.py
+
+import logging
+import math
+import threading
+import time
+from array import array
+from typing import Dict, Hashable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets: each key may spend `burst` tokens at once and earns
+    `rate` tokens per second back.
+
+    Bucket state is kept in two flat float arrays (tokens, last refill time) indexed
+    through a dict, so a bucket costs ~16 bytes plus its key instead of a Python
+    object per client. When more than `max_buckets` keys are tracked, buckets that
+    have refilled completely (i.e. idle clients) are recycled.
+    """
+
+    def __init__(self, rate: float, burst: float, max_buckets: int = 100_000):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_buckets = max_buckets
+
+        self._index: Dict[Hashable, int] = {}
+        self._tokens = array("d")
+        self._stamps = array("d")
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.rejected = 0
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Spends `cost` tokens from key's bucket if it has them.
+        Returns: (allowed, retry_after) where retry_after is the number of seconds
+        until the request would be allowed (0 when allowed).
+        """
+        now = time.monotonic()
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                slot = self._new_slot(key, now)
+
+            tokens = min(self.burst, self._tokens[slot] + (now - self._stamps[slot]) * self.rate)
+            self._stamps[slot] = now
+
+            if tokens >= cost:
+                self._tokens[slot] = tokens - cost
+                self.allowed += 1
+                return True, 0.0
+
+            self._tokens[slot] = tokens
+            self.rejected += 1
+            return False, (cost - tokens) / self.rate if self.rate > 0 else math.inf
+
+    def _new_slot(self, key: Hashable, now: float) -> int:
+        # Caller must hold self._lock
+        if len(self._index) >= self.max_buckets:
+            self._sweep(now)
+
+        if self._free:
+            slot = self._free.pop()
+            self._tokens[slot] = self.burst
+            self._stamps[slot] = now
+        else:
+            slot = len(self._tokens)
+            self._tokens.append(self.burst)
+            self._stamps.append(now)
+        self._index[key] = slot
+        return slot
+
+    def _sweep(self, now: float) -> None:
+        # Recycle every bucket that would be full by now; they carry no state worth keeping
+        full_after = self.burst / self.rate if self.rate > 0 else math.inf
+        for key, slot in list(self._index.items()):
+            if now - self._stamps[slot] >= full_after:
+                del self._index[key]
+                self._free.append(slot)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": len(self._index),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+            }
+
+
+class PostgresTokenBucketLimiter:
+    """
+    Token buckets shared by every worker process through a Postgres table.
+
+    Each acquire() is a single atomic upsert that refills, checks and spends the
+    bucket using the database clock, so workers on different hosts agree. Errors
+    talking to the database fail open (the request is allowed) so a DB hiccup
+    does not take the whole API down with it. The RateLimitBucket table comes from
+    db/migrations/0005_rate_limit_bucket.sql.
+    """
+
+    # All SET expressions see the row's previous values, so `allowed` and `tokens`
+    # are computed from the same refilled balance.
+    ACQUIRE_SQL = """
+        INSERT INTO RateLimitBucket AS b (bucket_key, tokens, allowed, updated_at)
+        VALUES (%(key)s, %(burst)s - %(cost)s, TRUE, EXTRACT(EPOCH FROM clock_timestamp()))
+        ON CONFLICT (bucket_key) DO UPDATE SET
+            allowed = LEAST(%(burst)s, b.tokens + (EXCLUDED.updated_at - b.updated_at) * %(rate)s) >= %(cost)s,
+            tokens = CASE
+                WHEN LEAST(%(burst)s, b.tokens + (EXCLUDED.updated_at - b.updated_at) * %(rate)s) >= %(cost)s
+                THEN LEAST(%(burst)s, b.tokens + (EXCLUDED.updated_at - b.updated_at) * %(rate)s) - %(cost)s
+                ELSE LEAST(%(burst)s, b.tokens + (EXCLUDED.updated_at - b.updated_at) * %(rate)s)
+            END,
+            updated_at = EXCLUDED.updated_at
+        RETURNING allowed, tokens;
+    """
+
+    def __init__(self, db, rate: float, burst: float, prefix: str = ""):
+        self.db = db
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.prefix = prefix
+
+        self.allowed = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> Tuple[bool, float]:
+        params = {"key": f"{self.prefix}{key}"[:255], "burst": self.burst, "rate": self.rate, "cost": float(cost)}
+        try:
+            row = self.db.execute_query(self.ACQUIRE_SQL, params=params, fetch_one=True, commit=True)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Shared rate limiter unavailable, allowing request", extra={"error": str(e), "hot": True})
+            return True, 0.0
+
+        if row["allowed"]:
+            self.allowed += 1
+            return True, 0.0
+
+        self.rejected += 1
+        return False, (cost - row["tokens"]) / self.rate if self.rate > 0 else math.inf
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+class LoadShedder:
+    """
+    Admission control in front of the connection pool.
+
+    Requests are refused while the pool's recent checkout wait exceeds
+    `max_wait` seconds, or while more than `max_waiters` callers are already
+    queued for a connection; letting them in would only lengthen the queue.
+    """
+
+    def __init__(self, pool, max_wait: float = 0.5, max_waiters: int = 30):
+        self.pool = pool
+        self.max_wait = max_wait
+        self.max_waiters = max_waiters
+        self.shed = 0
+
+    def congested(self) -> bool:
+        """Whether new requests would be shed right now (without counting one)."""
+        return self.pool.recent_wait() > self.max_wait or self.pool.waiting > self.max_waiters
+
+    def should_shed(self) -> Tuple[bool, float]:
+        """Returns: (shed, retry_after seconds)."""
+        if self.congested():
+            self.shed += 1
+            return True, max(1.0, self.pool.recent_wait())
+        return False, 0.0
@@ -0,0 +1,195 @@
+# response_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+
+class CachedResponse:
+    """
+    A serialized response body plus the metadata needed to replay it.
+    `variants` holds precompressed copies of the body keyed by content encoding.
+    """
+
+    __slots__ = ("body", "status", "mimetype", "tags", "expires_at", "size", "variants")
+
+    def __init__(self, body: bytes, status: int, mimetype: str, tags: Tuple[str, ...], expires_at: float):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.tags = tags
+        self.expires_at = expires_at
+        self.size = len(body)
+        self.variants = {}
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of serialized route responses.
+
+    Entries are keyed by whatever the caller considers the identity of a request
+    (route, view args, query args, principal) and tagged with the resource families
+    they were built from, so write routes can drop every dependent entry with
+    invalidate("items") without knowing the individual keys.
+
+    invalidate() also bumps a generation counter per tag. A caller that builds a
+    response reads generations(tags) first and passes it to set(); if one of the
+    tags was invalidated while the body was being built, the body may predate the
+    write and is not stored.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entries: int = 2048):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0  # bumped by clear(), which invalidates every tag
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Counters for sizing the cache
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """Returns the live entry for key (refreshing its LRU position), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def generations(self, tags=()) -> Tuple[int, ...]:
+        """Opaque snapshot of the tags' generations, to pass to set() after building a body."""
+        with self._lock:
+            return self._snapshot(tags)
+
+    def set(self, key: Hashable, body: bytes, status: int, mimetype: str, ttl: float, tags=(),
+            generations: Optional[Tuple[int, ...]] = None) -> Optional[CachedResponse]:
+        """
+        Stores a serialized response. Bodies larger than the whole budget are not cached,
+        nor are bodies whose tags were invalidated since `generations` was taken.
+        """
+        entry = CachedResponse(body, status, mimetype, tuple(tags), time.monotonic() + ttl)
+        if entry.size > self.max_bytes:
+            return None
+
+        with self._lock:
+            if generations is not None and generations != self._snapshot(entry.tags):
+                self.stale_sets += 1
+                return None
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            # Evict least recently used entries until we are back under budget
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+        return entry
+
+    def add_variant(self, key: Hashable, entry: CachedResponse, encoding: str, body: bytes) -> None:
+        """
+        Attaches a compressed copy of entry's body. Variant bytes count towards the
+        cache budget. Ignored if the entry was evicted or replaced in the meantime.
+        """
+        with self._lock:
+            if self._entries.get(key) is not entry or encoding in entry.variants:
+                return
+            entry.variants[encoding] = body
+            entry.size += len(body)
+            self._bytes += len(body)
+
+            while self._entries and self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(self, *tags: str) -> int:
+        """Drops every entry carrying any of the given tags. Returns the number removed."""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+            self._epoch += 1
+
+    def _snapshot(self, tags) -> Tuple[int, ...]:
+        # Caller must hold self._lock
+        return (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _remove(self, key: Hashable) -> None:
+        # Caller must hold self._lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_sets": self.stale_sets,
+            }
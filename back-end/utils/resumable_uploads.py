@@ -0,0 +1,160 @@
+# resumable_uploads.py
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from typing import BinaryIO, Tuple
+
+from utils import deadline
+from utils.blob_store import CHUNK_SIZE, BlobTooLarge
+
+logger = logging.getLogger(__name__)
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+_SESSION_FILE = re.compile(r"^upload-([0-9a-f]{32})\.(part|json)$")
+
+
+class UploadNotFound(Exception):
+    """Unknown or expired upload id; callers answer 404."""
+    pass
+
+
+class UploadOffsetMismatch(Exception):
+    """A chunk was sent for the wrong offset; callers answer 409 with the current one."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class ResumableUploads:
+    """
+    Uploads sent in pieces that survive dropped connections and server restarts.
+
+    create() declares the total size and returns an upload id. Each append() carries
+    the offset it starts at and is streamed onto the end of <directory>/upload-<id>.part;
+    a client that lost its connection asks for the current offset (the .part file's
+    size, so it is right after a restart too) and continues from there. Metadata the
+    caller needs to finish the upload lives in upload-<id>.json next to it. Once every
+    byte has arrived, take() hands the .part file to the caller exactly once.
+
+    Sessions untouched for `ttl` seconds are deleted by sweep(), which create() calls.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float = 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        self._locks = {}  # upload id -> lock held while a chunk is appended
+        self._locks_guard = threading.Lock()
+        self.created = 0
+        self.completed = 0
+        self.expired = 0
+
+    def part_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"upload-{upload_id}.part")
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"upload-{upload_id}.json")
+
+    def _lock(self, upload_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def create(self, size: int, meta: dict) -> str:
+        """Starts an upload of `size` bytes. Raises BlobTooLarge past max_bytes."""
+        if size > self.max_bytes:
+            raise BlobTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+        self.sweep()
+        upload_id = uuid.uuid4().hex
+        with open(self._meta_path(upload_id), "w") as f:
+            json.dump({**meta, "size": size}, f)
+        open(self.part_path(upload_id), "wb").close()
+        self.created += 1
+        return upload_id
+
+    def get(self, upload_id: str) -> dict:
+        """The upload's metadata plus its current "offset". Raises UploadNotFound."""
+        if not _UPLOAD_ID.match(upload_id):
+            raise UploadNotFound(upload_id)
+        try:
+            with open(self._meta_path(upload_id), "r") as f:
+                meta = json.load(f)
+            meta["offset"] = os.path.getsize(self.part_path(upload_id))
+        except (OSError, ValueError):
+            raise UploadNotFound(upload_id)
+        return meta
+
+    def append(self, upload_id: str, offset: int, stream: BinaryIO) -> dict:
+        """
+        Appends `stream` at `offset` and returns the updated get() result. Whatever
+        arrived before a connection dropped is kept. Raises UploadNotFound,
+        UploadOffsetMismatch, or BlobTooLarge when the chunk runs past the declared size.
+        """
+        self.get(upload_id)  # before creating a lock for an id that doesn't exist
+        with self._lock(upload_id):
+            meta = self.get(upload_id)
+            if offset != meta["offset"]:
+                raise UploadOffsetMismatch(meta["offset"])
+            with open(self.part_path(upload_id), "ab") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    if offset + len(chunk) > meta["size"]:
+                        raise BlobTooLarge(f"Chunk runs past the declared size of {meta['size']} bytes")
+                    deadline.check()
+                    f.write(chunk)
+                    offset += len(chunk)
+            meta["offset"] = offset
+            return meta
+
+    def take(self, upload_id: str) -> Tuple[dict, str]:
+        """
+        Claims a fully received upload: returns (metadata, path of the .part file), which
+        from then on belongs to the caller. Only one caller can take an upload. Raises
+        UploadNotFound, or UploadOffsetMismatch while bytes are still missing.
+        """
+        self.get(upload_id)
+        with self._lock(upload_id):
+            meta = self.get(upload_id)
+            if meta["offset"] != meta["size"]:
+                raise UploadOffsetMismatch(meta["offset"])
+            os.remove(self._meta_path(upload_id))
+        with self._locks_guard:
+            self._locks.pop(upload_id, None)
+        self.completed += 1
+        return meta, self.part_path(upload_id)
+
+    def sweep(self) -> int:
+        """Deletes sessions none of whose files changed for `ttl` seconds. Returns how many."""
+        cutoff = time.time() - self.ttl
+        newest = {}  # upload id -> latest mtime of its files (appends touch the .part)
+        for name in os.listdir(self.directory):
+            m = _SESSION_FILE.match(name)
+            if not m:
+                continue
+            try:
+                mtime = os.path.getmtime(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            newest[m.group(1)] = max(mtime, newest.get(m.group(1), 0))
+        stale = [upload_id for upload_id, mtime in newest.items() if mtime < cutoff]
+        for upload_id in stale:
+            with self._lock(upload_id):
+                for path in (self._meta_path(upload_id), self.part_path(upload_id)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            with self._locks_guard:
+                self._locks.pop(upload_id, None)
+        if stale:
+            self.expired += len(stale)
+            logger.info("Expired resumable uploads", extra={"count": len(stale)})
+        return len(stale)
+
+    def stats(self) -> dict:
+        return {"created": self.created, "completed": self.completed, "expired": self.expired}
@@ -0,0 +1,97 @@
+# singleflight.py
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from utils import deadline
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into a single execution.
+
+    The first caller for a key (the leader) runs fn(); callers that arrive while it
+    is still running block until it finishes and receive the same result, or the
+    same exception. Once the leader returns the key is released, so later calls
+    execute again (the response cache is what serves those).
+
+    Followers wait at most until their own request deadline, or `max_wait` seconds
+    without one, so a leader stuck on a dead connection cannot hold every follower's
+    thread with it: a follower whose deadline passed raises DeadlineExceeded, one
+    that only ran out of `max_wait` stops waiting and runs fn() itself.
+    """
+
+    def __init__(self, max_wait: float = 30.0):
+        self.max_wait = max_wait
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+        # Counters for metrics
+        self.executions = 0
+        self.shared = 0
+        self.wait_timeouts = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Runs fn() once per in-flight key.
+        Returns: (result, shared) where shared is True if this caller reused another caller's execution.
+        Raises: DeadlineExceeded if the request deadline passes while waiting for the leader.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            wait = deadline.timeout(self.max_wait, "coalesced read")
+            if not call.done.wait(wait):
+                with self._lock:
+                    self.wait_timeouts += 1
+                if wait < self.max_wait:  # it was the request deadline that ran out
+                    raise deadline.DeadlineExceeded("Deadline exceeded waiting for a coalesced read")
+                return fn(), False  # the leader is stuck: stop waiting on it
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "shared": self.shared,
+                "wait_timeouts": self.wait_timeouts,
+            }
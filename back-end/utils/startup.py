@@ -0,0 +1,211 @@
+# startup.py
+
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib.abc import Loader, MetaPathFinder
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+# ----------------------------------------------------------------------
+# Readiness probing
+# ----------------------------------------------------------------------
+
+def backoff_delays(initial: float = 0.05, maximum: float = 2.0, multiplier: float = 2.0,
+                   jitter: float = 0.2) -> Iterator[float]:
+    """Exponentially growing delays (capped at `maximum`), each randomized by +/- `jitter`."""
+    delay = initial
+    while True:
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+        delay = min(maximum, delay * multiplier)
+
+
+def wait_until(probe: Callable[[], None], timeout: float, what: str = "dependency",
+               delays: Optional[Iterator[float]] = None) -> Tuple[int, float]:
+    """
+    Calls probe() until it returns without raising, sleeping with exponential backoff
+    in between. The first attempt is immediate, so an already-running dependency costs
+    no waiting at all.
+    Returns: (attempts, seconds waited).
+    Raises: TimeoutError (chained to the last probe error) once `timeout` has passed.
+    """
+    delays = delays or backoff_delays()
+    start = time.monotonic()
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            probe()
+            elapsed = time.monotonic() - start
+            logger.info("%s ready after %d attempt(s) in %.2fs", what, attempts, elapsed)
+            return attempts, elapsed
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout:
+                raise TimeoutError(f"{what} not ready after {elapsed:.1f}s ({attempts} attempts)") from e
+            delay = min(next(delays), timeout - elapsed)
+            logger.info("Waiting for %s (attempt %d): %s", what, attempts, e)
+            time.sleep(delay)
+
+
+# ----------------------------------------------------------------------
+# Lazy integrations
+# ----------------------------------------------------------------------
+
+class LazyClient(Generic[T]):
+    """
+    Builds a client on first use instead of at startup.
+
+    A failed construction (e.g. missing credentials) is remembered for
+    `retry_after` seconds, so requests during that window get None immediately
+    instead of re-reading configuration on every call.
+    """
+
+    def __init__(self, factory: Callable[[], T], name: str, retry_after: float = 60.0):
+        self.factory = factory
+        self.name = name
+        self.retry_after = retry_after
+
+        self._client: Optional[T] = None
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[T]:
+        if self._client is not None:
+            return self._client
+        with self._lock:
+            if self._client is not None:
+                return self._client
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_after:
+                return None
+            try:
+                self._client = self.factory()
+                self._failed_at = None
+                logger.info("%s client initialized", self.name)
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                logger.warning("Unable to initialize %s client", self.name, extra={"error": str(e)})
+            return self._client
+
+    @property
+    def initialized(self) -> bool:
+        return self._client is not None
+
+
+# ----------------------------------------------------------------------
+# Startup timing report
+# ----------------------------------------------------------------------
+
+class _TimedLoader(Loader):
+    def __init__(self, loader, timer: "ImportTimer"):
+        self._loader = loader
+        self._timer = timer
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._timer._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._exit(module.__name__, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportTimer(MetaPathFinder):
+    """
+    Records how long each module imported while it is active takes to execute,
+    both cumulatively and excluding its own imports (self time), like
+    `python -X importtime` but available to the running server's startup report.
+    """
+
+    def __init__(self):
+        self.cumulative: Dict[str, float] = {}
+        self.self_time: Dict[str, float] = {}
+        self._child_time: List[float] = []
+        self._finding = threading.local()
+
+    def start(self) -> "ImportTimer":
+        sys.meta_path.insert(0, self)
+        return self
+
+    def stop(self) -> "ImportTimer":
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        return self
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._finding, "active", False):
+            return None
+        self._finding.active = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._finding.active = False
+
+    def _enter(self):
+        self._child_time.append(0.0)
+
+    def _exit(self, name: str, elapsed: float):
+        children = self._child_time.pop()
+        self.cumulative[name] = elapsed
+        self.self_time[name] = elapsed - children
+        if self._child_time:
+            self._child_time[-1] += elapsed
+
+    def slowest(self, n: int = 10) -> List[Tuple[str, float]]:
+        """The n modules with the highest self time, in seconds."""
+        return sorted(self.self_time.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+class StartupReport:
+    """Named startup phases and their durations, logged once the server is ready."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.started_at = time.perf_counter()
+        self.import_timer: Optional[ImportTimer] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+
+    def as_dict(self, top_imports: int = 10) -> dict:
+        out = {
+            "total_seconds": round(time.perf_counter() - self.started_at, 4),
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+        }
+        if self.import_timer is not None:
+            out["slowest_imports"] = {
+                name: round(seconds, 4) for name, seconds in self.import_timer.slowest(top_imports)
+            }
+        return out
+
+    def log(self) -> None:
+        logger.info("Startup complete", extra={"startup": self.as_dict()})
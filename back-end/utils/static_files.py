@@ -0,0 +1,150 @@
+# static_files.py
+
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from flask import current_app, request
+from werkzeug.utils import send_file
+
+logger = logging.getLogger(__name__)
+
+# Uploaded files never change once written (uuid4-prefixed names; renditions, variants and
+# resizes are derived from them), so browsers and CDNs may keep them for a year without
+# revalidating.
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", 365 * 24 * 3600))
+
+# How file bodies leave the process:
+#   ""                  Python streams the file (default, no fronting server needed)
+#   "x-sendfile"        X-Sendfile: <absolute path>, for Apache mod_xsendfile / lighttpd
+#   "x-accel-redirect"  X-Accel-Redirect: STATIC_ACCEL_PREFIX + path relative to STATIC_ACCEL_ROOT, for nginx
+# With either header mode the worker only answers headers (and 304s); the web server sends the bytes
+# and handles Range itself.
+SENDFILE_MODES = ("", "x-sendfile", "x-accel-redirect")
+STATIC_SENDFILE = os.getenv("STATIC_SENDFILE", "").lower()
+STATIC_ACCEL_PREFIX = os.getenv("STATIC_ACCEL_PREFIX", "/_files")
+STATIC_ACCEL_ROOT = os.getenv("STATIC_ACCEL_ROOT", ".")
+
+_HASH_CHUNK = 1024 * 1024
+
+
+class StaticFiles:
+    """
+    Sends files from disk with far-future caching, strong ETags and Range support.
+
+    The ETag is a SHA-1 of the file's contents, so it is the same on every server and
+    across restarts (unlike Werkzeug's mtime-based default). Digests are remembered per
+    (path, mtime, size) for the `max_etags` most recently sent files, so a file is read
+    for hashing once, not on every request.
+    """
+
+    def __init__(self, max_age: int = STATIC_MAX_AGE, sendfile: str = STATIC_SENDFILE,
+                 accel_prefix: str = STATIC_ACCEL_PREFIX, accel_root: str = STATIC_ACCEL_ROOT,
+                 max_etags: int = 4096):
+        if sendfile not in SENDFILE_MODES:
+            raise ValueError(f"STATIC_SENDFILE must be one of {SENDFILE_MODES}, got {sendfile!r}")
+        self.max_age = max_age
+        self.sendfile = sendfile
+        self.accel_prefix = accel_prefix.rstrip("/")
+        self.accel_root = os.path.abspath(accel_root)
+        self.max_etags = max_etags
+
+        self._etags: "OrderedDict[str, tuple]" = OrderedDict()  # path -> (mtime_ns, size, etag)
+        self._lock = threading.Lock()
+        self.etag_hits = 0
+        self.etag_misses = 0
+        self.not_modified = 0
+        self.offloaded = 0
+
+    def etag(self, path: str, st: os.stat_result) -> str:
+        with self._lock:
+            entry = self._etags.get(path)
+            if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+                self._etags.move_to_end(path)
+                self.etag_hits += 1
+                return entry[2]
+            self.etag_misses += 1
+
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                digest.update(chunk)
+        etag = digest.hexdigest()
+
+        with self._lock:
+            self._etags[path] = (st.st_mtime_ns, st.st_size, etag)
+            self._etags.move_to_end(path)
+            while len(self._etags) > self.max_etags:
+                self._etags.popitem(last=False)
+        return etag
+
+    def _accel_uri(self, path: str) -> Optional[str]:
+        """URI nginx maps back to `path`, or None for files outside accel_root."""
+        relative = os.path.relpath(os.path.abspath(path), self.accel_root)
+        if relative.startswith(os.pardir):
+            return None
+        return f"{self.accel_prefix}/{relative.replace(os.sep, '/')}"
+
+    def send(self, path: str, mimetype: Optional[str] = None, immutable: bool = True):
+        """
+        Response for the file at `path`, which the caller has already resolved safely
+        (e.g. with safe_join) and checked exists. Honours If-None-Match/If-Modified-Since
+        (304) and, when Python sends the body, Range/If-Range (206/416).
+
+        immutable=False is for responses that may change at the same URL, e.g. an original
+        sent while its AVIF/WebP variant is still being generated: clients may store it but
+        must revalidate, which costs a 304 until the variant appears.
+        """
+        st = os.stat(path)
+        etag = self.etag(path, st)
+        if mimetype is None:
+            mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        accel_uri = self._accel_uri(path) if self.sendfile == "x-accel-redirect" else None
+        if accel_uri is not None:
+            resp = current_app.response_class(mimetype=mimetype)
+            resp.set_etag(etag)
+            resp.last_modified = int(st.st_mtime)
+            resp.headers["X-Accel-Redirect"] = accel_uri
+            resp = resp.make_conditional(request)
+        else:
+            resp = send_file(
+                path,
+                request.environ,
+                mimetype=mimetype,
+                etag=etag,
+                last_modified=int(st.st_mtime),
+                use_x_sendfile=self.sendfile == "x-sendfile",
+                response_class=current_app.response_class,
+            )
+            if self.sendfile != "x-sendfile":
+                resp.accept_ranges = "bytes"
+
+        if resp.status_code == 304:
+            self.not_modified += 1
+        elif accel_uri is not None or self.sendfile == "x-sendfile":
+            self.offloaded += 1
+
+        resp.cache_control.public = True
+        if immutable:
+            resp.cache_control.no_cache = None  # send_file's default when given no max_age
+            resp.cache_control.max_age = self.max_age
+            resp.cache_control.immutable = True
+        else:
+            resp.cache_control.no_cache = True
+        return resp
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.etag_hits + self.etag_misses
+            return {
+                "sendfile": self.sendfile or "python",
+                "etags": len(self._etags),
+                "etag_hit_ratio": self.etag_hits / lookups if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "offloaded": self.offloaded,
+            }
@@ -0,0 +1,195 @@
+# structured_logging.py
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.tracing import tracer
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Records waiting for the writer thread; beyond this records are dropped (and counted)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Fraction of hot-path records (logged with extra={"hot": True}) kept per level, e.g. "DEBUG=0.01,INFO=0.1"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "DEBUG=0.01,INFO=0.1")
+
+_request_id: contextvars.ContextVar = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "hot"}
+
+
+def set_request_id(request_id: Optional[str]):
+    """Binds a request id to the current context. Returns a token for reset_request_id()."""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token) -> None:
+    _request_id.reset(token)
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def parse_sample_rates(spec: str) -> Dict[int, float]:
+    rates = {}
+    for part in spec.split(","):
+        name, _, rate = part.partition("=")
+        level = logging.getLevelName(name.strip().upper())
+        if isinstance(level, int) and rate.strip():
+            rates[level] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class ContextFilter(logging.Filter):
+    """
+    Runs on the logging thread (before the record is queued) and stamps it with the
+    request id and trace/span ids of the current context, which the writer thread
+    could not see. Also drops the unsampled share of hot-path records.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[int, float]] = None):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "hot", False):
+            rate = self.sample_rates.get(record.levelno, 1.0)
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return False
+
+        record.request_id = _request_id.get()
+        span = tracer.current_span()
+        record.trace_id = span.trace_id if span is not None else None
+        record.span_id = span.span_id if span is not None else None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: fixed fields first, then anything passed via `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and value is not None:
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler over a bounded queue that never blocks the caller: when the writer
+    thread falls behind, records are dropped and counted instead.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.enqueued = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now: args may be mutable or not picklable,
+        # and the writer thread must not touch request state.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # The queue may be full; wait for room instead of failing to shut down
+        self.queue.put(self._sentinel, timeout=5)
+
+
+class _LoggingState:
+    handler: Optional[DroppingQueueHandler] = None
+    context_filter: Optional[ContextFilter] = None
+    listener: Optional[_Listener] = None
+    lock = threading.Lock()
+
+
+def configure_logging(level: str = LOG_LEVEL, stream=None) -> DroppingQueueHandler:
+    """
+    Routes the root logger through a bounded queue to a background thread that writes
+    JSON lines to `stream` (stdout by default). Safe to call more than once.
+    """
+    with _LoggingState.lock:
+        if _LoggingState.handler is not None:
+            return _LoggingState.handler
+
+        log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        handler = DroppingQueueHandler(log_queue)
+        context_filter = ContextFilter(parse_sample_rates(LOG_SAMPLE_RATES))
+        handler.addFilter(context_filter)
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(JsonFormatter())
+        listener = _Listener(log_queue, writer)
+        listener.start()
+        atexit.register(shutdown_logging)  # drains the queue before the process exits
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+
+        _LoggingState.handler = handler
+        _LoggingState.context_filter = context_filter
+        _LoggingState.listener = listener
+        return handler
+
+
+def shutdown_logging() -> None:
+    """Stops the writer thread after it has written everything queued (tests, graceful stop)."""
+    with _LoggingState.lock:
+        if _LoggingState.listener is not None:
+            _LoggingState.listener.stop()
+            logging.getLogger().removeHandler(_LoggingState.handler)
+        _LoggingState.handler = _LoggingState.context_filter = _LoggingState.listener = None
+
+
+def logging_stats() -> dict:
+    handler, context_filter = _LoggingState.handler, _LoggingState.context_filter
+    if handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "queued": handler.queue.qsize(),
+        "enqueued": handler.enqueued,
+        "dropped": handler.dropped,
+        "sampled_out": context_filter.sampled_out,
+    }
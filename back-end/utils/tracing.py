@@ -0,0 +1,320 @@
+# tracing.py
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import List, Optional
+
+import requests
+
+# "none" (default) disables tracing, "file" appends spans as JSON lines to TRACING_FILE,
+# "otlp" posts them as OTLP/JSON to TRACING_OTLP_ENDPOINT (e.g. an OpenTelemetry collector).
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "secondspark-backend")
+# Finished spans waiting for export; beyond this new spans are dropped (and counted)
+TRACING_QUEUE_SIZE = int(os.getenv("TRACING_QUEUE_SIZE", 10000))
+TRACING_FLUSH_INTERVAL = float(os.getenv("TRACING_FLUSH_INTERVAL", 1.0))
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+# Span kinds (OpenTelemetry semantics): SERVER for handling an incoming request, CLIENT
+# for a call to another system (database, eBay/Etsy APIs), INTERNAL for everything else
+SPAN_KIND_INTERNAL = "internal"
+SPAN_KIND_SERVER = "server"
+SPAN_KIND_CLIENT = "client"
+
+
+class Span:
+    """One timed operation. Use through Tracer.span(); ids are W3C trace-context sized hex strings."""
+
+    __slots__ = ("tracer", "name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "error", "_token")
+
+    def __init__(self, tracer, name, trace_id, parent_id, attributes, kind=SPAN_KIND_INTERNAL):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def start(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        self.tracer.exporter.export(self)
+
+    def __enter__(self) -> "Span":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(exc)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is disabled, so instrumented code pays one attribute check."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def start(self):
+        return self
+
+    def finish(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self.enabled = exporter is not None
+
+    def span(self, name: str, traceparent: Optional[str] = None, kind: str = SPAN_KIND_INTERNAL, **attributes):
+        """
+        Starts a child of the current span (or a new trace). `traceparent` (a W3C
+        trace-context header value) makes the span continue a caller's trace.
+        `kind` is one of the SPAN_KIND_* constants.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+
+        parent = _current_span.get()
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, attributes, kind)
+
+        trace_id, parent_id = parse_traceparent(traceparent) if traceparent else (None, None)
+        return Span(self, name, trace_id or os.urandom(16).hex(), parent_id, attributes, kind)
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    def stats(self) -> dict:
+        return self.exporter.stats() if self.enabled else {"enabled": False}
+
+
+def parse_traceparent(header: str):
+    """Returns (trace_id, parent span_id) from a `00-<trace>-<span>-<flags>` header, or (None, None)."""
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None, None
+    return parts[1], parts[2]
+
+
+def format_traceparent(span) -> Optional[str]:
+    if not isinstance(span, Span):
+        return None
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+# ----------------------------------------------------------------------
+# Exporters
+# ----------------------------------------------------------------------
+
+class _BatchExporter:
+    """
+    Hands finished spans to a background thread, which writes them in batches.
+    export() never blocks the request thread: when the queue is full the span is
+    dropped and counted instead.
+    """
+
+    def __init__(self, max_queue: int = TRACING_QUEUE_SIZE, flush_interval: float = TRACING_FLUSH_INTERVAL,
+                 batch_size: int = 512):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+        # Started on the first export, so processes that never trace (e.g. the password
+        # hashing workers, which re-import the app) don't start an idle thread
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = self._drain(block=True)
+            if not batch:
+                continue
+            try:
+                self.write(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error("Unable to export %d spans", len(batch), extra={"error": str(e)})
+
+    def _drain(self, block: bool) -> List[Span]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if not block or timeout <= 0:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> None:
+        """Exports everything queued so far on the calling thread (tests, shutdown)."""
+        batch = self._drain(block=False)
+        while batch:
+            self.write(batch)
+            self.exported += len(batch)
+            batch = self._drain(block=False)
+
+    def write(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+class FileExporter(_BatchExporter):
+    """Appends one JSON object per span to `path`."""
+
+    def __init__(self, path: str = TRACING_FILE, **kwargs):
+        self.path = path
+        self._write_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def write(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._write_lock, open(self.path, "a") as f:
+            f.write(lines)
+
+
+class OTLPExporter(_BatchExporter):
+    """Posts spans as OTLP/JSON (the collector's /v1/traces HTTP endpoint)."""
+
+    # SpanKind enum values of the OTLP protobuf schema
+    KINDS = {SPAN_KIND_INTERNAL: 1, SPAN_KIND_SERVER: 2, SPAN_KIND_CLIENT: 3}
+
+    def __init__(self, endpoint: str = TRACING_OTLP_ENDPOINT, service_name: str = TRACING_SERVICE_NAME, **kwargs):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.session = requests.Session()
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def _attribute(key, value) -> dict:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _span(self, span: Span) -> dict:
+        out = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": self.KINDS[span.kind],
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [self._attribute(k, v) for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            out["parentSpanId"] = span.parent_id
+        return out
+
+    def write(self, spans: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "secondspark"}, "spans": [self._span(s) for s in spans]}],
+            }]
+        }
+        resp = self.session.post(self.endpoint, json=payload, timeout=5)
+        resp.raise_for_status()
+
+
+def _build_tracer() -> Tracer:
+    if TRACING_EXPORTER == "file":
+        return Tracer(FileExporter())
+    if TRACING_EXPORTER == "otlp":
+        return Tracer(OTLPExporter())
+    return Tracer(None)
+
+
+# Process-wide tracer shared by the routes, the DB interface and the marketplace clients
+tracer = _build_tracer()
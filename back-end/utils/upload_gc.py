@@ -0,0 +1,316 @@
+# upload_gc.py
+
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from utils.blob_store import STAGING_DIR, BlobStore
+from utils.images import VARIANT_FORMATS, has_variants
+
+logger = logging.getLogger(__name__)
+
+# Seconds between collections (0 disables the background thread)
+UPLOAD_GC_INTERVAL = float(os.getenv("UPLOAD_GC_INTERVAL", 6 * 3600))
+# Unreferenced files younger than this are left alone: an upload may be between writing its
+# file and inserting its row, or a rendition between being written and being recorded
+UPLOAD_GC_GRACE = float(os.getenv("UPLOAD_GC_GRACE", 24 * 3600))
+# What happens to orphans:
+#   "report"      only counted
+#   "quarantine"  moved under <uploads>/.quarantine/ (same relative path), deleted from there
+#                 UPLOAD_GC_QUARANTINE_TTL seconds later; move back to restore
+#   "delete"      deleted
+GC_MODES = ("report", "quarantine", "delete")
+UPLOAD_GC_MODE = os.getenv("UPLOAD_GC_MODE", "quarantine").lower()
+UPLOAD_GC_QUARANTINE_TTL = float(os.getenv("UPLOAD_GC_QUARANTINE_TTL", 7 * 24 * 3600))
+# Dot-prefixed: never served, and skipped by the scan like the staging directory
+QUARANTINE_DIR = ".quarantine"
+
+_BLOB_NAME = re.compile(r"^([0-9a-f]{64})\.")
+_STAGED_NAME = re.compile(r"^[0-9a-f]{32}$")  # BlobStore.stage() temp files, not resumable sessions
+
+
+class UploadFile(NamedTuple):
+    key: str      # relative path of the file ItemImage would reference (the file itself, minus a variant suffix)
+    relpath: str  # relative to the uploads root, "/"-separated
+    path: str
+    size: int
+    mtime: float
+
+
+def reference_key(relpath: str) -> str:
+    """'ab/cd/<sha>.jpg.webp' -> 'ab/cd/<sha>.jpg': variants belong to the file they were made from."""
+    stem, ext = os.path.splitext(relpath)
+    if ext[1:] in VARIANT_FORMATS and has_variants(stem):
+        return stem
+    return relpath
+
+
+def scan_uploads(root: str, prefix: str = "") -> Iterator[UploadFile]:
+    """
+    Every file under `root` in reference_key() order (Python string order, the same as
+    PostgreSQL's "C" collation), skipping dot-prefixed entries (staging, quarantine).
+    Only one directory listing is held at a time: sorting a directory's entries by key,
+    with subdirectories sorted as "<name>/", orders the whole tree.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = [entry for entry in it if not entry.name.startswith(".")]
+    except FileNotFoundError:
+        return
+    ordered = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            ordered.append((entry.name + "/", entry.name, entry))
+        elif entry.is_file(follow_symlinks=False):
+            ordered.append((reference_key(entry.name), entry.name, entry))
+    ordered.sort(key=lambda t: (t[0], t[1]))
+    del entries
+
+    for key, name, entry in ordered:
+        if key.endswith("/"):
+            yield from scan_uploads(entry.path, prefix + key)
+            continue
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        yield UploadFile(prefix + key, prefix + name, entry.path, st.st_size, st.st_mtime)
+
+
+class UploadGC:
+    """
+    Finds uploaded files no ItemImage row refers to, and totals each organization's
+    storage on the way.
+
+    A collection is one merge of two sorted streams: the files under the uploads root
+    (scan_uploads) and the paths the database refers to with the organization referring
+    to each (`references`, e.g. DBInterface.iter_image_references), so memory does not
+    grow with the number of files or rows. Files without a reference and older than
+    `grace` are orphans and are handled according to `mode`.
+
+    Before a blob is removed, its reference count is checked again under the blob
+    store's lock, since an upload may have just attached to it (`blob_referenced`
+    returns that count, or None when it cannot tell; then the file is kept).
+    """
+
+    def __init__(self, root: str, references: Callable[[], Iterable[Tuple[str, Optional[int]]]],
+                 blobs: Optional[BlobStore] = None, blob_referenced: Optional[Callable[[str], Optional[int]]] = None,
+                 grace: float = UPLOAD_GC_GRACE, mode: str = UPLOAD_GC_MODE,
+                 quarantine_ttl: float = UPLOAD_GC_QUARANTINE_TTL, interval: float = UPLOAD_GC_INTERVAL):
+        if mode not in GC_MODES:
+            raise ValueError(f"UPLOAD_GC_MODE must be one of {GC_MODES}, got {mode!r}")
+        self.root = root
+        self.references = references
+        self.blobs = blobs
+        self.blob_referenced = blob_referenced
+        self.grace = grace
+        self.mode = mode
+        self.quarantine_ttl = quarantine_ttl
+        self.interval = interval
+        self.quarantine_dir = os.path.join(root, QUARANTINE_DIR)
+
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.failures = 0
+        self.last_report: Optional[dict] = None
+
+    # --- Background thread ---
+
+    def start(self) -> None:
+        """Collects every `interval` seconds on a daemon thread, the first time shortly after startup."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="upload-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the thread, interrupting a collection in progress between files."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        delay = min(self.interval, 600)
+        while not self._stop.wait(delay):
+            try:
+                self.run()
+            except Exception:
+                self.failures += 1
+                logger.exception("Upload garbage collection failed")
+            delay = self.interval
+
+    # --- Collection ---
+
+    def run(self) -> dict:
+        """One collection. Returns (and keeps, see usage()/stats()) its report."""
+        with self._run_lock:
+            report = self._collect()
+        self.runs += 1
+        if not report.get("interrupted"):  # partial totals would understate usage
+            self.last_report = report
+        logger.info(
+            "Upload garbage collection finished",
+            extra={k: v for k, v in report.items() if k != "organizations"},
+        )
+        return report
+
+    def _collect(self) -> dict:
+        started = time.time()
+        cutoff = started - self.grace
+        report = {
+            "mode": self.mode,
+            "files": 0, "bytes": 0,
+            "referenced_files": 0, "referenced_bytes": 0,
+            "orphans": 0, "orphan_bytes": 0,
+            "orphans_in_grace": 0,
+            "removed": 0, "quarantined": 0, "purged": 0, "staging_removed": 0,
+            "missing_files": 0,  # referenced paths with no file on disk
+        }
+        usage = {}  # organization -> [files, bytes]
+
+        references = iter(self.references())
+        ref = next(references, None)
+        referenced_blobs = {}  # digest -> still referenced, for this run's re-checks
+        for key, group in itertools.groupby(scan_uploads(self.root), key=lambda f: f.key):
+            if self._stop.is_set():  # shutting down: leave the rest for the next run
+                report["interrupted"] = True
+                ref = None
+                break
+            while ref is not None and ref[0] < key:
+                report["missing_files"] += 1
+                ref = _next_path(references, ref)
+            organizations = []
+            while ref is not None and ref[0] == key:
+                organizations.append("unassigned" if ref[1] is None else str(ref[1]))
+                ref = next(references, None)
+
+            for f in group:
+                report["files"] += 1
+                report["bytes"] += f.size
+                if organizations:
+                    report["referenced_files"] += 1
+                    report["referenced_bytes"] += f.size
+                    for org in organizations:  # a blob shared between organizations counts for each
+                        totals = usage.setdefault(org, [0, 0])
+                        totals[0] += 1
+                        totals[1] += f.size
+                elif f.mtime > cutoff:
+                    report["orphans_in_grace"] += 1
+                else:
+                    report["orphans"] += 1
+                    report["orphan_bytes"] += f.size
+                    self._dispose(f, report, referenced_blobs)
+        while ref is not None:
+            report["missing_files"] += 1
+            ref = _next_path(references, ref)
+
+        if self.mode == "quarantine":
+            report["purged"] = self._purge_quarantine(started - self.quarantine_ttl)
+        if self.mode != "report":
+            report["staging_removed"] = self._sweep_staging(cutoff)
+        report["organizations"] = {org: {"files": files, "bytes": size} for org, (files, size) in usage.items()}
+        report["finished_at"] = datetime.now(timezone.utc).isoformat()
+        report["duration_seconds"] = round(time.time() - started, 3)
+        return report
+
+    def _dispose(self, f: UploadFile, report: dict, referenced_blobs: dict) -> None:
+        if self.mode == "report":
+            return
+        m = _BLOB_NAME.match(os.path.basename(f.relpath))
+        if m is None or self.blobs is None:
+            self._remove(f, report)
+            return
+        digest = m.group(1)
+        with self.blobs.lock(digest):
+            if digest not in referenced_blobs:
+                count = self.blob_referenced(digest) if self.blob_referenced else 0
+                referenced_blobs.clear()  # a blob's files are adjacent: remember only the last one
+                referenced_blobs[digest] = count != 0  # None (unknown) keeps the file
+            if not referenced_blobs[digest]:
+                self._remove(f, report)
+
+    def _remove(self, f: UploadFile, report: dict) -> None:
+        try:
+            if self.mode == "delete":
+                os.remove(f.path)
+                report["removed"] += 1
+            else:
+                dest = os.path.join(self.quarantine_dir, *f.relpath.split("/"))
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                os.replace(f.path, dest)
+                os.utime(dest)  # the quarantine TTL counts from now
+                report["quarantined"] += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Unable to remove orphaned upload", extra={"file": f.relpath, "error": str(e)})
+
+    def _purge_quarantine(self, cutoff: float) -> int:
+        purged = 0
+        for directory, dirnames, filenames in os.walk(self.quarantine_dir, topdown=False):
+            for name in filenames:
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        purged += 1
+                except FileNotFoundError:
+                    pass
+            if directory != self.quarantine_dir and not os.listdir(directory):
+                os.rmdir(directory)
+        return purged
+
+    def _sweep_staging(self, cutoff: float) -> int:
+        """Staging files left by a process that died mid-upload (resumable sessions expire on their own)."""
+        removed = 0
+        staging_dir = os.path.join(self.root, STAGING_DIR)
+        try:
+            names = os.listdir(staging_dir)
+        except FileNotFoundError:
+            return removed
+        for name in names:
+            if not _STAGED_NAME.match(name):
+                continue
+            path = os.path.join(staging_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    # --- Reporting ---
+
+    def usage(self, organization_id: Optional[int]) -> Optional[dict]:
+        """An organization's files and bytes as of the last collection; None before the first."""
+        report = self.last_report
+        if report is None:
+            return None
+        org = "unassigned" if organization_id is None else str(organization_id)
+        totals = report["organizations"].get(org, {"files": 0, "bytes": 0})
+        return {**totals, "measured_at": report["finished_at"]}
+
+    def stats(self) -> dict:
+        report = self.last_report or {}
+        return {
+            "mode": self.mode,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": {k: v for k, v in report.items() if k != "organizations"} or None,
+        }
+
+
+def _next_path(references: Iterator[Tuple[str, Optional[int]]], ref: Tuple[str, Optional[int]]):
+    """Skips the rest of `ref`'s rows (one per organization), returning the next path's first row."""
+    for nxt in references:
+        if nxt[0] != ref[0]:
+            return nxt
+    return None
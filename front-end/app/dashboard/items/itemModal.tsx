@@ -62,7 +62,7 @@ export default function ItemModal({ show, onHide, item, onDelete, onSave }: Item
                 return;
             }
             
-            const response = await fetch(`${apiBaseUrl}/item/${itemIdNum}/images`);
+            const response = await fetch(`${apiBaseUrl}/item/${itemIdNum}/images?size=modal`);
             if (response.ok) {
                 const data = await response.json();
                 // Handle both array and object responses
@@ -74,7 +74,7 @@ export default function ItemsGridTest({ userId }: ItemsGridTestProps) {
           if (isNaN(itemIdNum)) return;
 
           const response = await fetch(
-            `${apiBaseUrl}/item/${itemIdNum}/images`,
+            `${apiBaseUrl}/item/${itemIdNum}/images?size=thumb`,
           );
           if (!response.ok) return;
 